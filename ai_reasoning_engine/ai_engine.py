@@ -1,28 +1,57 @@
 # ai_reasoning_engine/ai_engine.py
-import json
 import os
+import json
 import uuid
+import asyncio
+import weakref
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 from ai_reasoning_engine.prompts import SYSTEM_PROMPT, TOOLS
 from ai_reasoning_engine.memory_manager import MemoryManager
+from ai_reasoning_engine.project_resolver import get_resolver
+from app.services.engine_state import get_engine_state_store
 # Load env once
 load_dotenv("creds.env")
 
-# Create client explicitly; do NOT rely on global openai.api_key
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Sync tools (no "afunc") run here, so a burst of chats can't exhaust the default executor.
+AI_TOOL_THREADS = int(os.getenv("AI_TOOL_THREADS", "8"))
+# Per-call limit for tools without their own "timeout" in TOOLS.
+AI_TOOL_TIMEOUT_SEC = float(os.getenv("AI_TOOL_TIMEOUT_SEC", "30"))
+# Actions of one step beyond this are answered with an error instead of run.
+AI_MAX_ACTIONS_PER_STEP = int(os.getenv("AI_MAX_ACTIONS_PER_STEP", "8"))
+_tool_executor = ThreadPoolExecutor(max_workers=AI_TOOL_THREADS, thread_name_prefix="ai-tool")
+
+# One AsyncOpenAI client per event loop (its httpx pool is bound to the loop that created it).
+# Created explicitly; do NOT rely on global openai.api_key
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+
+def _client() -> AsyncOpenAI:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        _clients[loop] = client
+    return client
+
 
-memory = MemoryManager()  # uses its own client internally (we’ll fix below)
-SESSION_ID = str(uuid.uuid4())
-CONTEXT = {"project_name": None, "pending_query": None}
+memory = MemoryManager()  # shares the app's Qdrant client and collection bootstrap
+project_resolver = get_resolver()  # local key/name/alias matching; the LLM only for ambiguous messages
+engine_states = get_engine_state_store()  # per chatSessionId: project context and pending query
+# Session of callers that don't pass one (CLI, scripts): one per process, as before.
+DEFAULT_SESSION_ID = str(uuid.uuid4())
 
-def extract_project_name(query: str) -> str:
+async def aextract_project_name(query: str, candidates=None) -> str:
     system_prompt = (
         "You are an assistant. Extract the project name from the user input. "
         "Return only the project name. If not found, return 'unknown'."
     )
+    if candidates:
+        system_prompt += " The user most likely means one of these projects: " + ", ".join(candidates) + "."
     try:
-        resp = client.chat.completions.create(
+        resp = await _client().chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -34,83 +63,154 @@ def extract_project_name(query: str) -> str:
     except Exception:
         return "unknown"
 
-def ai_reasoning_engine(user_query: str) -> str:
+
+def _run_blocking(coro):
+    """
+    asyncio.run for the sync entry points. Called from a thread that is already
+    running a loop (asyncio.run would raise), the coroutine runs on its own loop in
+    a helper thread, and the caller's loop is blocked until it finishes: async code
+    should await the a* variants instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-blocking") as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+def extract_project_name(query: str, candidates=None) -> str:
+    return _run_blocking(aextract_project_name(query, candidates))
+
+
+async def _run_tool(fn_name: str, tool_input):
+    tool = TOOLS[fn_name]
+    args = (tool_input,) if tool["needs_input"] else ()
+    if tool.get("afunc"):
+        return await tool["afunc"](*args)
+    return await asyncio.get_running_loop().run_in_executor(_tool_executor, tool["func"], *args)
+
+
+async def _observe(action: dict) -> dict:
+    """One action's observation; a failure or timeout is reported to the model, not raised."""
+    fn_name = action.get('function')
+    result = {'function': fn_name, 'input': action.get('input')}
+    if fn_name not in TOOLS:
+        return {**result, 'error': f"unknown function {fn_name!r}"}
+    timeout = TOOLS[fn_name].get('timeout', AI_TOOL_TIMEOUT_SEC)
+    try:
+        # A sync tool that times out keeps its pool thread until it returns; the turn moves on.
+        return {**result, 'observation': await asyncio.wait_for(_run_tool(fn_name, action.get('input')), timeout)}
+    except asyncio.TimeoutError:
+        return {**result, 'error': f"timed out after {timeout:g}s"}
+    except Exception as e:
+        return {**result, 'error': str(e)}
+
+
+async def _run_actions(call: dict) -> dict:
+    """
+    Run the actions of one step concurrently: {"actions": [{"function", "input"}, ...]},
+    or a single {"function", "input"}. Observations come back in action order.
+    """
+    actions = call.get('actions')
+    if not isinstance(actions, list):
+        actions = [{'function': call.get('function'), 'input': call.get('input')}]
+    actions = [a if isinstance(a, dict) else {'function': a} for a in actions]
+    observations = await asyncio.gather(*(_observe(a) for a in actions[:AI_MAX_ACTIONS_PER_STEP]))
+    observations += [
+        {'function': a.get('function'), 'input': a.get('input'),
+         'error': f"not run: at most {AI_MAX_ACTIONS_PER_STEP} actions per step"}
+        for a in actions[AI_MAX_ACTIONS_PER_STEP:]
+    ]
+    if len(observations) == 1 and 'observation' in observations[0]:
+        return {'type': 'observation', 'observation': observations[0]['observation']}
+    return {'type': 'observation', 'observations': observations}
+
+
+async def aai_reasoning_engine(user_query: str, session_id: Optional[str] = None) -> str:
     """
     AI reasoning engine that follows START, PLAN, ACTION, OBSERVATION, and OUTPUT states dynamically.
     :param user_query: User's request (e.g., "Summarize Jira updates for Sarthi project")
+    :param session_id: chatSessionId whose project context and memories the turn uses
     :return: Structured AI response
     """
+    session_id = session_id or DEFAULT_SESSION_ID
     try:
-        detected_project = extract_project_name(user_query)
-        if detected_project.lower() != "unknown":
-            CONTEXT["project_name"] = detected_project
-
-        project_name = CONTEXT["project_name"]
-        if project_name is None:
-            CONTEXT["pending_query"] = user_query
-
-        # If the user just provided a project name *and* we have a pending query,
-        # swap user_query with that pending intent and clear pending.
-        if project_name and CONTEXT["pending_query"]:
-            user_query = CONTEXT["pending_query"]
-            CONTEXT["pending_query"] = None
-
-        # Build messages with explicit project context
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-        if project_name:
-            messages.append({
-                "role": "system",
-                "content": f"Current project context: {project_name}"
-            })
-
-        # Context from memory
-        memories = memory.query_memory(
-            query_text=user_query, top_k=3,
-            project_name=project_name, session_id=SESSION_ID
+        async with engine_states.aturn(session_id) as context:
+            return await _aturn(user_query, session_id, context)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+async def _aturn(user_query: str, session_id: str, context: dict) -> str:
+    detected = await project_resolver.aresolve(user_query, llm_fallback=aextract_project_name)
+    if detected.name.lower() != "unknown":
+        context["project_name"] = detected.name
+        context["project_key"] = detected.key
+
+    project_name = context["project_name"]
+    if project_name is None:
+        context["pending_query"] = user_query
+
+    # If the user just provided a project name *and* we have a pending query,
+    # swap user_query with that pending intent and clear pending.
+    if project_name and context["pending_query"]:
+        user_query = context["pending_query"]
+        context["pending_query"] = None
+
+    # Build messages with explicit project context
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if project_name:
+        key = f" (Jira key {context['project_key']})" if context["project_key"] else ""
+        messages.append({
+            "role": "system",
+            "content": f"Current project context: {project_name}{key}"
+        })
+
+    # Context from memory
+    memories = await memory.aquery_memory(
+        query_text=user_query, top_k=3,
+        project_name=project_name, session_id=session_id
+    )
+    for mem in memories:
+        if mem:
+            messages.append({"role": "system", "content": f"Past Memory: {mem}"})
+
+    # User input
+    messages.append({"role": "user", "content": json.dumps({"type": "user", "user": user_query})})
+
+    # Safety valve to avoid infinite loops
+    MAX_ITERS = 100
+
+    for _ in range(MAX_ITERS):
+        plan_response = await _client().chat.completions.create(
+            model="gpt-4o",
+            messages=messages,
+            response_format={"type": "json_object"},
+            temperature=0.2,
         )
-        if memories and memories[0]:
-            for mem in memories[0]:
-                messages.append({"role": "system", "content": f"Past Memory: {mem}"})
-
-        # User input
-        messages.append({"role": "user", "content": json.dumps({"type": "user", "user": user_query})})
-
-        # Safety valve to avoid infinite loops
-        MAX_ITERS = 100
-
-        for _ in range(MAX_ITERS):
-            plan_response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                response_format={"type": "json_object"},
-                temperature=0.2,
+        plan_text = plan_response.choices[0].message.content
+        messages.append({'role': 'assistant', 'content': plan_text})
+        call = json.loads(plan_text or "{}")
+
+        if call.get('type') == "output":
+            await memory.aadd_memory(
+                user_input=user_query,
+                ai_response=call.get('output', ''),
+                project_name=project_name,
+                session_id=session_id,
+                tags="jira_summary",
             )
-            plan_text = plan_response.choices[0].message.content
-            messages.append({'role': 'assistant', 'content': plan_text})
-            call = json.loads(plan_text or "{}")
-
-            if call.get('type') == "output":
-                memory.add_memory(
-                    user_input=user_query,
-                    ai_response=call.get('output', ''),
-                    project_name=project_name,
-                    session_id=SESSION_ID,
-                    tags="jira_summary",
-                )
-                return call.get('output', '')
-
-            if call.get('type') == "action":
-                fn_name = call.get('function')
-                fn = TOOLS[fn_name]['func']
-                if TOOLS[fn_name]['needs_input']:
-                    observation = fn(call.get('input'))
-                else:
-                    observation = fn()
-                obs = {'type': 'observation', 'observation': observation}
-                messages.append({'role': 'developer', 'content': json.dumps(obs)})
-                continue
-
-        return "I reached the maximum reasoning steps without a final output. Try refining the query."
+            return call.get('output', '')
 
-    except Exception as e:
-        return f"Error: {str(e)}"
+        if call.get('type') == "action":
+            obs = await _run_actions(call)
+            messages.append({'role': 'developer', 'content': json.dumps(obs, default=str)})
+            continue
+
+    return "I reached the maximum reasoning steps without a final output. Try refining the query."
+
+
+def ai_reasoning_engine(user_query: str, session_id: Optional[str] = None) -> str:
+    """Blocking entry point (CLI, scripts); async callers await aai_reasoning_engine."""
+    return _run_blocking(aai_reasoning_engine(user_query, session_id))
@@ -0,0 +1,233 @@
+# ai_reasoning_engine/jira_tools.py
+"""
+Agent tools that answer Jira questions with aggregates computed here, so the
+prompt carries a few hundred tokens per observation instead of every issue of
+the project (an observation stays in `messages` for the rest of the turn).
+
+Each tool takes the project (name, alias or key; the resolver maps it to the
+Jira key) either as a plain string or as {"project": ..., <options>}. Issues
+are fetched once per project and reused for JIRA_ISSUES_TTL_SEC, so several
+tools in one turn cost one Jira fetch. getJiraIssues is the only tool that
+returns issues themselves: one page at a time, with only the requested fields.
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+import weakref
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from ai_reasoning_engine.project_resolver import get_resolver
+
+load_dotenv("creds.env")
+
+JIRA_ISSUES_TTL_SEC = float(os.getenv("JIRA_ISSUES_TTL_SEC", "60"))
+UPCOMING_DAYS = 14
+# Longest issue list any aggregate returns; the count is always exact.
+MAX_LISTED = 20
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+DEFAULT_FIELDS = ("key", "summary", "status", "priority", "assignee", "duedate")
+DONE_STATUSES = {"done", "closed", "resolved", "cancelled", "canceled", "won't do"}
+
+
+# -----------------------
+# Input and issue cache
+# -----------------------
+def _options(tool_input) -> Dict[str, Any]:
+    if isinstance(tool_input, str):
+        try:
+            parsed = json.loads(tool_input)
+            tool_input = parsed if isinstance(parsed, dict) else tool_input
+        except ValueError:
+            pass
+    if isinstance(tool_input, dict):
+        options = dict(tool_input)
+        options["project"] = options.get("project") or options.get("project_name") or options.get("project_key")
+    else:
+        options = {"project": tool_input}
+    project = str(options.get("project") or "").strip()
+    if not project:
+        raise ValueError("a project name or key is required")
+    options["project"] = get_resolver().index().canonical(project) or project
+    return options
+
+
+_issues: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+_fetch_lock = threading.Lock()
+_afetch_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _cached(project_key: str) -> Optional[List[Dict[str, Any]]]:
+    entry = _issues.get(project_key)
+    return entry[1] if entry and entry[0] > time.monotonic() else None
+
+
+def project_issues(project_key: str) -> List[Dict[str, Any]]:
+    with _fetch_lock:
+        issues = _cached(project_key)
+        if issues is None:
+            # Imported here: jira_fetcher refuses to import without Jira credentials.
+            from jira_client.jira_fetcher import get_issues
+            issues = get_issues(project_key)
+            _issues[project_key] = (time.monotonic() + JIRA_ISSUES_TTL_SEC, issues)
+        return issues
+
+
+async def aproject_issues(project_key: str) -> List[Dict[str, Any]]:
+    # Concurrent tools of one turn wait for the first fetch instead of repeating it.
+    lock = _afetch_locks.get(project_key)
+    if lock is None:
+        lock = _afetch_locks[project_key] = asyncio.Lock()
+    async with lock:
+        issues = _cached(project_key)
+        if issues is None:
+            from jira_client.jira_fetcher import aget_issues
+            issues = await aget_issues(project_key)
+            _issues[project_key] = (time.monotonic() + JIRA_ISSUES_TTL_SEC, issues)
+        return issues
+
+
+# -----------------------
+# Aggregates (pure functions of the compact issues from jira_fetcher)
+# -----------------------
+def is_done(issue: Dict[str, Any]) -> bool:
+    if issue.get("status_category"):
+        return issue["status_category"] == "done"
+    return (issue.get("status") or "").lower() in DONE_STATUSES
+
+
+def _brief(issue: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: issue.get(k) for k in ("key", "summary", "status", "assignee", "duedate")}
+
+
+def _listed(issues: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"count": len(issues), "issues": [_brief(i) for i in issues[:MAX_LISTED]]}
+
+
+def _due(issue: Dict[str, Any]) -> Optional[date]:
+    try:
+        return date.fromisoformat(issue["duedate"][:10])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def breakdown(issues: List[Dict[str, Any]], options: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "total": len(issues),
+        "open": sum(not is_done(i) for i in issues),
+        "by_status": dict(Counter(i.get("status") or "None" for i in issues).most_common()),
+        "by_priority": dict(Counter(i.get("priority") or "None" for i in issues).most_common()),
+        "by_type": dict(Counter(i.get("issue_type") or "None" for i in issues).most_common()),
+    }
+
+
+def _today(options: Dict[str, Any]) -> date:
+    return date.fromisoformat(options["today"]) if options.get("today") else date.today()
+
+
+def due_dates(issues: List[Dict[str, Any]], options: Dict[str, Any]) -> Dict[str, Any]:
+    today = _today(options)
+    days = int(options.get("days") or UPCOMING_DAYS)
+    dated = sorted(((d, i) for i in issues if not is_done(i) and (d := _due(i))), key=lambda x: x[0])
+    overdue = [i for d, i in dated if d < today]
+    upcoming = [i for d, i in dated if today <= d <= today + timedelta(days=days)]
+    return {
+        "as_of": today.isoformat(),
+        "overdue": _listed(overdue),
+        f"due_in_{days}_days": _listed(upcoming),
+        "open_without_duedate": sum(not is_done(i) and not i.get("duedate") for i in issues),
+    }
+
+
+def blockers(issues: List[Dict[str, Any]], options: Dict[str, Any]) -> Dict[str, Any]:
+    by_key = {i.get("key"): i for i in issues}
+    blocked = []
+    for issue in issues:
+        if is_done(issue) or not issue.get("blockers"):
+            continue
+        # Links to issues that are done no longer block; links outside the project are kept.
+        open_links = [k for k in issue["blockers"] if k not in by_key or not is_done(by_key[k])]
+        if open_links:
+            blocked.append({**_brief(issue), "blocked_by": open_links})
+    blocked.sort(key=lambda b: len(b["blocked_by"]), reverse=True)
+    return {"count": len(blocked), "issues": blocked[:MAX_LISTED]}
+
+
+def assignee_load(issues: List[Dict[str, Any]], options: Dict[str, Any]) -> Dict[str, Any]:
+    today = _today(options)
+    load: Dict[str, Counter] = defaultdict(Counter)
+    for issue in issues:
+        if is_done(issue):
+            continue
+        counts = load[issue.get("assignee") or "Unassigned"]
+        counts["open"] += 1
+        counts[issue.get("status") or "None"] += 1
+        if (issue.get("priority") or "").lower() in ("high", "highest"):
+            counts["high_priority"] += 1
+        due = _due(issue)
+        if due and due < today:
+            counts["overdue"] += 1
+    ranked = sorted(load.items(), key=lambda item: item[1]["open"], reverse=True)
+    return {"assignees": {name: dict(counts) for name, counts in ranked}}
+
+
+def summary(issues: List[Dict[str, Any]], options: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "breakdown": breakdown(issues, options),
+        "due_dates": due_dates(issues, options),
+        "blockers": blockers(issues, options),
+        "assignee_load": assignee_load(issues, options),
+    }
+
+
+def page(issues: List[Dict[str, Any]], options: Dict[str, Any]) -> Dict[str, Any]:
+    size = max(1, min(int(options.get("page_size") or PAGE_SIZE), MAX_PAGE_SIZE))
+    number = max(1, int(options.get("page") or 1))
+    fields = options.get("fields") or DEFAULT_FIELDS
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(",") if f.strip()]
+    selected = issues
+    if options.get("status"):
+        selected = [i for i in issues if (i.get("status") or "").lower() == str(options["status"]).lower()]
+    start = (number - 1) * size
+    return {
+        "total": len(selected),
+        "page": number,
+        "pages": (len(selected) + size - 1) // size,
+        "issues": [{f: i.get(f) for f in fields} for i in selected[start:start + size]],
+    }
+
+
+# -----------------------
+# Tool entry points
+# -----------------------
+def _tool(analysis):
+    # Bad input comes back as an observation, so the model can correct the call.
+    def func(tool_input=None):
+        try:
+            options = _options(tool_input)
+            return {"project": options["project"], **analysis(project_issues(options["project"]), options)}
+        except ValueError as e:
+            return {"error": str(e)}
+
+    async def afunc(tool_input=None):
+        try:
+            options = await asyncio.to_thread(_options, tool_input)  # may refresh the project index
+            return {"project": options["project"], **analysis(await aproject_issues(options["project"]), options)}
+        except ValueError as e:
+            return {"error": str(e)}
+
+    return func, afunc
+
+
+get_issue_breakdown, aget_issue_breakdown = _tool(breakdown)
+get_due_dates, aget_due_dates = _tool(due_dates)
+get_blockers, aget_blockers = _tool(blockers)
+get_assignee_load, aget_assignee_load = _tool(assignee_load)
+get_project_summary, aget_project_summary = _tool(summary)
+get_issues_page, aget_issues_page = _tool(page)
@@ -1,76 +1,53 @@
 # ai_reasoning_engine/memory_manager.py
-import os
+import time
 import uuid
 import datetime
-from dotenv import load_dotenv
-from openai import OpenAI
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams, Filter, FieldCondition, MatchValue
+from qdrant_client.http.models import Filter, FieldCondition, MatchValue, PointStruct
+from app.services import qdrant_service
+from app.services.qdrant_connection import run_async
+from app.services.qdrant_profiles import get_profile
+from app.services.embedding_service import embed_text, aembed_text
+from app.services.retrieval_cache import get_retrieval_cache
 
-load_dotenv("creds.env")
 
 class MemoryManager:
-    def __init__(self, collection_name="ai_memory"):
+    def __init__(self, collection_name=qdrant_service.QDRANT_MEMORY_COLLECTION):
+        # Its own collection (not the document chunks'), so lookups don't pay for KB size.
         self.collection_name = collection_name
 
-        # OpenAI client (explicit)
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-        # Qdrant client
-        self.qdrant_url = os.getenv("QDRANT_URL")
-        self.qdrant_api_key = os.getenv("QDRANT_API_KEY")
-        self.client_qdrant = QdrantClient(url=self.qdrant_url, api_key=self.qdrant_api_key)
-
-        self._init_collection()
-
     def _init_collection(self):
-        existing = [c.name for c in self.client_qdrant.get_collections().collections]
-        if self.collection_name not in existing:
-            self.client_qdrant.recreate_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(size=1536, distance=Distance.COSINE)
-            )
-
-        # Indexes for filtering by project/chat
-        for field in ["projectId", "chatSessionId", "tags"]:
-            try:
-                self.client_qdrant.create_payload_index(
-                    collection_name=self.collection_name,
-                    field_name=field,
-                    field_schema="keyword",
-                )
-            except Exception as e:
-                if "already exists" not in str(e):
-                    raise
+        # Cached after the first call per process: no metadata round trips on the hot path.
+        qdrant_service.bootstrap_collection(
+            self.collection_name, qdrant_service.DEFAULT_VECTOR_SIZE, qdrant_service.MEMORY_PAYLOAD_INDEXES,
+            profile=get_profile(qdrant_service.QDRANT_MEMORY_PROFILE),
+        )
 
-    def get_embedding(self, text: str):
-        resp = self.client.embeddings.create(model="text-embedding-3-small", input=text)
-        return resp.data[0].embedding
+    async def _ainit_collection(self):
+        await run_async(qdrant_service.abootstrap_collection(
+            self.collection_name, qdrant_service.DEFAULT_VECTOR_SIZE, qdrant_service.MEMORY_PAYLOAD_INDEXES,
+            profile=get_profile(qdrant_service.QDRANT_MEMORY_PROFILE),
+        ))
 
-    def add_memory(self, user_input, ai_response, project_name=None, session_id=None, tags=None):
-        text = f"User: {user_input}\nAI: {ai_response}"
-        embedding = self.get_embedding(text)
+    def get_embedding(self, text: str):
+        # Shared with file ingestion, so repeated texts hit the embedding cache.
+        return embed_text(text)
 
+    @staticmethod
+    def _memory_point(text, embedding, project_name, session_id, tags) -> PointStruct:
         payload = {
+            "type": "memory",
             "text": text,
             "timestamp": datetime.datetime.now().isoformat(),
+            "ts": time.time(),                 # numeric, for TTL expiry (memory_compaction)
             "projectId": project_name,         # aligned key
             "chatSessionId": session_id,       # aligned key
-            "tags": tags or []
+            # Always a list: a keyword filter on "tags" matches any element of it.
+            "tags": [tags] if isinstance(tags, str) else list(tags or [])
         }
+        return PointStruct(id=str(uuid.uuid4()), vector=embedding, payload=payload)
 
-        self.client_qdrant.upsert(
-            collection_name=self.collection_name,
-            points=[{
-                "id": str(uuid.uuid4()),
-                "vector": embedding,
-                "payload": payload
-            }]
-        )
-
-    def query_memory(self, query_text, top_k=3, project_name=None, session_id=None, tags=None):
-        embedding = self.get_embedding(query_text)
-
+    @staticmethod
+    def _memory_filter(project_name=None, session_id=None, tags=None):
         must = []
         if project_name:
             must.append(FieldCondition(key="projectId", match=MatchValue(value=project_name)))
@@ -78,17 +55,61 @@ class MemoryManager:
             must.append(FieldCondition(key="chatSessionId", match=MatchValue(value=session_id)))
         if tags:
             must.append(FieldCondition(key="tags", match=MatchValue(value=tags)))
+        return Filter(must=must) if must else None
+
+    @staticmethod
+    def _cache_scope(project_name=None, session_id=None, tags=None):
+        # Same keys as the payload, so writes to a project/session invalidate its cached lookups.
+        scope = {"projectId": project_name, "chatSessionId": session_id, "tags": tags}
+        return {k: v for k, v in scope.items() if v}
+
+    def add_memory(self, user_input, ai_response, project_name=None, session_id=None, tags=None):
+        text = f"User: {user_input}\nAI: {ai_response}"
+        embedding = self.get_embedding(text)
+        self._init_collection()
+        qdrant_service.upsert_points(
+            [self._memory_point(text, embedding, project_name, session_id, tags)], collection=self.collection_name
+        )
+
+    async def aadd_memory(self, user_input, ai_response, project_name=None, session_id=None, tags=None):
+        text = f"User: {user_input}\nAI: {ai_response}"
+        embedding = await aembed_text(text)
+        await self._ainit_collection()
+        await run_async(qdrant_service.aupsert_points(
+            [self._memory_point(text, embedding, project_name, session_id, tags)], collection=self.collection_name
+        ))
+
+    def query_memory(self, query_text, top_k=3, project_name=None, session_id=None, tags=None):
+        self._init_collection()
+        query_filter = self._memory_filter(project_name, session_id, tags)
+        hits = get_retrieval_cache().retrieve(
+            self.collection_name, query_text, top_k, self._cache_scope(project_name, session_id, tags),
+            embed=self.get_embedding,
+            search=lambda embedding: qdrant_service.search(
+                embedding, limit=top_k, filters=query_filter, collection=self.collection_name
+            ),
+            rehydrate=lambda refs: qdrant_service.retrieve_hits(refs, collection=self.collection_name),
+        )
+        return [hit.payload.get("text") for hit in hits]
+
+    async def aquery_memory(self, query_text, top_k=3, project_name=None, session_id=None, tags=None):
+        await self._ainit_collection()
+        query_filter = self._memory_filter(project_name, session_id, tags)
+
+        async def search(embedding):
+            return await run_async(qdrant_service.asearch(
+                embedding, limit=top_k, filters=query_filter, collection=self.collection_name
+            ))
 
-        qfilter = Filter(must=must) if must else None
+        async def rehydrate(refs):
+            return await run_async(qdrant_service.aretrieve_hits(refs, collection=self.collection_name))
 
-        hits = self.client_qdrant.search(
-            collection_name=self.collection_name,
-            query_vector=embedding,
-            limit=top_k,
-            query_filter=qfilter,
+        hits = await get_retrieval_cache().aretrieve(
+            self.collection_name, query_text, top_k, self._cache_scope(project_name, session_id, tags),
+            aembed_text, search, rehydrate,
         )
         return [hit.payload.get("text") for hit in hits]
 
     def clear_memory(self):
-        self.client_qdrant.delete_collection(self.collection_name)
+        qdrant_service.delete_collection(self.collection_name)
         self._init_collection()
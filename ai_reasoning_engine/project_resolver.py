@@ -0,0 +1,243 @@
+# ai_reasoning_engine/project_resolver.py
+"""
+Resolve which Jira project a chat message is about without an LLM call.
+
+The message is matched against a cached index of Jira project keys, names and
+aliases, in order:
+  1. key    - a project key or issue key in the text ("DEM", "DEM-42"; case-sensitive)
+  2. exact  - a project name or alias as a whole phrase ("the sarthi mobile project")
+  3. token  - distinctive words of one project's name ("sarthi" for "Sarthi Mobile")
+  4. fuzzy  - near-miss spellings of those words (difflib, PROJECT_FUZZY_CUTOFF)
+Several equally good candidates are ambiguous: then, and when the message says
+"project" but nothing matched, the LLM fallback decides (and gets the
+candidates). Messages that name no project resolve to "unknown" locally, so
+the caller keeps its current project context.
+
+Aliases come from PROJECT_ALIASES, a JSON object of alias -> project key, e.g.
+{"crm": "SAL", "the app": "MOB"}. The index is refreshed every
+PROJECT_INDEX_TTL_SEC; if Jira is unreachable the last index is kept.
+"""
+import os
+import re
+import json
+import asyncio
+import time
+import difflib
+import logging
+import threading
+from collections import Counter
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+from dotenv import load_dotenv
+
+from app.utils.bm25 import STOPWORDS
+
+load_dotenv("creds.env")
+logger = logging.getLogger(__name__)
+
+PROJECT_INDEX_TTL_SEC = float(os.getenv("PROJECT_INDEX_TTL_SEC", "600"))
+PROJECT_FUZZY_CUTOFF = float(os.getenv("PROJECT_FUZZY_CUTOFF", "0.85"))
+PROJECT_ALIASES = json.loads(os.getenv("PROJECT_ALIASES") or "{}")
+
+UNKNOWN = "unknown"
+# Words too common in project names and chat to identify a project on their own.
+GENERIC_WORDS = frozenset(
+    "project projects jira team board app application service platform system the new old main v1 v2".split()
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_KEY = re.compile(r"\b([A-Z][A-Z0-9]{1,9})(?:-\d+)?\b")
+_PROJECT_CUE = re.compile(r"\bprojects?\b", re.IGNORECASE)
+
+
+class Resolution(NamedTuple):
+    name: str                # canonical project name, or "unknown"
+    key: Optional[str]       # Jira project key when known
+    method: str              # key | exact | token | fuzzy | llm | none
+    candidates: List[str]    # keys considered when ambiguous
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def _phrase(text: str) -> str:
+    return " ".join(_words(text))
+
+
+class ProjectIndex:
+    def __init__(self, projects: Iterable[Dict[str, str]], aliases: Optional[Dict[str, str]] = None):
+        self.names: Dict[str, str] = {}               # key -> name
+        self.phrases: Dict[str, Set[str]] = {}        # normalized name/alias -> keys
+        self.tokens: Dict[str, Set[str]] = {}         # distinctive name word -> keys
+        for p in projects:
+            key, name = p.get("key"), p.get("name") or p.get("key")
+            if not key:
+                continue
+            self.names[key] = name
+            self._add_phrase(name, key)
+            for word in _words(name):
+                if len(word) >= 3 and word not in STOPWORDS and word not in GENERIC_WORDS:
+                    self.tokens.setdefault(word, set()).add(key)
+        for alias, key in (aliases or {}).items():
+            if key in self.names:
+                self._add_phrase(alias, key)
+        # Longest first, so "sarthi mobile" wins over "sarthi".
+        self._ordered = sorted(self.phrases, key=len, reverse=True)
+        self._vocabulary = list(self.tokens)
+
+    def _add_phrase(self, text: str, key: str):
+        phrase = _phrase(text)
+        if phrase:
+            self.phrases.setdefault(phrase, set()).add(key)
+
+    def __len__(self):
+        return len(self.names)
+
+    def by_key(self, text: str) -> Set[str]:
+        return {k for k in _KEY.findall(text) if k in self.names}
+
+    def by_phrase(self, words: List[str]) -> Set[str]:
+        padded = f" {' '.join(words)} "
+        for phrase in self._ordered:
+            if f" {phrase} " in padded:
+                # Every project sharing the longest matching length is a candidate.
+                return set().union(*(
+                    keys for p, keys in self.phrases.items() if len(p) == len(phrase) and f" {p} " in padded
+                ))
+        return set()
+
+    def _best(self, votes: Counter) -> Set[str]:
+        if not votes:
+            return set()
+        top = max(votes.values())
+        return {k for k, v in votes.items() if v == top}
+
+    def by_token(self, words: List[str]) -> Set[str]:
+        return self._best(Counter(k for w in set(words) for k in self.tokens.get(w, ())))
+
+    def by_fuzzy(self, words: List[str], cutoff: float = PROJECT_FUZZY_CUTOFF) -> Set[str]:
+        votes: Counter = Counter()
+        for w in set(words):
+            if len(w) < 4 or w in STOPWORDS or w in GENERIC_WORDS:
+                continue
+            for match in difflib.get_close_matches(w, self._vocabulary, n=2, cutoff=cutoff):
+                votes.update(self.tokens[match])
+        return self._best(votes)
+
+    def canonical(self, text: str) -> Optional[str]:
+        """The key of a project named exactly `text` (a name, alias or key), if unique."""
+        keys = self.phrases.get(_phrase(text), set()) | ({text.strip()} & set(self.names))
+        return next(iter(keys)) if len(keys) == 1 else None
+
+
+def _load_projects() -> List[Dict[str, str]]:
+    # Imported here: jira_fetcher refuses to import without Jira credentials.
+    from jira_client.jira_fetcher import get_projects
+    return get_projects() or []
+
+
+class ProjectResolver:
+    def __init__(
+        self,
+        load_projects: Callable[[], List[Dict[str, str]]] = _load_projects,
+        aliases: Optional[Dict[str, str]] = None,
+        ttl_sec: float = PROJECT_INDEX_TTL_SEC,
+    ):
+        self._load_projects = load_projects
+        self._aliases = PROJECT_ALIASES if aliases is None else aliases
+        self.ttl_sec = ttl_sec
+        self._index: Optional[ProjectIndex] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.counts: Counter = Counter()
+
+    def index(self) -> ProjectIndex:
+        if self._index is not None and time.monotonic() - self._loaded_at < self.ttl_sec:
+            return self._index
+        with self._lock:
+            if self._index is None or time.monotonic() - self._loaded_at >= self.ttl_sec:
+                try:
+                    projects = self._load_projects()
+                    if projects or self._index is None:
+                        self._index = ProjectIndex(projects, self._aliases)
+                except Exception:
+                    logger.warning("Could not refresh the Jira project index", exc_info=True)
+                    if self._index is None:
+                        self._index = ProjectIndex([])
+                self._loaded_at = time.monotonic()
+        return self._index
+
+    def _resolved(self, index: ProjectIndex, key: str, method: str) -> Resolution:
+        self.counts[method] += 1
+        return Resolution(index.names[key], key, method, [])
+
+    def _match(self, index: ProjectIndex, query: str, has_fallback: bool):
+        """(resolution, None) when decided locally, else (None, candidate keys) for the LLM."""
+        words = _words(query)
+        candidates: Set[str] = set()
+        for method, match in (
+            ("key", lambda: index.by_key(query)),
+            ("exact", lambda: index.by_phrase(words)),
+            ("token", lambda: index.by_token(words)),
+            ("fuzzy", lambda: index.by_fuzzy(words)),
+        ):
+            found = match()
+            if len(found) == 1:
+                return self._resolved(index, next(iter(found)), method), None
+            if found:
+                candidates = found
+                break
+
+        if not has_fallback or not (candidates or _PROJECT_CUE.search(query) or not len(index)):
+            self.counts["none"] += 1
+            return Resolution(UNKNOWN, None, "none", sorted(candidates)), None
+        self.counts["llm"] += 1
+        return None, sorted(candidates)
+
+    @staticmethod
+    def _from_llm(index: ProjectIndex, answer: Optional[str], candidates: List[str]) -> Resolution:
+        answer = (answer or UNKNOWN).strip()
+        key = index.canonical(answer) if answer.lower() != UNKNOWN else None
+        return Resolution(index.names[key] if key else answer, key, "llm", candidates)
+
+    def resolve(self, query: str, llm_fallback: Optional[Callable[[str, List[str]], str]] = None) -> Resolution:
+        """
+        The project `query` refers to. llm_fallback(query, candidate_names) is called
+        only when the local index can't decide; its answer is mapped back to a
+        known project when it names one.
+        """
+        index = self.index()
+        resolution, candidates = self._match(index, query, llm_fallback is not None)
+        if resolution is not None:
+            return resolution
+        return self._from_llm(index, llm_fallback(query, [index.names[k] for k in candidates]), candidates)
+
+    async def aresolve(
+        self, query: str, llm_fallback: Optional[Callable[[str, List[str]], Awaitable[str]]] = None
+    ) -> Resolution:
+        """resolve for the async engine: a due index refresh (a Jira request) runs in a thread."""
+        index = self._index
+        if index is None or time.monotonic() - self._loaded_at >= self.ttl_sec:
+            index = await asyncio.to_thread(self.index)
+        resolution, candidates = self._match(index, query, llm_fallback is not None)
+        if resolution is not None:
+            return resolution
+        return self._from_llm(index, await llm_fallback(query, [index.names[k] for k in candidates]), candidates)
+
+    def stats(self) -> Dict[str, float]:
+        local = sum(self.counts[m] for m in ("key", "exact", "token", "fuzzy"))
+        total = local + self.counts["none"] + self.counts["llm"]
+        return {
+            **{m: self.counts[m] for m in ("key", "exact", "token", "fuzzy", "none", "llm")},
+            "resolved_locally": local,
+            # Share of messages answered without an LLM call (a match, or "no project mentioned").
+            "local_rate": ((total - self.counts["llm"]) / total) if total else 0.0,
+            "projects_indexed": len(self._index) if self._index is not None else 0,
+        }
+
+
+_resolver = ProjectResolver()
+
+
+def get_resolver() -> ProjectResolver:
+    return _resolver
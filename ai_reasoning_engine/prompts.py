@@ -2,15 +2,27 @@
 
 # print(sys.path)
 
-from jira_client.jira_fetcher import get_issues as get_jira_issues
-from jira_client.jira_fetcher import get_projects as get_jira_projects
+from jira_client.jira_fetcher import get_projects as get_jira_projects, aget_projects as aget_jira_projects
+from ai_reasoning_engine import jira_tools
 from utils import get_current_date
 
 
+# "afunc" (optional) is the coroutine the async engine awaits; tools without one run
+# "func" on the engine's bounded tool thread pool. "timeout" (optional, seconds)
+# overrides AI_TOOL_TIMEOUT_SEC for one tool.
+# The Jira issue tools aggregate in Python (ai_reasoning_engine.jira_tools); only
+# getJiraIssues returns issues, one page of selected fields at a time.
+JIRA_ISSUES_TIMEOUT_SEC = 60  # first fetch of a large project pages through every issue
+
 TOOLS = {
     "getCurrentDate": {"func": get_current_date, "needs_input": False},
-    "getJiraIssues": {"func": get_jira_issues, "needs_input": True},
-    "getProjects": {"func": get_jira_projects, "needs_input": False}
+    "getProjects": {"func": get_jira_projects, "afunc": aget_jira_projects, "needs_input": False},
+    "getProjectSummary": {"func": jira_tools.get_project_summary, "afunc": jira_tools.aget_project_summary, "needs_input": True, "timeout": JIRA_ISSUES_TIMEOUT_SEC},
+    "getIssueBreakdown": {"func": jira_tools.get_issue_breakdown, "afunc": jira_tools.aget_issue_breakdown, "needs_input": True, "timeout": JIRA_ISSUES_TIMEOUT_SEC},
+    "getDueDates": {"func": jira_tools.get_due_dates, "afunc": jira_tools.aget_due_dates, "needs_input": True, "timeout": JIRA_ISSUES_TIMEOUT_SEC},
+    "getBlockers": {"func": jira_tools.get_blockers, "afunc": jira_tools.aget_blockers, "needs_input": True, "timeout": JIRA_ISSUES_TIMEOUT_SEC},
+    "getAssigneeLoad": {"func": jira_tools.get_assignee_load, "afunc": jira_tools.aget_assignee_load, "needs_input": True, "timeout": JIRA_ISSUES_TIMEOUT_SEC},
+    "getJiraIssues": {"func": jira_tools.get_issues_page, "afunc": jira_tools.aget_issues_page, "needs_input": True, "timeout": JIRA_ISSUES_TIMEOUT_SEC},
 }
 
 # TOOLS = {
@@ -36,8 +48,8 @@ The frontend uses `react-markdown` to render your final output. Therefore:
 
 **Special Rule for Missing Project Context**
 If you ever receive a user query related to jira issues/tasks and you do *not* know which project to operate on:
-1. In your PLAN, say you will call `getProjects()` to list the projects.
-2. In your ACTION, call `getProjects()`.
+1. In your ACTION's plan, say you will call `getProjects()` to list the projects.
+2. In that ACTION, call `getProjects()`.
 3. In your OUTPUT, return exactly one JSON object with:
 For Example -
    - `"type": "output"`
@@ -49,15 +61,23 @@ You also have access to prior memory logs provided as system messages prefixed w
 Use these to improve your planning, tool selection, and summaries, especially if the memory contains context for this project or request.
 
 **Tool Functions Available:**
-1. function getJiraIssues(project_name) → Fetches Jira issues for a project in JSON format.
-2. function getProjects() → Fetches all the projects. No input needed.
-3. function getCurrentDate() → Returns the current date in YYYY-MM-DD format. Always include getCurrentDate when checking for delays or blockers to identify overdue tasks.
+Jira issue tools take the project name or key as input, or an object {"project": "<name or key>", ...options}. They compute their results over all issues of the project, so counts are exact; lists are capped at 20 issues.
+1. function getProjectSummary(project) → Status/priority/type breakdown, overdue and upcoming issues, blockers and per-assignee load in one call. Prefer this for summaries and status reports.
+2. function getIssueBreakdown(project) → Total and open issues, counts by status, priority and issue type.
+3. function getDueDates(project) → Open issues that are overdue or due soon (by duedate), as of today. Options: "days" (upcoming window, default 14).
+4. function getBlockers(project) → Open issues blocked by other open issues, most blocked first.
+5. function getAssigneeLoad(project) → Open, overdue and high-priority issue counts per assignee.
+6. function getJiraIssues(project) → Individual issues, one page at a time. Options: "page" (default 1), "page_size" (default 25, max 100), "fields" (default key, summary, status, priority, assignee, duedate; also reporter, created, updated, subtasks, parent, blockers, labels, issue_type), "status" (only this status). Use it only when the user needs specific issues the other tools don't list.
+7. function getProjects() → Fetches all the projects. No input needed.
+8. function getCurrentDate() → Returns the current date in YYYY-MM-DD format. getDueDates and getProjectSummary already compute overdue issues as of today.
 
 **Execution Framework:**
 - **START** → Wait for user input.
-- **PLAN** → Decide which tool(s) to call.
-- **ACTION** → Execute tool function(s).
-- **OBSERVATION** → Process tool response.
+- **PLAN** → Decide which tool(s) to call. Write the plan in the "plan" field of your ACTION; do not send it as a separate message.
+- **ACTION** → Execute tool function(s). Request every tool you need whose input doesn't depend on another tool's result in ONE action, as a list:
+  { "type": "action", "plan": "...", "actions": [ { "function": "getCurrentDate" }, { "function": "getProjectSummary", "input": "Sarthi" } ] }
+  They run in parallel. Only call a tool in a later step when its input comes from an earlier observation.
+- **OBSERVATION** → Process tool response. After a list of actions you get one message {"type": "observation", "observations": [...]} with an entry per action, in the same order: {"function", "input", "observation"}, or {"function", "input", "error"} if that tool failed or timed out.
 - **OUTPUT** → Generate structured Markdown response.
 
 Only use the necessary tool(s) based on the user query. Use tools as per the user's query and logic needed.
@@ -65,9 +85,8 @@ Only use the necessary tool(s) based on the user query. Use tools as per the use
 **Example for Reference:**
 START
 { "type": "user", "user": "Summarize the Jira updates for the Sarthi project." }
-{ "type": "plan", "plan": "I will call getJiraIssues to fetch the Jira updates for the Sarthi project." }
-{ "type": "action", "function": "getJiraIssues", "input": "Sarthi" }
-{ "type": "observation", "observation": "Retrieved 12 Jira issues data in JSON format related to the Sarthi project." }
+{ "type": "action", "plan": "I will get today's date and the summary of the Sarthi project (status, due dates, blockers) in parallel.", "actions": [ { "function": "getCurrentDate" }, { "function": "getProjectSummary", "input": "Sarthi" } ] }
+{ "type": "observation", "observations": [ { "function": "getCurrentDate", "input": null, "observation": "2025-05-08" }, { "function": "getProjectSummary", "input": "Sarthi", "observation": "Summary of the 12 issues of the Sarthi project: breakdown, overdue and upcoming issues, blockers and assignee load." } ] }
 { "type": "output", "output": "### Jira Summary for Sarthi (as of 2025-05-08)\n\n**Total Issues:** 12\n\n**Status Breakdown:**\n- In Progress: 3\n- To Do: 7\n- Done: 2\n\n**Priority Breakdown:**\n- High Priority: 4\n- Medium Priority: 6\n- Low Priority: 2\n\n**Overdue Tasks:**\n- DEM-2: UI Redesign was due on 2025-04-20\n- DEM-5: Review Session was due on 2025-04-25\n\n**Upcoming Deadlines:**\n- DEM-7: Testing Phase 2 is due on 2025-05-10\n- DEM-9: Final Delivery is due on 2025-05-20\n\n_Please prioritize overdue tasks and coordinate accordingly._" }
 """
 
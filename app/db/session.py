@@ -11,7 +11,7 @@ Base = declarative_base()
 
 def init_db():
     from app.models.base import Base
-    from app.models import User, File, ChatMessage
+    from app.models import User, File, ChatMessage, IngestionJob, EngineState
     Base.metadata.create_all(bind=engine)
 
 # Dependency
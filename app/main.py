@@ -1,3 +1,4 @@
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -6,7 +7,21 @@ from app.routes.ai import router as ai_router
 from app.routes.knowledge_base import router as kb_router
 from app.routes.projects import router as projects_router
 from app.routes.chats import router as chats_router
+from app.routes.ingestion import router as ingestion_router
+from app.routes.metrics import router as metrics_router
 from app.db.session import init_db
+from app.services.qdrant_service import (
+    aensure_collection,
+    QDRANT_COLLECTION,
+    QDRANT_MEMORY_COLLECTION,
+    LEGACY_COLLECTION,
+)
+from app.services import qdrant_connection
+from app.utils.extraction_pool import shutdown_pool
+from app.worker import start_embedded_worker, stop_embedded_worker
+from app.services.vector_gc import register_orm_hooks, start_gc_sweeper, stop_gc_sweeper
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="PMGenie API", version="1.0.0")
 
@@ -21,9 +36,34 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    register_orm_hooks()
+    try:
+        # Bootstrap once up front; if Qdrant is unreachable, the first request retries it.
+        await qdrant_connection.run_async(aensure_collection())
+        await qdrant_connection.run_async(aensure_collection(QDRANT_MEMORY_COLLECTION))
+        if LEGACY_COLLECTION not in (QDRANT_COLLECTION, QDRANT_MEMORY_COLLECTION) and await qdrant_connection.run_async(
+            qdrant_connection.get_client().collection_exists(LEGACY_COLLECTION)
+        ):
+            logger.warning(
+                "Qdrant collection %s still holds pre-split memories/chunks; "
+                "run `python -m app.scripts.split_collections`", LEGACY_COLLECTION,
+            )
+    except Exception:
+        logger.warning("Qdrant collection bootstrap failed at startup", exc_info=True)
+    start_embedded_worker()
+    start_gc_sweeper()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    stop_embedded_worker()
+    stop_gc_sweeper()
+    shutdown_pool()
+    qdrant_connection.close()
 
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(ai_router, prefix="/ai", tags=["ai"])
 app.include_router(kb_router, prefix="/knowledge-base", tags=["knowledge-base"])
 app.include_router(projects_router, prefix="/projects", tags=["projects"])
 app.include_router(chats_router, prefix="/chats", tags=["chats"])
+app.include_router(ingestion_router, prefix="/ingestion", tags=["ingestion"])
+app.include_router(metrics_router, prefix="/metrics", tags=["metrics"])
@@ -1,5 +1,9 @@
 from .user import User
 from .file import File
 from .chat import ChatMessage
+from .chat_session import ChatSession
+from .kb_metadata import KBMetadata
+from .ingestion_job import IngestionJob
+from .engine_state import EngineState
 
-__all__ = ["User", "File", "ChatMessage"]
+__all__ = ["User", "File", "ChatMessage", "ChatSession", "KBMetadata", "IngestionJob", "EngineState"]
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, Text, DateTime
+from datetime import datetime
+from app.models.base import Base
+
+
+class EngineState(Base):
+    __tablename__ = "engine_states"
+
+    # No FK to chat_sessions: the legacy /chat endpoint and scripts use session ids without a row.
+    chat_session_id = Column(String(36), primary_key=True, nullable=False)
+    project_name = Column(String(255), nullable=True)
+    project_key = Column(String(32), nullable=True)
+    pending_query = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
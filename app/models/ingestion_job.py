@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Index
+from datetime import datetime
+from app.models.base import Base
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # No FK to files: the queue may live in its own database (INGESTION_DATABASE_URL).
+    file_id = Column(Integer, nullable=False, index=True)
+    s3_key = Column(String, nullable=False)
+    filename = Column(String, nullable=False)
+    project_id = Column(String, nullable=True)
+    chat_session_id = Column(String, nullable=True)
+    is_kb = Column(Boolean, default=False, nullable=False)
+    tenant = Column(String(64), nullable=False, default="default")
+    # Jobs from one bulk import share a batch id and may be indexed together.
+    batch_id = Column(String(36), nullable=True, index=True)
+
+    status = Column(String(16), nullable=False, default="queued")  # queued | running | succeeded | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    last_error = Column(Text, nullable=True)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = Column(String(128), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+
+    chunks_done = Column(Integer, nullable=False, default=0)
+    chunks_total = Column(Integer, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_ingestion_jobs_status_run_after", "status", "run_after"),
+        Index("ix_ingestion_jobs_tenant_status", "tenant", "status"),
+    )
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, UploadFile, File, BackgroundTasks, status, Form
+from fastapi import APIRouter, Depends, UploadFile, File, status, Form
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional
 from sqlalchemy.orm import Session
@@ -9,8 +10,8 @@ from app.routes.deps import get_current_user_id
 from app.db.session import get_db
 from app.models.chat import ChatMessage
 from app.models.file import File as FileModel
-from app.services.s3_service import upload_fileobj
-from app.services.file_service import save_file_and_process_from_s3
+from app.services.file_service import stage_upload
+from app.services.ingestion_queue import enqueue as enqueue_ingestion
 from app.services.ai_service import run_ai_message
 from app.services.chat_service import create_chat_session, update_session_metadata, get_chat_session
 
@@ -105,7 +106,7 @@ async def send_message(req: MessageRequest, user_id: int = Depends(get_current_u
             context_docs.append(f"[FILE:{f.filename}]")
 
     # 5) run AI agent (expects string answer); adapt if your ai_service returns structured response
-    answer = await run_ai_message(req.query, context_docs)
+    answer = await run_ai_message(req.query, context_docs, chat_session_id)
 
     # 6) persist assistant message
     assistant_message = ChatMessage(
@@ -138,7 +139,6 @@ def messages_history(projectId: Optional[str] = None, chatSessionId: Optional[st
 # --------------- file upload (preserve existing behavior) ---------------
 @router.post("/context/upload")
 async def upload_context_file(
-    background: BackgroundTasks,
     file: UploadFile = File(...),
     projectId: Optional[str] = Form(None),
     chatSessionId: Optional[str] = Form(None),
@@ -148,8 +148,8 @@ async def upload_context_file(
     # Generate S3 key
     key = f"uploads/{uuid.uuid4()}-{file.filename}"
 
-    # ✅ Stream upload to S3
-    upload_fileobj(key, file.file, content_type=file.content_type or "application/octet-stream")
+    # ✅ Upload to S3 off the event loop (small files: one PUT + in-process handoff)
+    await run_in_threadpool(stage_upload, key, file.file, content_type=file.content_type or "application/octet-stream")
 
     # Save DB record
     rec = FileModel(
@@ -164,15 +164,15 @@ async def upload_context_file(
     db.commit()
     db.refresh(rec)
 
-    # Schedule background processing (by S3 key only, not bytes)
-    background.add_task(
-        save_file_and_process_from_s3,
+    # Queue durable background processing (by S3 key only, not bytes)
+    job_id = enqueue_ingestion(
         rec.s3_key,
         rec.filename,
         projectId,
         chatSessionId,
         rec.id,
         False,
+        tenant=str(user_id),
     )
 
-    return {"file_id": rec.id, "filename": rec.filename, "s3_key": rec.s3_key}
\ No newline at end of file
+    return {"file_id": rec.id, "filename": rec.filename, "s3_key": rec.s3_key, "job_id": job_id}
\ No newline at end of file
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.routes.deps import get_current_user_id
+from app.db.session import get_db
+from app.models.file import File as FileModel
+from app.services import ingestion_queue
+from app.schemas.ingestion import IngestionStatusResponse
+
+router = APIRouter(tags=["ingestion"])
+
+
+# -----------------------
+# Ingestion status for a file (latest job)
+# -----------------------
+@router.get("/files/{file_id}", response_model=IngestionStatusResponse)
+def get_ingestion_status(file_id: int, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
+    file = (
+        db.query(FileModel)
+        .filter(FileModel.id == file_id, FileModel.uploaded_by == user_id)
+        .first()
+    )
+    if not file:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    with ingestion_queue.QueueSession() as qdb:
+        job = ingestion_queue.get_latest_job(qdb, file_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="No ingestion job for this file")
+        return ingestion_queue.job_status(job)
@@ -1,26 +1,39 @@
 from dotenv import load_dotenv
-from fastapi import APIRouter, Depends, UploadFile, File, BackgroundTasks, HTTPException, Query, Form
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Form
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import Optional, List
-import uuid, os
-from openai import OpenAI
+import uuid, os, tarfile, zipfile
 
 from app.routes.deps import get_current_user_id
 from app.db.session import get_db
 from app.models.file import File as FileModel
-from app.services.s3_service import upload_fileobj
-from app.services.file_service import save_file_and_process_from_s3
+from app.services.file_service import stage_upload
+from app.services.ingestion_queue import enqueue as enqueue_ingestion
 from app.services import kb_service
+from app.services.kb_import import import_kb_files
 from app.schemas.kb import (
     KBProjectResponse,
     KBFileResponse,
     KBMetadataResponse,
     KBAddContentRequest,
+    KBSearchHit,
+    KBBulkImportResponse,
 )
 
 router = APIRouter(tags=["knowledge-base"])
 load_dotenv("creds.env")
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+def _get_owned_kb_file(db: Session, file_id: int, user_id: int) -> FileModel:
+    rec = (
+        db.query(FileModel)
+        .filter(FileModel.id == file_id, FileModel.is_kb == True, FileModel.uploaded_by == user_id)  # noqa: E712
+        .first()
+    )
+    if not rec:
+        raise HTTPException(status_code=404, detail="KB file not found or you do not have permission to modify it")
+    return rec
 
 
 # -----------------------
@@ -47,7 +60,6 @@ def list_files(db: Session = Depends(get_db), user_id: int = Depends(get_current
 # -----------------------
 @router.post("/upload")
 async def kb_upload(
-    background: BackgroundTasks,
     file: UploadFile = File(...),
     projectId: Optional[str] = Form(None),
     chatSessionId: Optional[str] = Form(None),
@@ -57,8 +69,8 @@ async def kb_upload(
     # Create S3 key
     key = f"kb/{uuid.uuid4()}-{file.filename}"
 
-    # ✅ Stream upload to S3 (no full read into memory)
-    upload_fileobj(key, file.file, content_type=file.content_type or "application/octet-stream")
+    # ✅ Upload to S3 off the event loop (small files: one PUT + in-process handoff)
+    await run_in_threadpool(stage_upload, key, file.file, content_type=file.content_type or "application/octet-stream")
 
     # Save DB record
     rec = FileModel(
@@ -73,15 +85,15 @@ async def kb_upload(
     db.commit()
     db.refresh(rec)
 
-    # Background task (S3 key only, not bytes)
-    background.add_task(
-        save_file_and_process_from_s3,
+    # Durable ingestion job (S3 key only, not bytes)
+    job_id = enqueue_ingestion(
         rec.s3_key,
         rec.filename,
         projectId,
         chatSessionId,
         rec.id,
         True,
+        tenant=str(user_id),
     )
 
     return {
@@ -91,9 +103,86 @@ async def kb_upload(
         "projectId": rec.project_id,
         "chatSessionId": rec.chat_session_id,
         "created_at": rec.created_at.isoformat() if rec.created_at else None,
+        "job_id": job_id,
     }
 
 
+# -----------------------
+# New: Bulk import (many files and/or zip/tar archives)
+# -----------------------
+@router.post("/bulk-upload", response_model=KBBulkImportResponse)
+async def kb_bulk_upload(
+    files: List[UploadFile] = File(...),
+    projectId: Optional[str] = Form(None),
+    chatSessionId: Optional[str] = Form(None),
+    category: Optional[str] = Form(None),
+    tags: Optional[str] = Form(None, description="Comma-separated tags applied to every file"),
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    """
+    Archives (.zip, .tar, .tar.gz, ...) are expanded member by member; every
+    document gets its own File/KBMetadata row and ingestion job, all created in
+    one transaction each and indexed together under the returned batchId.
+    """
+    tag_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else None
+    try:
+        return await run_in_threadpool(
+            import_kb_files,
+            db,
+            [(f.filename, f.file) for f in files],
+            user_id,
+            projectId=projectId,
+            chatSessionId=chatSessionId,
+            category=category,
+            tags=tag_list,
+        )
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid archive: {str(e)}")
+
+
+# -----------------------
+# Replace a KB file's content and re-index incrementally
+# -----------------------
+@router.put("/files/{file_id}")
+async def kb_replace_file(
+    file_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    rec = _get_owned_kb_file(db, file_id, user_id)
+    if os.path.splitext(file.filename or "")[1].lower() != os.path.splitext(rec.filename)[1].lower():
+        raise HTTPException(status_code=400, detail="Replacement must have the same file type as the original")
+
+    # Same S3 key and fileId: only chunks that changed get embedded, vanished ones are deleted.
+    await run_in_threadpool(stage_upload, rec.s3_key, file.file, content_type=file.content_type or "application/octet-stream")
+    job_id = enqueue_ingestion(
+        rec.s3_key, rec.filename, rec.project_id, rec.chat_session_id, rec.id, True, tenant=str(user_id)
+    )
+    return {"id": rec.id, "filename": rec.filename, "s3_key": rec.s3_key, "job_id": job_id}
+
+
+@router.post("/files/{file_id}/reindex")
+def kb_reindex_file(file_id: int, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
+    rec = _get_owned_kb_file(db, file_id, user_id)
+    job_id = enqueue_ingestion(
+        rec.s3_key, rec.filename, rec.project_id, rec.chat_session_id, rec.id, True, tenant=str(user_id)
+    )
+    return {"id": rec.id, "job_id": job_id}
+
+
+# -----------------------
+# Delete a KB file: its chunks and S3 object are removed after the commit (vector_gc)
+# -----------------------
+@router.delete("/files/{file_id}")
+def kb_delete_file(file_id: int, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
+    rec = _get_owned_kb_file(db, file_id, user_id)
+    db.delete(rec)
+    db.commit()
+    return {"status": "success", "message": f"KB file {file_id} deleted"}
+
+
 # # -----------------------
 # # New: List KB Projects
 # # -----------------------
@@ -135,6 +224,27 @@ def list_files_new(
 #     )
 
 
+# -----------------------
+# New: Semantic search over KB chunks
+# -----------------------
+@router.get("/search", response_model=List[KBSearchHit])
+async def search_kb(
+    q: str = Query(..., min_length=1),
+    projectId: Optional[str] = Query(None),
+    fileId: Optional[int] = Query(None),
+    category: Optional[str] = Query(None),
+    tag: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    user_id: int = Depends(get_current_user_id),
+):
+    try:
+        return await kb_service.asearch_chunks(
+            q, project_id=projectId, file_id=fileId, category=category, tag=tag, limit=limit
+        )
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Search failed: {str(e)}")
+
+
 # -----------------------
 # New: Add KB Metadata
 # -----------------------
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+
+from app.routes.deps import get_current_user_id
+from app.services.embedding_cache import get_cache
+from app.services.retrieval_cache import get_retrieval_cache
+from ai_reasoning_engine.project_resolver import get_resolver
+
+router = APIRouter(tags=["metrics"])
+
+
+# -----------------------
+# Retrieval / embedding cache hit rates (this process)
+# -----------------------
+@router.get("/retrieval")
+def retrieval_metrics(user_id: int = Depends(get_current_user_id)):
+    embedding_cache = get_cache()
+    return {
+        "retrieval_cache": get_retrieval_cache().stats(),
+        "embedding_cache": embedding_cache.stats() if embedding_cache else {"enabled": False},
+    }
+
+
+# -----------------------
+# Project-name resolution: local matches vs LLM fallbacks (this process)
+# -----------------------
+@router.get("/project-resolver")
+def project_resolver_metrics(user_id: int = Depends(get_current_user_id)):
+    return get_resolver().stats()
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class IngestionStatusResponse(BaseModel):
+    jobId: int
+    fileId: int
+    batchId: Optional[str] = None
+    status: str
+    attempts: int
+    maxAttempts: int
+    chunksDone: int
+    chunksTotal: Optional[int] = None
+    elapsedSeconds: Optional[float] = None
+    chunksPerSecond: Optional[float] = None
+    lastError: Optional[str] = None
+    runAfter: Optional[datetime] = None
+    createdAt: datetime
+    startedAt: Optional[datetime] = None
+    finishedAt: Optional[datetime] = None
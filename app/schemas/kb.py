@@ -38,3 +38,35 @@ class KBAddContentRequest(BaseModel):
     description: Optional[str] = None
     category: Optional[str] = None
     tags: Optional[List[str]] = None
+
+
+class KBSearchHit(BaseModel):
+    id: str
+    score: float
+    fileId: int
+    filename: Optional[str] = None
+    projectId: Optional[str] = None
+    category: Optional[str] = None
+    tags: Optional[List[str]] = None
+    text: Optional[str] = None
+    offset: Optional[int] = None
+    end: Optional[int] = None
+
+
+class KBBulkImportFile(BaseModel):
+    id: int
+    filename: str
+    path: str
+    s3_key: str
+    job_id: int
+
+
+class KBBulkImportSkipped(BaseModel):
+    path: str
+    reason: str
+
+
+class KBBulkImportResponse(BaseModel):
+    batchId: Optional[str] = None
+    files: List[KBBulkImportFile]
+    skipped: List[KBBulkImportSkipped]
@@ -0,0 +1,37 @@
+"""
+Expire and deduplicate chat memories.
+
+    python -m app.scripts.compact_memory [--ttl-days 90] [--threshold 0.95] [--dry-run]
+
+Deletes memories older than --ttl-days (MEMORY_TTL_DAYS; 0 keeps them) and
+merges near-duplicate memories of the same project/session into the newest one
+(see app.services.memory_compaction). Prints a JSON report with points and
+approximate bytes reclaimed. Safe to run from cron while the API is serving:
+memories written during the run are left for the next one.
+"""
+import json
+import logging
+import argparse
+
+from app.services import qdrant_service
+from app.services.qdrant_connection import run_sync
+from app.services.memory_compaction import acompact_memory, MEMORY_TTL_DAYS, MEMORY_DEDUP_THRESHOLD
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default=qdrant_service.QDRANT_MEMORY_COLLECTION)
+    parser.add_argument("--ttl-days", type=float, default=MEMORY_TTL_DAYS)
+    parser.add_argument("--threshold", type=float, default=MEMORY_DEDUP_THRESHOLD,
+                        help="cosine similarity at which two memories count as duplicates")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be reclaimed, change nothing")
+    args = parser.parse_args()
+    if not 0 < args.threshold <= 1:
+        parser.error("--threshold must be in (0, 1]")
+    report = run_sync(acompact_memory(args.collection, args.ttl_days, args.threshold, args.dry_run))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
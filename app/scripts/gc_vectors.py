@@ -0,0 +1,31 @@
+"""
+Delete Qdrant points and S3 objects whose files or chat sessions no longer exist.
+
+    python -m app.scripts.gc_vectors [--dry-run] [--sessions] [--no-s3]
+
+Diffs Postgres file ids against the fileIds indexed in Qdrant and the S3 keys
+under GC_S3_PREFIXES (objects younger than GC_S3_GRACE_SEC are kept); with
+--sessions (or GC_SWEEP_SESSIONS=true), also chat memories against
+chat_sessions. Orphans are removed with batched filter-deletes and a JSON
+report of what was reclaimed is printed. See app.services.vector_gc.
+"""
+import json
+import logging
+import argparse
+
+from app.services.vector_gc import sweep, GC_SWEEP_SESSIONS
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report orphans, delete nothing")
+    parser.add_argument("--sessions", action="store_true", default=GC_SWEEP_SESSIONS,
+                        help="also delete memories of chat sessions that no longer exist")
+    parser.add_argument("--no-s3", action="store_true", help="skip the S3 object sweep")
+    args = parser.parse_args()
+    print(json.dumps(sweep(dry_run=args.dry_run, sessions=args.sessions, s3=not args.no_s3), indent=2))
+
+
+if __name__ == "__main__":
+    main()
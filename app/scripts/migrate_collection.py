@@ -0,0 +1,47 @@
+"""
+Rebuild a Qdrant collection into another profile and switch traffic with an alias.
+
+    python -m app.scripts.migrate_collection --collection kb_chunks --profile int8
+
+Copies every point (vectors + payload, same ids) into a new collection named
+"<collection>__<profile>__<timestamp>", copies points written during the first
+pass, checks the counts, waits for indexing to finish and then points the
+alias "<collection>" at it in one atomic update. Application code keeps using
+the alias name; QDRANT_PROFILE should be set to the same profile so its search
+parameters match.
+
+The first migration of a plain collection (not yet an alias) needs
+--replace-collection: the collection is deleted and the alias created in its
+place, so writes are briefly rejected between the two calls. Later migrations
+are alias swaps with no gap. The previous collection is kept unless --drop-old.
+"""
+import logging
+import argparse
+
+from app.services import qdrant_admin
+from app.services.qdrant_connection import run_sync
+from app.services.qdrant_profiles import PROFILES, get_profile
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", required=True, help="alias (or plain collection) the app reads and writes")
+    parser.add_argument("--profile", required=True, choices=sorted(PROFILES))
+    parser.add_argument("--batch-size", type=int, default=qdrant_admin.COPY_BATCH_SIZE)
+    parser.add_argument("--drop-old", action="store_true", help="delete the previous collection after the swap")
+    parser.add_argument("--replace-collection", action="store_true",
+                        help="allow converting a plain collection into an alias (brief write gap)")
+    args = parser.parse_args()
+    try:
+        run_sync(qdrant_admin.arebuild_collection(
+            args.collection, get_profile(args.profile), batch_size=args.batch_size,
+            drop_old=args.drop_old, replace_collection=args.replace_collection,
+        ))
+    except RuntimeError as e:
+        # Raised on the Qdrant loop; SystemExit there would kill the loop thread instead of exiting.
+        parser.exit(1, f"error: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
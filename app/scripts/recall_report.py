@@ -0,0 +1,167 @@
+"""
+Recall vs latency for each collection profile, measured against exact search.
+
+    python -m app.scripts.recall_report --collection kb_chunks --profiles float,int8,binary --ef 64,128,256
+    python -m app.scripts.recall_report --synthetic 20000          # no production data needed
+
+Copies a sample of points (or synthetic clustered vectors) into one temporary
+collection per profile, waits until each is indexed, then runs held-out
+vectors as queries. Ground truth is brute-force cosine over the float32
+sample, so recall@k reflects both HNSW approximation and quantization. Prints
+recall@k, p50/p99 query latency and vector bytes per point held in RAM / on
+disk for every profile x ef, then drops the temporary collections.
+
+Local mode (QDRANT_URL=":memory:") searches by brute force and ignores these
+parameters: run it against a real Qdrant server.
+"""
+import time
+import logging
+import argparse
+import statistics
+from typing import List
+
+import numpy as np
+from qdrant_client.http import models as qmodels
+
+from app.services import qdrant_admin
+from app.services.qdrant_connection import get_client, run_sync
+from app.services.qdrant_profiles import PROFILES, get_profile, search_params, vector_bytes
+from app.services.qdrant_service import DEFAULT_VECTOR_SIZE, QDRANT_COLLECTION
+
+logger = logging.getLogger("recall_report")
+
+
+async def _sample_collection(name: str, n: int) -> np.ndarray:
+    client = get_client()
+    vectors, offset = [], None
+    while len(vectors) < n:
+        records, offset = await client.scroll(
+            collection_name=name, limit=min(1000, n - len(vectors)), offset=offset,
+            with_payload=False, with_vectors=True,
+        )
+        vectors.extend(r.vector for r in records)
+        if offset is None:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _synthetic(n: int, dim: int, seed: int = 7) -> np.ndarray:
+    """Clustered vectors: embeddings of related documents are not uniformly spread."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 200, 8), dim)).astype(np.float32)
+    assignment = rng.integers(0, len(centers), n)
+    return centers[assignment] + 0.35 * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def report(args) -> List[dict]:
+    client = get_client()
+    if args.synthetic:
+        vectors = _synthetic(args.synthetic + args.queries, args.dim)
+    else:
+        vectors = await _sample_collection(args.collection, args.sample + args.queries)
+    if len(vectors) <= args.queries:
+        raise RuntimeError(f"Need more than {args.queries} points to hold out queries; got {len(vectors)}")
+    vectors = _normalize(vectors)
+    queries, corpus = vectors[:args.queries], vectors[args.queries:]
+    dim = corpus.shape[1]
+
+    # Brute-force ground truth over the float32 originals.
+    truth = np.argsort(-(queries @ corpus.T), axis=1)[:, :args.k]
+    truth = [set(row.tolist()) for row in truth]
+
+    rows = []
+    stamp = time.strftime("%Y%m%d%H%M%S")
+    for profile_name in args.profiles:
+        profile = get_profile(profile_name)
+        name = f"_recall__{profile.name}__{stamp}"
+        # Index every segment so small samples are not answered by plain full scans.
+        await qdrant_admin.acreate_collection(
+            name, profile, dim, optimizers_config=qmodels.OptimizersConfigDiff(indexing_threshold=1)
+        )
+        try:
+            started = time.perf_counter()
+            for start in range(0, len(corpus), 256):
+                batch = corpus[start:start + 256]
+                await client.upsert(
+                    collection_name=name, wait=True,
+                    points=[qmodels.PointStruct(id=start + i, vector=v.tolist()) for i, v in enumerate(batch)],
+                )
+            await qdrant_admin.await_green(name)
+            build_sec = time.perf_counter() - started
+            sizes = vector_bytes(profile, dim)
+
+            for ef in args.ef or [profile.search_ef]:
+                params = search_params(profile, ef=ef)
+                latencies, hits = [], 0
+                for query, expected in zip(queries, truth):
+                    t0 = time.perf_counter()
+                    found = await client.search(
+                        collection_name=name, query_vector=query.tolist(), limit=args.k,
+                        search_params=params, with_payload=False,
+                    )
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                    hits += len(expected & {p.id for p in found})
+                rows.append({
+                    "profile": profile.name,
+                    "ef": ef or "default",
+                    "recall": hits / (args.k * len(queries)),
+                    "p50_ms": statistics.median(latencies),
+                    "p99_ms": _percentile(latencies, 0.99),
+                    "ram_bytes": sizes["ram"],
+                    "disk_bytes": sizes["disk"],
+                    "build_sec": build_sec,
+                })
+        finally:
+            if not args.keep:
+                await client.delete_collection(name)
+    return rows
+
+
+def _print(rows: List[dict], args, n_points: int):
+    print(f"\nrecall@{args.k} over {args.queries} held-out queries, {n_points} indexed points\n")
+    header = f"{'profile':<12}{'ef':>8}{'recall':>9}{'p50 ms':>9}{'p99 ms':>9}{'RAM B/pt':>10}{'disk B/pt':>11}{'build s':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(
+            f"{r['profile']:<12}{str(r['ef']):>8}{r['recall']:>9.3f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+            f"{r['ram_bytes']:>10.0f}{r['disk_bytes']:>11.0f}{r['build_sec']:>9.1f}"
+        )
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default=QDRANT_COLLECTION, help="collection or alias to sample vectors from")
+    parser.add_argument("--profiles", default="float,int8,binary",
+                        type=lambda s: [p.strip() for p in s.split(",") if p.strip()],
+                        help=f"comma-separated, from {sorted(PROFILES)}")
+    parser.add_argument("--sample", type=int, default=10000, help="points to index per profile")
+    parser.add_argument("--queries", type=int, default=200, help="held-out points used as queries")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", type=lambda s: [int(x) for x in s.split(",") if x.strip()], default=None,
+                        help="comma-separated hnsw_ef values (default: each profile's own)")
+    parser.add_argument("--synthetic", type=int, default=0, help="use N synthetic vectors instead of --collection")
+    parser.add_argument("--dim", type=int, default=DEFAULT_VECTOR_SIZE, help="dimensions for --synthetic")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary collections")
+    args = parser.parse_args()
+    for name in args.profiles:
+        get_profile(name)  # fail fast on typos
+    try:
+        rows = run_sync(report(args))
+    except RuntimeError as e:
+        parser.exit(1, f"error: {e}\n")
+    _print(rows, args, args.synthetic or args.sample)
+
+
+if __name__ == "__main__":
+    main()
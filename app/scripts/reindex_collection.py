@@ -0,0 +1,78 @@
+"""
+Re-embed a Qdrant collection at another vector size and switch traffic with an alias.
+
+    python -m app.scripts.reindex_collection --collection kb_chunks --dimensions 512
+
+Every point is re-embedded from its payload["text"] (memories and document
+chunks both store it) by the configured embedding provider (EMBEDDING_PROVIDER,
+EMBEDDING_MODEL) at --dimensions, written with the
+same id and payload into "<collection>__<profile>__<timestamp>", and the alias
+"<collection>" is swapped to it once the copy has caught up with concurrent
+writes and finished indexing (see app.services.qdrant_admin.arebuild_collection).
+The app keeps serving from the old collection while this runs.
+
+Points without payload text (chunks stored before chunk text was kept) cannot be
+re-embedded. The alias is not swapped while there are any: the error lists their
+fileIds, to re-index with POST /knowledge-base/files/{id}/reindex first.
+--allow-missing swaps anyway and leaves them out of search.
+
+Roll out EMBEDDING_DIMENSIONS=<dimensions> right after the swap: until then,
+processes still embedding at the old size get vector size errors from Qdrant.
+Re-embedded vectors land in the embedding cache under the new size, so the
+rollout does not pay for the same texts twice.
+"""
+import asyncio
+import logging
+import argparse
+from typing import List, Optional
+
+from app.services import qdrant_admin
+from app.services.qdrant_connection import run_sync
+from app.services.qdrant_profiles import PROFILES, get_profile
+from app.services.embedding_service import EMBEDDING_DIMENSIONS, embed_batches, provider
+
+logger = logging.getLogger("reindex_collection")
+
+
+def _reembed(dimensions: int):
+    async def vectors_of(records) -> List[Optional[List[float]]]:
+        texts = [(r.payload or {}).get("text") for r in records]
+        present = [t for t in texts if t]
+        # Blocking OpenAI calls stay off the Qdrant loop; embed_batches respects the token caps.
+        vectors = iter(await asyncio.to_thread(
+            lambda: [v for _, vectors in embed_batches(present, dimensions=dimensions) for v in vectors]
+        ))
+        # Points without text have nothing to re-embed: no vector (arebuild_collection refuses or skips them).
+        return [next(vectors) if t else None for t in texts]
+    return vectors_of
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", required=True, help="alias (or plain collection) the app reads and writes")
+    parser.add_argument("--dimensions", type=int, default=EMBEDDING_DIMENSIONS,
+                        help=f"target vector size for {provider.name} (default: EMBEDDING_DIMENSIONS)")
+    parser.add_argument("--profile", default=None, choices=sorted(PROFILES),
+                        help="profile of the new collection (default: QDRANT_PROFILE)")
+    parser.add_argument("--batch-size", type=int, default=qdrant_admin.COPY_BATCH_SIZE)
+    parser.add_argument("--drop-old", action="store_true", help="delete the previous collection after the swap")
+    parser.add_argument("--replace-collection", action="store_true",
+                        help="allow converting a plain collection into an alias (brief write gap)")
+    parser.add_argument("--allow-missing", action="store_true",
+                        help="swap even if points without payload text had to be left out")
+    args = parser.parse_args()
+    try:
+        run_sync(qdrant_admin.arebuild_collection(
+            args.collection, get_profile(args.profile), vector_size=args.dimensions,
+            vectors_of=_reembed(args.dimensions), batch_size=args.batch_size,
+            drop_old=args.drop_old, replace_collection=args.replace_collection,
+            allow_missing=args.allow_missing,
+        ))
+    except RuntimeError as e:
+        # Raised on the Qdrant loop; SystemExit there would kill the loop thread instead of exiting.
+        parser.exit(1, f"error: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
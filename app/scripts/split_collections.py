@@ -0,0 +1,113 @@
+"""
+One-time split of the shared "ai_memory" collection into document chunks and memory.
+
+    python -m app.scripts.split_collections [--source ai_memory] [--drop-source]
+
+Before the split, file chunks and chat memories were written to one collection.
+This copies every point (same id, vector and payload) into the collection for
+its payload "type": "file_chunk" -> QDRANT_COLLECTION, "memory" (or no type,
+as memories were stored before they carried one) -> QDRANT_MEMORY_COLLECTION.
+Both targets are bootstrapped with their own payload indexes and profiles;
+chunks copied into a collection with BM25 sparse vectors get them computed
+from their text.
+
+Deploy first, then run this: the app already writes to the new collections, so
+the source no longer changes and the copy can be re-run safely. When the source
+is itself one of the targets (QDRANT_COLLECTION=ai_memory), the points that
+belong elsewhere are moved out of it instead. The source is kept unless
+--drop-source, which is refused while it holds points of an unknown type.
+"""
+import logging
+import argparse
+from collections import Counter, defaultdict
+from typing import Dict
+
+from qdrant_client.http import models as qmodels
+
+from app.services import qdrant_admin, qdrant_service
+from app.services.qdrant_connection import get_client, run_sync
+
+logger = logging.getLogger("split_collections")
+
+
+def _kind(payload: dict):
+    kind = payload.get("type")
+    if kind in ("file_chunk", "memory"):
+        return kind
+    return "memory" if kind is None else None
+
+
+async def split(source: str, batch_size: int, drop_source: bool) -> Dict[str, int]:
+    client = get_client()
+    if not await client.collection_exists(source) and await qdrant_admin.aresolve_alias(source) is None:
+        raise RuntimeError(f"Collection {source!r} does not exist; nothing to split")
+    info = await client.get_collection(source)
+    if info.config.params.vectors.size != qdrant_service.DEFAULT_VECTOR_SIZE:
+        raise RuntimeError(
+            f"{source!r} holds {info.config.params.vectors.size}-dim vectors but EMBEDDING_DIMENSIONS is "
+            f"{qdrant_service.DEFAULT_VECTOR_SIZE}; run app.scripts.reindex_collection on it first"
+        )
+    targets = {"file_chunk": qdrant_service.QDRANT_COLLECTION, "memory": qdrant_service.QDRANT_MEMORY_COLLECTION}
+    sparse = {}
+    for target in targets.values():
+        sparse[target] = (await qdrant_service.aensure_collection(target)).sparse
+    source_in_use = source in targets.values()
+
+    counts: Counter = Counter()
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=source, limit=batch_size, offset=offset, with_payload=True, with_vectors=True
+        )
+        by_target, moved = defaultdict(list), []
+        for r in records:
+            payload = dict(r.payload or {})
+            kind = _kind(payload)
+            if kind is None:
+                counts[f"unknown:{payload.get('type')}"] += 1
+                continue
+            counts[kind] += 1
+            if targets[kind] == source:
+                continue
+            payload["type"] = kind
+            vector = qdrant_admin.point_vector(r, sparse=sparse[targets[kind]])
+            by_target[targets[kind]].append(qmodels.PointStruct(id=r.id, vector=vector, payload=payload))
+            moved.append(r.id)
+        for target, points in by_target.items():
+            await client.upsert(collection_name=target, points=points, wait=True)
+        if source_in_use and moved:
+            # Already scrolled past these ids, so deleting them does not disturb the scroll.
+            await client.delete(collection_name=source, points_selector=moved, wait=True)
+        if offset is None:
+            break
+
+    for kind, target in targets.items():
+        logger.info("%s: %d points -> %s (now %d)", kind, counts[kind], target, await qdrant_admin.acount(target))
+    unknown = {k: v for k, v in counts.items() if k.startswith("unknown:")}
+    if unknown:
+        logger.warning("Left %s in %s", unknown, source)
+
+    if drop_source and not source_in_use:
+        if unknown:
+            raise RuntimeError(f"Not dropping {source!r}: it holds points of unknown type {unknown}")
+        await qdrant_service.adelete_collection(source)
+        logger.info("Dropped %s", source)
+    return dict(counts)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=qdrant_service.LEGACY_COLLECTION)
+    parser.add_argument("--batch-size", type=int, default=qdrant_admin.COPY_BATCH_SIZE)
+    parser.add_argument("--drop-source", action="store_true", help="delete the source collection afterwards")
+    args = parser.parse_args()
+    try:
+        run_sync(split(args.source, args.batch_size, args.drop_source))
+    except RuntimeError as e:
+        # Raised on the Qdrant loop; SystemExit there would kill the loop thread instead of exiting.
+        parser.exit(1, f"error: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
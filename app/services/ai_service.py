@@ -1,27 +1,37 @@
-from typing import List, Dict, Any
-from openai import OpenAI
 import os
+from typing import List, Dict, Any
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 load_dotenv("creds.env")
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # IMPORTANT: Wire this to your existing agent logic.
 # If your function path differs, adjust the import below.
 try:
-    from ai_reasoning_engine.ai_engine import ai_reasoning_engine  # expected function
+    from ai_reasoning_engine.ai_engine import aai_reasoning_engine  # expected function
 except Exception:
-    ai_reasoning_engine = None
+    aai_reasoning_engine = None
+
+_client = None
+
+
+def _fallback_client() -> AsyncOpenAI:
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
 
-async def run_ai_message(query: str, context_docs: List[str] | None = None) -> str:
+async def run_ai_message(query: str, context_docs: List[str] | None = None, chat_session_id: str | None = None) -> str:
     print("inside run_ai_message")
     # If your custom agent exists, call it; else fallback to a simple LLM completion.
-    if ai_reasoning_engine:
-        response = ai_reasoning_engine(user_query=query)
-        return response
+    if aai_reasoning_engine:
+        # Async end to end (OpenAI, Jira, Qdrant): a turn waiting on the LLM holds no thread.
+        # State (project context, pending question) and memories are per chat session.
+        return await aai_reasoning_engine(user_query=query, session_id=chat_session_id)
 
     # Fallback minimal answer
 
     system = "You are a helpful assistant."
     msgs = [{"role": "system", "content": system}, {"role": "user", "content": query}]
-    resp = client.chat.completions.create(model="gpt-4o-mini", messages=msgs)
-    return resp.choices[0].message.content
\ No newline at end of file
+    resp = await _fallback_client().chat.completions.create(model="gpt-4o-mini", messages=msgs)
+    return resp.choices[0].message.content
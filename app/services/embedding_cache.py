@@ -0,0 +1,143 @@
+import os
+import re
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from array import array
+from typing import Dict, List, Optional, Sequence
+from dotenv import load_dotenv
+load_dotenv("creds.env")
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+
+# SQLite limits the number of bound parameters per statement.
+_SQL_CHUNK = 500
+
+
+def normalize_text(text: str) -> str:
+    """Normalization applied before hashing, so trivially different copies share a key."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(model: str, dimensions: Optional[int], text: str) -> str:
+    raw = f"{model}\x00{dimensions or 'default'}\x00{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding store on local disk (SQLite).
+    Keys are sha256(model, dimensions, normalized text); vectors are stored as float32.
+    Eviction is LRU, bounded by max_entries.
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._clock = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings(last_used)")
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(MAX(last_used), 0) FROM embeddings").fetchone()
+        self._entries, self._clock = row[0], row[1]
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get_many(self, model: str, dimensions: Optional[int], texts: Sequence[str]) -> Dict[int, List[float]]:
+        """Return {index: vector} for the texts found in the cache."""
+        keys = [cache_key(model, dimensions, t) for t in texts]
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), _SQL_CHUNK):
+                part = unique[start:start + _SQL_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                tick = self._tick()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?", [(tick, k) for k in found]
+                )
+
+            result = {i: found[k] for i, k in enumerate(keys) if k in found}
+            self.hits += len(result)
+            self.misses += len(keys) - len(result)
+        return result
+
+    def put_many(self, model: str, dimensions: Optional[int], texts: Sequence[str], vectors: Sequence[List[float]]):
+        rows = [
+            (cache_key(model, dimensions, t), array("f", v).tobytes())
+            for t, v in zip(texts, vectors)
+        ]
+        if not rows:
+            return
+        with self._lock:
+            tick = self._tick()
+            cur = self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(k, blob, tick) for k, blob in rows],
+            )
+            self._entries += max(cur.rowcount, 0)
+            if self._entries > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        # Trim to 90% of capacity so eviction doesn't run on every insert.
+        target = int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            " SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (self._entries - target,),
+        )
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "entries": self._entries,
+        }
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache instance (None when disabled or the store can't be opened)."""
+    global _cache, _cache_failed
+    if not EMBEDDING_CACHE_ENABLED or _cache_failed:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None and not _cache_failed:
+                try:
+                    _cache = EmbeddingCache()
+                except sqlite3.Error as e:
+                    _cache_failed = True
+                    logger.warning("Embedding cache unavailable (%s); continuing without it.", e)
+                    return None
+    return _cache
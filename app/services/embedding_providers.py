@@ -0,0 +1,154 @@
+"""
+Embedding backends behind one interface, selected with EMBEDDING_PROVIDER:
+
+  * "openai" (default): the embeddings API with EMBEDDING_MODEL.
+  * "hashing": an offline, deterministic signed bag-of-words hash, with no
+    network access or model download. Vectors are a pure function of (text,
+    dimensions), and texts sharing words score as similar. Use it for CI,
+    benchmarks and air-gapped staging; it is not a semantic model, so don't
+    mix its vectors with OpenAI ones in a collection.
+
+embedding_service adds caching, request batching and concurrency on top; a
+provider only turns one list of texts into vectors, blocking (embed) or on the
+running event loop (aembed, used by the chat and search paths).
+"""
+import os
+import re
+import zlib
+import math
+import asyncio
+import weakref
+from functools import lru_cache
+from typing import Iterator, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv("creds.env")
+
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai").lower()
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+
+
+class EmbeddingProvider:
+    # Identifies the vector space: part of the embedding cache key.
+    name: str = ""
+    native_dimensions: int = 1536
+
+    def supports_dimensions(self) -> bool:
+        """Whether vectors can be requested at sizes other than native_dimensions."""
+        return True
+
+    def embed(self, texts: List[str], dimensions: Optional[int] = None) -> List[List[float]]:
+        """Vectors for texts in input order; dimensions=None means native_dimensions."""
+        raise NotImplementedError
+
+    async def aembed(self, texts: List[str], dimensions: Optional[int] = None) -> List[List[float]]:
+        """embed without blocking the event loop."""
+        raise NotImplementedError
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    # Full output size per model. text-embedding-3-* can return shorter vectors via `dimensions`.
+    NATIVE_DIMENSIONS = {"text-embedding-3-small": 1536, "text-embedding-3-large": 3072, "text-embedding-ada-002": 1536}
+    # Per-request API limits (2048 inputs, ~300k tokens); callers normally send far smaller batches.
+    MAX_INPUTS = 2048
+    MAX_TOKENS = 250_000
+
+    def __init__(self, model: str = EMBEDDING_MODEL):
+        self.name = model
+        self.native_dimensions = self.NATIVE_DIMENSIONS.get(model, 1536)
+        self._client = None
+        # AsyncOpenAI per event loop: its connection pool is bound to the loop that created it.
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+
+    def supports_dimensions(self) -> bool:
+        return not self.name.startswith("text-embedding-ada")
+
+    def client(self):
+        # Created on first use, so importing the settings needs no API key.
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._client
+
+    def async_client(self):
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+            client = self._async_clients[loop] = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return client
+
+    def _splits(self, texts: List[str]) -> Iterator[List[str]]:
+        """Consecutive slices of texts within the per-request input and token limits."""
+        start = 0
+        while start < len(texts):
+            end, tokens = start, 0
+            while end < len(texts) and end - start < self.MAX_INPUTS:
+                tokens += len(texts[end]) // 4 + 1
+                if end > start and tokens > self.MAX_TOKENS:
+                    break
+                end += 1
+            yield texts[start:end]
+            start = end
+
+    @staticmethod
+    def _vectors(resp) -> List[List[float]]:
+        return [d.embedding for d in sorted(resp.data, key=lambda d: d.index)]
+
+    def embed(self, texts: List[str], dimensions: Optional[int] = None) -> List[List[float]]:
+        kwargs = {"dimensions": dimensions} if dimensions else {}
+        vectors: List[List[float]] = []
+        for split in self._splits(texts):
+            vectors.extend(self._vectors(self.client().embeddings.create(model=self.name, input=split, **kwargs)))
+        return vectors
+
+    async def aembed(self, texts: List[str], dimensions: Optional[int] = None) -> List[List[float]]:
+        kwargs = {"dimensions": dimensions} if dimensions else {}
+        vectors: List[List[float]] = []
+        for split in self._splits(texts):
+            resp = await self.async_client().embeddings.create(model=self.name, input=split, **kwargs)
+            vectors.extend(self._vectors(resp))
+        return vectors
+
+
+_WORD = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=65536)
+def _token_hash(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def hashing_embedding(text: str, dimensions: int) -> List[float]:
+    """Signed hashed bag of words (lowercased \\w+ tokens), normalized to unit length."""
+    vec = [0.0] * dimensions
+    for token in _WORD.findall(text.lower()):
+        h = _token_hash(token)
+        vec[h % dimensions] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    name = "hashing-v1"
+
+    def __init__(self, native_dimensions: int = 1536):
+        self.native_dimensions = native_dimensions
+
+    def embed(self, texts: List[str], dimensions: Optional[int] = None) -> List[List[float]]:
+        dimensions = dimensions or self.native_dimensions
+        return [hashing_embedding(t, dimensions) for t in texts]
+
+    async def aembed(self, texts: List[str], dimensions: Optional[int] = None) -> List[List[float]]:
+        # Pure CPU and fast for query-sized input: computed on the loop, no thread.
+        return self.embed(texts, dimensions)
+
+
+PROVIDERS = {"openai": OpenAIEmbeddingProvider, "hashing": HashingEmbeddingProvider}
+
+
+def get_provider(name: str = EMBEDDING_PROVIDER) -> EmbeddingProvider:
+    try:
+        return PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown EMBEDDING_PROVIDER {name!r}; choose from {', '.join(PROVIDERS)}") from None
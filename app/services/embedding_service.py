@@ -0,0 +1,136 @@
+import os
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Generator, Iterable, List, Optional, Tuple, TypeVar
+from app.services.embedding_cache import get_cache
+from app.services.embedding_providers import EMBEDDING_PROVIDER, get_provider
+from dotenv import load_dotenv
+load_dotenv("creds.env")
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Every embedding in the app goes through this provider (EMBEDDING_PROVIDER=openai|hashing).
+provider = get_provider(EMBEDDING_PROVIDER)
+# Vector size used everywhere: API requests, the embedding cache key and Qdrant collections.
+# Changing it needs a re-embedded collection: python -m app.scripts.reindex_collection.
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS") or provider.native_dimensions)
+# OpenAI accepts up to 2048 inputs / ~300k tokens per embeddings request; stay well below.
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+EMBED_BATCH_MAX_TOKENS = int(os.getenv("EMBED_BATCH_MAX_TOKENS", "100000"))
+# Process-wide cap on concurrent embedding requests (shared by all ingestion jobs).
+EMBED_MAX_IN_FLIGHT = int(os.getenv("EMBED_MAX_IN_FLIGHT", "4"))
+
+_executor = ThreadPoolExecutor(max_workers=EMBED_MAX_IN_FLIGHT, thread_name_prefix="embed")
+
+
+def approx_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def _dimensions_param(dimensions: int) -> Optional[int]:
+    # The model's native size is requested without `dimensions` (ada-002 rejects it), which
+    # also keeps cache keys of full-size vectors unchanged.
+    if dimensions == provider.native_dimensions:
+        return None
+    if not provider.supports_dimensions():
+        raise ValueError(f"{provider.name} only produces {provider.native_dimensions}-dim vectors, not {dimensions}")
+    return dimensions
+
+
+def embed_texts(texts: List[str], dimensions: Optional[int] = None) -> List[List[float]]:
+    """
+    Embed a list of texts, preserving input order.
+    Cached vectors are reused; only the misses go to the provider, in a single call.
+    `dimensions` defaults to EMBEDDING_DIMENSIONS (the reindex job asks for its target size).
+    """
+    if not texts:
+        return []
+    dimensions = _dimensions_param(dimensions or EMBEDDING_DIMENSIONS)
+    cache = get_cache()
+    if cache is None:
+        return provider.embed(texts, dimensions)
+
+    vectors = cache.get_many(provider.name, dimensions, texts)
+    missing = [i for i in range(len(texts)) if i not in vectors]
+    if missing:
+        fresh = provider.embed([texts[i] for i in missing], dimensions)
+        cache.put_many(provider.name, dimensions, [texts[i] for i in missing], fresh)
+        vectors.update(zip(missing, fresh))
+    return [vectors[i] for i in range(len(texts))]
+
+
+def embed_text(text: str, dimensions: Optional[int] = None) -> List[float]:
+    return embed_texts([text], dimensions)[0]
+
+
+async def aembed_texts(texts: List[str], dimensions: Optional[int] = None) -> List[List[float]]:
+    """
+    embed_texts for async callers (chat memory, search): the provider request is awaited,
+    so a query waiting on the embeddings API holds no thread. Cache reads and writes run
+    in a thread: they share the cache's lock with ingestion (including its eviction
+    sweeps), which must never stall the event loop.
+    """
+    if not texts:
+        return []
+    dimensions = _dimensions_param(dimensions or EMBEDDING_DIMENSIONS)
+    cache = get_cache()
+    if cache is None:
+        return await provider.aembed(texts, dimensions)
+
+    vectors = await asyncio.to_thread(cache.get_many, provider.name, dimensions, texts)
+    missing = [i for i in range(len(texts)) if i not in vectors]
+    if missing:
+        fresh = await provider.aembed([texts[i] for i in missing], dimensions)
+        await asyncio.to_thread(cache.put_many, provider.name, dimensions, [texts[i] for i in missing], fresh)
+        vectors.update(zip(missing, fresh))
+    return [vectors[i] for i in range(len(texts))]
+
+
+async def aembed_text(text: str, dimensions: Optional[int] = None) -> List[float]:
+    return (await aembed_texts([text], dimensions))[0]
+
+
+def iter_batches(
+    items: Iterable[T],
+    text_of: Callable[[T], str] = lambda x: x,
+    max_items: int = EMBED_BATCH_SIZE,
+    max_tokens: int = EMBED_BATCH_MAX_TOKENS,
+) -> Generator[List[T], None, None]:
+    """Group items into batches capped by item count and approximate token count."""
+    batch: List[T] = []
+    tokens = 0
+    for item in items:
+        t = approx_tokens(text_of(item))
+        if batch and (len(batch) >= max_items or tokens + t > max_tokens):
+            yield batch
+            batch, tokens = [], 0
+        batch.append(item)
+        tokens += t
+    if batch:
+        yield batch
+
+
+def embed_batches(
+    items: Iterable[T],
+    text_of: Callable[[T], str] = lambda x: x,
+    dimensions: Optional[int] = None,
+) -> Generator[Tuple[List[T], List[List[float]]], None, None]:
+    """
+    Yield (batch, vectors) pairs in input order.
+    Up to EMBED_MAX_IN_FLIGHT batches are requested concurrently, so the caller can
+    work on one batch (e.g. upsert it) while the next ones are being embedded.
+    """
+    pending = deque()
+    for batch in iter_batches(items, text_of):
+        pending.append((batch, _executor.submit(embed_texts, [text_of(i) for i in batch], dimensions)))
+        if len(pending) >= EMBED_MAX_IN_FLIGHT:
+            done_batch, fut = pending.popleft()
+            yield done_batch, fut.result()
+    while pending:
+        done_batch, fut = pending.popleft()
+        yield done_batch, fut.result()
@@ -0,0 +1,144 @@
+"""
+Per-chat-session state of the reasoning engine: the session's current project
+(name and Jira key) and the question waiting for a project to be named.
+
+States live in a process-local LRU (ENGINE_STATE_MAX_SESSIONS). With
+ENGINE_STATE_BACKEND=database they are also written through to the
+engine_states table, so any worker can pick up a session. A cached state is
+trusted for ENGINE_STATE_CACHE_TTL_SEC before being re-read, which covers
+back-to-back turns on one worker. Turns of the same session in one process run
+one at a time (aturn), so a concurrent turn never overwrites pending_query
+half way.
+"""
+import os
+import asyncio
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv("creds.env")
+
+ENGINE_STATE_BACKEND = os.getenv("ENGINE_STATE_BACKEND", "memory").lower()  # memory | database
+ENGINE_STATE_MAX_SESSIONS = int(os.getenv("ENGINE_STATE_MAX_SESSIONS", "10000"))
+ENGINE_STATE_CACHE_TTL_SEC = float(os.getenv("ENGINE_STATE_CACHE_TTL_SEC", "5"))
+
+FIELDS = ("project_name", "project_key", "pending_query")
+
+
+def empty_state() -> Dict[str, Any]:
+    return {field: None for field in FIELDS}
+
+
+class EngineStateStore:
+    def __init__(
+        self,
+        max_sessions: int = ENGINE_STATE_MAX_SESSIONS,
+        persistent: bool = ENGINE_STATE_BACKEND == "database",
+        cache_ttl_sec: float = ENGINE_STATE_CACHE_TTL_SEC,
+    ):
+        self.max_sessions = max_sessions
+        self.persistent = persistent
+        self.cache_ttl_sec = cache_ttl_sec
+        self._states: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per session with a turn in flight; dropped once no turn holds it.
+        self._turn_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    # -- in-process tier ------------------------------------------------
+    def _cached(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._states.get(session_id)
+            if entry is None:
+                return None
+            state, loaded_at = entry
+            if self.persistent and time.monotonic() - loaded_at >= self.cache_ttl_sec:
+                return None
+            self._states.move_to_end(session_id)
+            return dict(state)
+
+    def _remember(self, session_id: str, state: Dict[str, Any]):
+        with self._lock:
+            self._states[session_id] = (dict(state), time.monotonic())
+            self._states.move_to_end(session_id)
+            while len(self._states) > self.max_sessions:
+                self._states.popitem(last=False)
+
+    # -- database tier ----------------------------------------------------
+    @staticmethod
+    def _read(session_id: str) -> Dict[str, Any]:
+        # Imported on use: the memory backend (CLI, legacy app) needs no DATABASE_URL.
+        from app.db.session import SessionLocal
+        from app.models.engine_state import EngineState
+        with SessionLocal() as db:
+            row = db.get(EngineState, session_id)
+            return {field: getattr(row, field) for field in FIELDS} if row else empty_state()
+
+    @staticmethod
+    def _write(session_id: str, state: Dict[str, Any]):
+        from app.db.session import SessionLocal
+        from app.models.engine_state import EngineState
+        with SessionLocal() as db:
+            db.merge(EngineState(chat_session_id=session_id, **{field: state.get(field) for field in FIELDS}))
+            db.commit()
+
+    # -- API --------------------------------------------------------------
+    async def aload(self, session_id: str) -> Dict[str, Any]:
+        state = self._cached(session_id)
+        if state is None:
+            state = await asyncio.to_thread(self._read, session_id) if self.persistent else empty_state()
+            self._remember(session_id, state)
+        return state
+
+    async def asave(self, session_id: str, state: Dict[str, Any]):
+        if self.persistent:
+            await asyncio.to_thread(self._write, session_id, state)
+        self._remember(session_id, state)
+
+    @asynccontextmanager
+    async def aturn(self, session_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """The session's state for one engine turn; saved on exit (even a failed one) if the turn changed it."""
+        lock = self._turn_locks.get(session_id)
+        if lock is None:
+            lock = self._turn_locks[session_id] = asyncio.Lock()
+        async with lock:
+            state = await self.aload(session_id)
+            before = dict(state)
+            try:
+                yield state
+            finally:
+                if state != before:
+                    await self.asave(session_id, state)
+
+    def forget(self, session_ids: Iterable[str]) -> int:
+        """Drop the states of deleted sessions; returns the database rows removed."""
+        session_ids = list(session_ids)
+        with self._lock:
+            for sid in session_ids:
+                self._states.pop(sid, None)
+        if not self.persistent or not session_ids:
+            return 0
+        from app.db.session import SessionLocal
+        from app.models.engine_state import EngineState
+        with SessionLocal() as db:
+            removed = db.query(EngineState).filter(EngineState.chat_session_id.in_(session_ids)).delete(
+                synchronize_session=False
+            )
+            db.commit()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            cached = len(self._states)
+        return {"backend": "database" if self.persistent else "memory", "sessions_cached": cached,
+                "max_sessions": self.max_sessions}
+
+
+_store = EngineStateStore()
+
+
+def get_engine_state_store() -> EngineStateStore:
+    return _store
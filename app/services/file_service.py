@@ -1,18 +1,265 @@
+import io
 import os
-import time
+import uuid
+import hashlib
 import tempfile
 import logging
-from openai import OpenAI
-from app.services.s3_service import download_fileobj
-from app.services.qdrant_service import upsert_points
-from app.utils.text_extraction import parse_pdf_file, parse_docx_file, chunk_text
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Union
+from app.services.s3_service import (
+    download_fileobj,
+    download_bytes,
+    get_object_size,
+    upload_bytes,
+    upload_fileobj,
+)
+from app.services.qdrant_service import (
+    upsert_points,
+    scroll_points,
+    delete_points,
+    set_payloads,
+    ensure_collection,
+    hybrid_vector,
+)
+from app.services.embedding_service import embed_batches
+from app.services.embedding_cache import get_cache
+from app.utils.text_extraction import DocumentSource, iter_text_file, iter_chunks
+from app.utils import bm25
+from app.utils.extraction_pool import iter_pdf_pages_pooled, iter_docx_paragraphs_pooled, check_document_size
 
 logger = logging.getLogger(__name__)
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-MAX_CHUNKS_PER_FILE = 1000
-CHUNK_MAX_CHARS = 3500
-BATCH_UPSERT_SIZE = 64
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "100"))
+UPSERT_CONCURRENCY = int(os.getenv("UPSERT_CONCURRENCY", "2"))
+
+IMAGE_EXTENSIONS = ("png", "jpg", "jpeg", "bmp", "gif")
+
+# Files up to this size are parsed straight from memory instead of a temp file on disk.
+INGEST_IN_MEMORY_MAX_MB = float(os.getenv("INGEST_IN_MEMORY_MAX_MB", "4"))
+# Small uploads are also handed to an in-process worker without an S3 round trip.
+UPLOAD_HANDOFF_MAX_MB = float(os.getenv("UPLOAD_HANDOFF_MAX_MB", "64"))
+MB = 1024 * 1024
+
+_handoff: "OrderedDict[str, bytes]" = OrderedDict()
+_handoff_bytes = 0
+_handoff_lock = threading.Lock()
+
+# Upserts run here so they overlap with the next embedding batch.
+_upsert_executor = ThreadPoolExecutor(max_workers=UPSERT_CONCURRENCY, thread_name_prefix="upsert")
+
+# Namespace for deterministic chunk point ids (uuid5).
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c3a52-8d1e-4b8a-9a0e-3c5f2d7b9e10")
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_point_id(fileId: int, content_hash: str) -> str:
+    """Stable point id for a chunk of a file: same file + same text -> same id."""
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{fileId}:{content_hash}"))
+
+
+def _remember_upload(key: str, data: bytes):
+    global _handoff_bytes
+    with _handoff_lock:
+        old = _handoff.pop(key, None)
+        if old is not None:
+            _handoff_bytes -= len(old)
+        _handoff[key] = data
+        _handoff_bytes += len(data)
+        while _handoff_bytes > UPLOAD_HANDOFF_MAX_MB * MB and _handoff:
+            _, evicted = _handoff.popitem(last=False)
+            _handoff_bytes -= len(evicted)
+
+
+def _take_upload(key: str) -> Optional[bytes]:
+    global _handoff_bytes
+    with _handoff_lock:
+        data = _handoff.pop(key, None)
+        if data is not None:
+            _handoff_bytes -= len(data)
+        return data
+
+
+def stage_bytes(key: str, data: bytes, content_type: str = "application/octet-stream") -> str:
+    """PUT a small file in one request and keep it for an in-process ingestion worker."""
+    upload_bytes(key, data, content_type=content_type)
+    _remember_upload(key, data)
+    return key
+
+
+def stage_upload(
+    key: str,
+    fileobj: BinaryIO,
+    content_type: str = "application/octet-stream",
+    size: Optional[int] = None,
+) -> str:
+    """
+    Upload an incoming file to S3. Small files are read once into memory, PUT in a
+    single request and kept for an in-process ingestion worker, so parsing them needs
+    no S3 GET and no temp file. Larger files stream up as a multipart upload.
+    Pass size for non-seekable streams (e.g. archive members).
+    """
+    if size is None:
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell()
+        fileobj.seek(0)
+    if size <= INGEST_IN_MEMORY_MAX_MB * MB:
+        stage_bytes(key, fileobj.read(), content_type=content_type)
+    else:
+        upload_fileobj(key, fileobj, content_type=content_type)
+    return key
+
+
+@contextmanager
+def open_document(s3_key: str) -> Iterator[DocumentSource]:
+    """
+    Yield the document as bytes (small files) or as a temp file path (large files,
+    fetched with parallel ranged GETs).
+    """
+    data = _take_upload(s3_key)
+    if data is None and get_object_size(s3_key) <= INGEST_IN_MEMORY_MAX_MB * MB:
+        data = download_bytes(s3_key)
+    if data is not None:
+        yield data
+    else:
+        with tempfile.NamedTemporaryFile(delete=True) as tmp:
+            download_fileobj(s3_key, tmp)
+            tmp.flush()  # extraction workers read the file by path
+            yield tmp.name
+
+
+def _iter_plain_text(source: DocumentSource) -> Iterator[str]:
+    if isinstance(source, (bytes, bytearray)):
+        yield from iter_text_file(io.BytesIO(source))
+    else:
+        with open(source, "rb") as f:
+            yield from iter_text_file(f)
+
+
+def iter_document_text(source: DocumentSource, filename: str) -> Iterator[str]:
+    """
+    Stream a document's text as pages / paragraphs / blocks, based on its extension.
+    CPU-bound PDF/DOCX parsing runs in the extraction process pool.
+    """
+    ext = filename.lower().split(".")[-1]
+    if ext == "pdf":
+        return iter_pdf_pages_pooled(source)
+    if ext in ("docx", "doc"):
+        return iter_docx_paragraphs_pooled(source)
+    if ext in IMAGE_EXTENSIONS:
+        logger.info("Image upload detected: skipping text extraction.")
+        return iter(())
+    check_document_size(source)
+    return _iter_plain_text(source)
+
+
+class _FileIndex:
+    """
+    Chunk bookkeeping for one file during an (incremental) index pass.
+
+    Point ids are derived from (fileId, chunk hash): chunks already stored for the
+    file are not embedded again, and stored chunks that no longer occur are deleted
+    by finish(), which must only run once every new chunk has been upserted.
+    """
+
+    def __init__(
+        self,
+        s3_key: str,
+        filename: str,
+        projectId: str,
+        chatSessionId: str,
+        fileId: int,
+        is_kb: bool = False,
+        extra_payload: Optional[Dict[str, Any]] = None,
+    ):
+        self.s3_key = s3_key
+        self.filename = filename
+        self.projectId = projectId
+        self.chatSessionId = chatSessionId
+        self.fileId = fileId
+        self.is_kb = is_kb
+        self.extra_payload = extra_payload or {}
+        self.existing = scroll_points({"fileId": fileId}, payload_fields=["offset"])
+        self.sparse = ensure_collection().sparse  # also store BM25 vectors for hybrid search
+        self.seen_ids = set()
+        self.moved = []  # unchanged chunks whose offset shifted: (id, {"offset", "end"})
+        self.chunk_count = 0
+        self.embedded = 0
+
+    def new_chunks(self, source: DocumentSource) -> Iterator[tuple]:
+        """Yield (index, point_id, hash, offset, text) for chunks that need embedding."""
+        segments = iter_document_text(source, self.filename)
+        for offset, text in iter_chunks(segments, max_chars=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+            h = chunk_hash(text)
+            point_id = chunk_point_id(self.fileId, h)
+            if point_id in self.seen_ids:
+                continue
+            self.seen_ids.add(point_id)
+            self.chunk_count += 1
+            if point_id not in self.existing:
+                yield self, point_id, h, offset, text
+            elif self.existing[point_id].get("offset") != offset:
+                self.moved.append((point_id, {"offset": offset, "end": offset + len(text)}))
+
+    def point(self, point_id: str, h: str, offset: int, text: str, vector: List[float]) -> Dict[str, Any]:
+        self.embedded += 1
+        return {
+            "id": point_id,
+            "vector": hybrid_vector(vector, bm25.document_vector(text)) if self.sparse else vector,
+            "payload": {
+                "type": "file_chunk",
+                "projectId": self.projectId or "",
+                "chatSessionId": self.chatSessionId or "",
+                "filename": self.filename,
+                "fileId": self.fileId,
+                "is_kb": self.is_kb,
+                "chunk_hash": h,
+                "text": text,
+                "offset": offset,
+                "end": offset + len(text),
+                **self.extra_payload,
+            },
+        }
+
+    def finish(self) -> int:
+        if self.moved:
+            set_payloads(self.moved)
+        # Only after every new chunk is stored: drop chunks that vanished from the file.
+        stale = [pid for pid in self.existing if pid not in self.seen_ids]
+        if stale:
+            delete_points(stale)
+
+        cache = get_cache()
+        logger.info(
+            "Completed file processing: fileId=%s, chunks=%d, embedded=%d, unchanged=%d, deleted=%d, embedding_cache=%s",
+            self.fileId, self.chunk_count, self.embedded, self.chunk_count - self.embedded, len(stale),
+            cache.stats() if cache else "disabled",
+        )
+        return self.chunk_count
+
+
+def _embed_and_upsert(chunks: Iterator[tuple], on_batch: Optional[Callable[[], None]] = None):
+    """Embed (index, point_id, hash, offset, text) tuples in batches and upsert the points."""
+    upsert_future = None
+    for batch, vectors in embed_batches(chunks, text_of=lambda c: c[4]):
+        points_batch = [index.point(*chunk, emb) for (index, *chunk), emb in zip(batch, vectors)]
+
+        # At most one upsert outstanding: it overlaps with the embedding requests
+        # still in flight, and its errors surface on the next batch.
+        if upsert_future is not None:
+            upsert_future.result()
+        if on_batch:
+            on_batch()
+        upsert_future = _upsert_executor.submit(upsert_points, points_batch)
+
+    if upsert_future is not None:
+        upsert_future.result()
 
 
 def save_file_and_process_from_s3(
@@ -22,63 +269,66 @@ def save_file_and_process_from_s3(
     chatSessionId: str,
     fileId: int,
     is_kb: bool = False,
-):
-    """Download file from S3 to temp file, parse safely, embed chunks, upsert to Qdrant."""
-    with tempfile.NamedTemporaryFile(delete=True) as tmp:
-        download_fileobj(s3_key, tmp)
-
-        text = ""
-        ext = filename.lower().split(".")[-1]
-        if ext == "pdf":
-            text = parse_pdf_file(tmp.name)
-        elif ext in ("docx", "doc"):
-            text = parse_docx_file(tmp.name)
-        elif ext in ("png", "jpg", "jpeg", "bmp", "gif"):
-            logger.info("Image upload detected: skipping text extraction.")
-            text = ""
-        else:
-            tmp.seek(0)
-            try:
-                text = tmp.read().decode("utf-8", errors="ignore")
-            except Exception:
-                text = ""
-
-        chunks = list(chunk_text(text)) if text else []
-        if len(chunks) > MAX_CHUNKS_PER_FILE:
-            chunks = chunks[:MAX_CHUNKS_PER_FILE]
-
-        points_batch = []
-        for i, ch in enumerate(chunks):
-            if len(ch) > CHUNK_MAX_CHARS:
-                ch = ch[:CHUNK_MAX_CHARS]
-
-            resp = openai_client.embeddings.create(
-                model="text-embedding-3-small", input=ch
-            )
-            emb = resp.data[0].embedding
-
-            points_batch.append(
-                {
-                    "id": int(time.time() * 1000) + i,
-                    "vector": emb,
-                    "payload": {
-                        "type": "file_chunk",
-                        "projectId": projectId or "",
-                        "chatSessionId": chatSessionId or "",
-                        "filename": filename,
-                        "fileId": fileId,
-                        "is_kb": is_kb,
-                    },
-                }
-            )
-
-            if len(points_batch) >= BATCH_UPSERT_SIZE:
-                upsert_points(points_batch)
-                points_batch = []
-
-        if points_batch:
-            upsert_points(points_batch)
+    on_progress: Optional[Callable[[int], None]] = None,
+    extra_payload: Optional[Dict[str, Any]] = None,
+) -> int:
+    """
+    Fetch the file from S3 (into memory when small, else a temp file), then stream it through
+    extract -> chunk -> batched embed -> upsert. Peak memory is bounded by a few
+    embedding batches regardless of file size, and every chunk is indexed.
 
-        logger.info(
-            "Completed file processing: fileId=%s, chunks=%d", fileId, len(chunks)
+    Point ids are derived from (fileId, chunk hash), so this doubles as an
+    incremental re-index: chunks already stored for the file are not embedded
+    again, and stored chunks that no longer occur are deleted at the end.
+    Each point stores its chunk text and [offset, end) in the normalized text;
+    extra_payload (e.g. KB category/tags) is merged into every new point.
+    on_progress(chunks_done) is called after each upserted batch; returns the chunk count.
+    """
+    index = _FileIndex(s3_key, filename, projectId, chatSessionId, fileId, is_kb, extra_payload)
+    with open_document(s3_key) as source:
+        _embed_and_upsert(
+            index.new_chunks(source),
+            on_batch=(lambda: on_progress(index.chunk_count)) if on_progress else None,
         )
+    return index.finish()
+
+
+def process_files_from_s3(
+    documents: List[Dict[str, Any]],
+    on_progress: Optional[Callable[[], None]] = None,
+) -> List[Union[int, Exception]]:
+    """
+    Index several files through one shared embed -> upsert stream. Each document
+    dict takes save_file_and_process_from_s3's arguments. Chunks from consecutive
+    files are packed into the same embedding requests, so a bulk import of many
+    small documents costs a few full batches instead of one short batch per file.
+
+    Returns a chunk count per document, or the exception for a document that
+    failed to download or extract; the others are unaffected. Errors from
+    embedding or upserting fail the whole group (ids are deterministic, so a
+    retry never duplicates points). on_progress() is called after each batch.
+    """
+    results: List[Union[int, Exception, None]] = [None] * len(documents)
+    indexed = []
+
+    def chunks():
+        for i, doc in enumerate(documents):
+            try:
+                index = _FileIndex(**doc)
+                with open_document(index.s3_key) as source:
+                    yield from index.new_chunks(source)
+            except Exception as e:
+                logger.warning("Failed to index fileId=%s in group", doc.get("fileId"), exc_info=True)
+                results[i] = e
+            else:
+                indexed.append((i, index))
+
+    _embed_and_upsert(chunks(), on_batch=on_progress)
+
+    for i, index in indexed:
+        try:
+            results[i] = index.finish()
+        except Exception as e:
+            logger.warning("Failed to finalize fileId=%s", index.fileId, exc_info=True)
+            results[i] = e
+    return results
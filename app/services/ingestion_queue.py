@@ -0,0 +1,390 @@
+import os
+import random
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models.ingestion_job import IngestionJob
+
+load_dotenv("creds.env")
+logger = logging.getLogger(__name__)
+
+# Defaults to the app database; point it at e.g. sqlite:///ingestion.db to run the
+# queue locally without Postgres or any external broker.
+INGESTION_DATABASE_URL = os.getenv("INGESTION_DATABASE_URL")
+INGESTION_MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "5"))
+INGESTION_RETRY_BASE_SEC = float(os.getenv("INGESTION_RETRY_BASE_SEC", "10"))
+INGESTION_RETRY_MAX_SEC = float(os.getenv("INGESTION_RETRY_MAX_SEC", "900"))
+# A running job whose worker stopped heartbeating for this long is handed out again.
+INGESTION_LEASE_SEC = float(os.getenv("INGESTION_LEASE_SEC", "600"))
+
+if INGESTION_DATABASE_URL:
+    _connect_args = {"check_same_thread": False} if INGESTION_DATABASE_URL.startswith("sqlite") else {}
+    queue_engine = create_engine(INGESTION_DATABASE_URL, pool_pre_ping=True, connect_args=_connect_args)
+else:
+    from app.db.session import engine as queue_engine
+
+QueueSession = sessionmaker(autocommit=False, autoflush=False, bind=queue_engine)
+
+
+class LeaseLost(RuntimeError):
+    """The job's lease expired and it was handed to another worker; this run must not write its outcome."""
+
+
+def init_queue_db():
+    IngestionJob.__table__.create(bind=queue_engine, checkfirst=True)
+
+
+def _new_job(
+    s3_key: str,
+    filename: str,
+    projectId: Optional[str],
+    chatSessionId: Optional[str],
+    fileId: int,
+    is_kb: bool,
+    tenant: Optional[str],
+    batch_id: Optional[str] = None,
+) -> IngestionJob:
+    now = datetime.utcnow()
+    return IngestionJob(
+        file_id=fileId,
+        s3_key=s3_key,
+        filename=filename,
+        project_id=projectId,
+        chat_session_id=chatSessionId,
+        is_kb=is_kb,
+        tenant=tenant or "default",
+        batch_id=batch_id,
+        status="queued",
+        attempts=0,
+        max_attempts=INGESTION_MAX_ATTEMPTS,
+        chunks_done=0,
+        run_after=now,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def enqueue(
+    s3_key: str,
+    filename: str,
+    projectId: Optional[str],
+    chatSessionId: Optional[str],
+    fileId: int,
+    is_kb: bool = False,
+    tenant: Optional[str] = None,
+) -> int:
+    """Persist an ingestion job; returns the job id."""
+    with QueueSession() as db:
+        job = _new_job(s3_key, filename, projectId, chatSessionId, fileId, is_kb, tenant)
+        db.add(job)
+        db.commit()
+        return job.id
+
+
+def enqueue_many(
+    jobs: List[Dict[str, Any]],
+    tenant: Optional[str] = None,
+    batch_id: Optional[str] = None,
+) -> List[int]:
+    """
+    Persist many ingestion jobs in one transaction; returns their ids in order.
+    Each job dict takes enqueue()'s arguments (s3_key, filename, projectId, ...).
+    Jobs sharing a batch_id can be claimed together (see claim_batch).
+    """
+    with QueueSession() as db:
+        rows = [_new_job(tenant=tenant, batch_id=batch_id, **job) for job in jobs]
+        db.add_all(rows)
+        db.flush()
+        job_ids = [row.id for row in rows]
+        db.commit()
+        return job_ids
+
+
+def claim_next(worker_id: str, tenant_limit: int = 0) -> Optional[IngestionJob]:
+    """
+    Atomically claim the oldest runnable job, skipping tenants that already have
+    tenant_limit jobs running (0 = unlimited). Uses SKIP LOCKED on Postgres and a
+    guarded UPDATE everywhere, so concurrent workers never claim the same job.
+    """
+    now = datetime.utcnow()
+    with QueueSession() as db:
+        q = db.query(IngestionJob.id).filter(
+            IngestionJob.status == "queued", IngestionJob.run_after <= now
+        )
+        if tenant_limit > 0:
+            busy = (
+                select(IngestionJob.tenant)
+                .where(IngestionJob.status == "running")
+                .group_by(IngestionJob.tenant)
+                .having(func.count(IngestionJob.id) >= tenant_limit)
+            )
+            q = q.filter(IngestionJob.tenant.notin_(busy))
+        candidates = [
+            row.id for row in q.order_by(IngestionJob.id).limit(10).with_for_update(skip_locked=True).all()
+        ]
+
+        for job_id in candidates:
+            res = db.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id, IngestionJob.status == "queued")
+                .values(
+                    status="running",
+                    locked_by=worker_id,
+                    locked_at=now,
+                    started_at=now,
+                    attempts=IngestionJob.attempts + 1,
+                    chunks_done=0,
+                    updated_at=now,
+                )
+            )
+            if res.rowcount == 1:
+                db.commit()
+                job = db.get(IngestionJob, job_id)
+                db.expunge(job)
+                return job
+        db.commit()
+    return None
+
+
+def claim_batch(worker_id: str, batch_id: str, limit: int) -> List[IngestionJob]:
+    """
+    Claim up to `limit` more runnable jobs from the same bulk import, so a worker
+    can index several small documents through one shared embedding stream.
+    """
+    now = datetime.utcnow()
+    with QueueSession() as db:
+        candidates = [
+            row.id
+            for row in db.query(IngestionJob.id)
+            .filter(
+                IngestionJob.batch_id == batch_id,
+                IngestionJob.status == "queued",
+                IngestionJob.run_after <= now,
+            )
+            .order_by(IngestionJob.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        ]
+        if not candidates:
+            db.commit()
+            return []
+        db.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id.in_(candidates), IngestionJob.status == "queued")
+            .values(
+                status="running",
+                locked_by=worker_id,
+                locked_at=now,
+                started_at=now,
+                attempts=IngestionJob.attempts + 1,
+                chunks_done=0,
+                updated_at=now,
+            )
+        )
+        db.commit()
+        # Another worker may have won some of the candidates between SELECT and UPDATE.
+        jobs = (
+            db.query(IngestionJob)
+            .filter(
+                IngestionJob.id.in_(candidates),
+                IngestionJob.status == "running",
+                IngestionJob.locked_by == worker_id,
+            )
+            .order_by(IngestionJob.id)
+            .all()
+        )
+        db.expunge_all()
+        return jobs
+
+
+def _owned(job_ids: List[int], worker_id: str):
+    """Rows of these jobs that are still running under worker_id's lease."""
+    return (
+        IngestionJob.id.in_(job_ids),
+        IngestionJob.status == "running",
+        IngestionJob.locked_by == worker_id,
+    )
+
+
+def record_progress(job_id: int, worker_id: str, chunks_done: int):
+    """Update chunk progress; doubles as the worker's lease heartbeat. Raises LeaseLost."""
+    now = datetime.utcnow()
+    with QueueSession() as db:
+        res = db.execute(
+            update(IngestionJob)
+            .where(*_owned([job_id], worker_id))
+            .values(chunks_done=chunks_done, locked_at=now, updated_at=now)
+        )
+        db.commit()
+    if not res.rowcount:
+        raise LeaseLost(f"Ingestion job {job_id} is no longer leased to {worker_id}")
+
+
+def touch(job_ids: List[int], worker_id: str) -> int:
+    """Renew the lease on several running jobs at once; returns how many are still ours (LeaseLost at 0)."""
+    now = datetime.utcnow()
+    with QueueSession() as db:
+        res = db.execute(
+            update(IngestionJob)
+            .where(*_owned(job_ids, worker_id))
+            .values(locked_at=now, updated_at=now)
+        )
+        db.commit()
+    if job_ids and not res.rowcount:
+        raise LeaseLost(f"Ingestion jobs {job_ids} are no longer leased to {worker_id}")
+    return res.rowcount
+
+
+def mark_succeeded(job_id: int, worker_id: str, chunks_total: int):
+    """Raises LeaseLost (and writes nothing) if the job was handed to another worker."""
+    now = datetime.utcnow()
+    with QueueSession() as db:
+        res = db.execute(
+            update(IngestionJob)
+            .where(*_owned([job_id], worker_id))
+            .values(
+                status="succeeded",
+                chunks_done=chunks_total,
+                chunks_total=chunks_total,
+                last_error=None,
+                locked_by=None,
+                finished_at=now,
+                updated_at=now,
+            )
+        )
+        db.commit()
+    if not res.rowcount:
+        raise LeaseLost(f"Ingestion job {job_id} is no longer leased to {worker_id}")
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped."""
+    delay = min(INGESTION_RETRY_MAX_SEC, INGESTION_RETRY_BASE_SEC * (2 ** max(attempts - 1, 0)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def mark_failed(job_id: int, worker_id: str, error: str):
+    """
+    Re-queue with backoff, or fail permanently once max_attempts is reached.
+    Raises LeaseLost (and writes nothing) if the job was handed to another worker.
+    """
+    now = datetime.utcnow()
+    with QueueSession() as db:
+        job = db.query(IngestionJob).filter(*_owned([job_id], worker_id)).with_for_update().one_or_none()
+        if job is None:
+            raise LeaseLost(f"Ingestion job {job_id} is no longer leased to {worker_id}")
+        job.last_error = error[:4000]
+        job.locked_by = None
+        job.updated_at = now
+        if job.attempts < job.max_attempts:
+            job.status = "queued"
+            job.run_after = now + timedelta(seconds=retry_delay(job.attempts))
+        else:
+            job.status = "failed"
+            job.finished_at = now
+        db.commit()
+
+
+def requeue_stale(lease_sec: float = INGESTION_LEASE_SEC) -> int:
+    """
+    Hand jobs from crashed workers back to the queue, with backoff. Returns the number
+    re-queued. The claim already counted the attempt, so a job that keeps killing its
+    worker (OOM, a parser segfault) fails once it has used max_attempts.
+    """
+    now = datetime.utcnow()
+    expired = (IngestionJob.status == "running", IngestionJob.locked_at < now - timedelta(seconds=lease_sec))
+    with QueueSession() as db:
+        failed = db.execute(
+            update(IngestionJob)
+            .where(*expired, IngestionJob.attempts >= IngestionJob.max_attempts)
+            .values(
+                status="failed",
+                last_error="Worker lease expired (worker crashed or hung); no attempts left",
+                locked_by=None,
+                finished_at=now,
+                updated_at=now,
+            )
+        ).rowcount or 0
+        stale = db.query(IngestionJob).filter(*expired).with_for_update(skip_locked=True).all()
+        for job in stale:
+            job.status = "queued"
+            job.last_error = "Worker lease expired (worker crashed or hung)"
+            job.locked_by = None
+            job.run_after = now + timedelta(seconds=retry_delay(job.attempts))
+            job.updated_at = now
+        db.commit()
+    if failed:
+        logger.warning("Failed %d ingestion jobs whose workers kept dying", failed)
+    return len(stale)
+
+
+def release_jobs(job_ids: List[int], worker_id: str):
+    """Return jobs this worker claimed but never started; the attempt is not counted."""
+    if not job_ids:
+        return
+    now = datetime.utcnow()
+    with QueueSession() as db:
+        db.execute(
+            update(IngestionJob)
+            .where(*_owned(job_ids, worker_id))
+            .values(status="queued", locked_by=None, attempts=IngestionJob.attempts - 1, updated_at=now)
+        )
+        db.commit()
+
+
+def cancel_jobs(file_ids: List[int], reason: str = "file deleted") -> int:
+    """Fail the queued jobs of deleted files so no worker re-indexes them. Returns the number cancelled."""
+    if not file_ids:
+        return 0
+    now = datetime.utcnow()
+    with QueueSession() as db:
+        res = db.execute(
+            update(IngestionJob)
+            .where(IngestionJob.file_id.in_(file_ids), IngestionJob.status == "queued")
+            .values(status="failed", last_error=reason, finished_at=now, updated_at=now)
+        )
+        db.commit()
+        return res.rowcount or 0
+
+
+def get_latest_job(db: Session, file_id: int) -> Optional[IngestionJob]:
+    return (
+        db.query(IngestionJob)
+        .filter(IngestionJob.file_id == file_id)
+        .order_by(IngestionJob.id.desc())
+        .first()
+    )
+
+
+def job_status(job: IngestionJob) -> Dict[str, Any]:
+    """Status summary with elapsed time and chunk throughput."""
+    elapsed = None
+    throughput = None
+    if job.started_at:
+        end = job.finished_at or datetime.utcnow()
+        elapsed = max((end - job.started_at).total_seconds(), 0.0)
+        if elapsed > 0:
+            throughput = job.chunks_done / elapsed
+    return {
+        "jobId": job.id,
+        "fileId": job.file_id,
+        "batchId": job.batch_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "maxAttempts": job.max_attempts,
+        "chunksDone": job.chunks_done,
+        "chunksTotal": job.chunks_total,
+        "elapsedSeconds": elapsed,
+        "chunksPerSecond": throughput,
+        "lastError": job.last_error,
+        "runAfter": job.run_after,
+        "createdAt": job.created_at,
+        "startedAt": job.started_at,
+        "finishedAt": job.finished_at,
+    }
+
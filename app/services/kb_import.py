@@ -0,0 +1,153 @@
+import os
+import uuid
+import shutil
+import logging
+import tempfile
+import mimetypes
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.services import kb_service
+from app.services.file_service import stage_bytes, stage_upload, INGEST_IN_MEMORY_MAX_MB, MB
+from app.services.ingestion_queue import enqueue_many
+from app.utils.archive import is_archive, iter_archive_members, member_basename
+from app.utils.extraction_pool import EXTRACTION_MAX_FILE_MB
+
+load_dotenv("creds.env")
+logger = logging.getLogger(__name__)
+
+BULK_IMPORT_MAX_FILES = int(os.getenv("BULK_IMPORT_MAX_FILES", "5000"))
+# Parallel S3 PUTs for small documents while the archive is still being read.
+BULK_UPLOAD_CONCURRENCY = int(os.getenv("BULK_UPLOAD_CONCURRENCY", "8"))
+
+_upload_executor = ThreadPoolExecutor(max_workers=BULK_UPLOAD_CONCURRENCY, thread_name_prefix="kb-import")
+
+
+def _iter_documents(uploads: Iterable[Tuple[str, BinaryIO]]) -> Iterator[Tuple[str, int, BinaryIO]]:
+    """Yield (path, size, fileobj) for every document, expanding archives in place."""
+    for filename, fileobj in uploads:
+        if is_archive(filename):
+            for member in iter_archive_members(fileobj, filename):
+                yield member.path, member.size, member.fileobj
+        else:
+            fileobj.seek(0, os.SEEK_END)
+            size = fileobj.tell()
+            fileobj.seek(0)
+            yield filename, size, fileobj
+
+
+def _is_seekable(fileobj: BinaryIO) -> bool:
+    try:
+        return fileobj.seekable()
+    except (AttributeError, OSError):  # tar stream members raise instead of returning False
+        return False
+
+
+@contextmanager
+def _seekable(fileobj: BinaryIO) -> Iterator[BinaryIO]:
+    """
+    Yield fileobj, or a temp-file copy of it if it can't seek. Multipart uploads
+    need a seekable body, and members of a streamed tar are not.
+    """
+    if _is_seekable(fileobj):
+        yield fileobj
+        return
+    with tempfile.TemporaryFile() as spool:
+        shutil.copyfileobj(fileobj, spool, 1024 * 1024)
+        spool.seek(0)
+        yield spool
+
+
+def import_kb_files(
+    db: Session,
+    uploads: Iterable[Tuple[str, BinaryIO]],
+    user_id: int,
+    projectId: Optional[str] = None,
+    chatSessionId: Optional[str] = None,
+    category: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Import many KB documents (plain files and/or zip/tar archives) in one call:
+
+    1. Stream every document to S3. Small ones are read into memory and PUT from a
+       thread pool while the archive keeps being read; large ones stream up inline
+       (large tar members are spooled to a temp file first).
+    2. Insert all File + KBMetadata rows in a single transaction.
+    3. Enqueue all ingestion jobs in a single queue transaction under one batch id,
+       so workers can index the documents together with shared embedding batches.
+    """
+    staged: List[Dict[str, str]] = []
+    skipped: List[Dict[str, str]] = []
+    pending = deque()
+    try:
+        for path, size, fileobj in _iter_documents(uploads):
+            name = member_basename(path)
+            if size > EXTRACTION_MAX_FILE_MB * MB:
+                skipped.append({"path": path, "reason": f"larger than {EXTRACTION_MAX_FILE_MB:.0f} MB"})
+                continue
+            if len(staged) >= BULK_IMPORT_MAX_FILES:
+                skipped.append({"path": path, "reason": f"over the {BULK_IMPORT_MAX_FILES} file limit"})
+                continue
+
+            key = f"kb/{uuid.uuid4()}-{name}"
+            content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            if size <= INGEST_IN_MEMORY_MAX_MB * MB:
+                pending.append(_upload_executor.submit(stage_bytes, key, fileobj.read(), content_type))
+                # Bound buffered bytes: wait for the oldest PUT once the window is full.
+                while len(pending) >= 2 * BULK_UPLOAD_CONCURRENCY:
+                    pending.popleft().result()
+            else:
+                with _seekable(fileobj) as body:
+                    stage_upload(key, body, content_type=content_type, size=size)
+            staged.append({"filename": name, "s3_key": key, "path": path})
+
+        while pending:
+            pending.popleft().result()
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+    if not staged:
+        return {"batchId": None, "files": [], "skipped": skipped}
+
+    created = kb_service.create_kb_files(
+        db, staged, user_id, project_id=projectId, chat_session_id=chatSessionId, category=category, tags=tags
+    )
+
+    batch_id = str(uuid.uuid4())
+    job_ids = enqueue_many(
+        [
+            {
+                "s3_key": rec["s3_key"],
+                "filename": rec["filename"],
+                "projectId": projectId,
+                "chatSessionId": chatSessionId,
+                "fileId": rec["id"],
+                "is_kb": True,
+            }
+            for rec in created
+        ],
+        tenant=str(user_id),
+        batch_id=batch_id,
+    )
+    logger.info("Bulk KB import: batch=%s, files=%d, skipped=%d", batch_id, len(created), len(skipped))
+
+    return {
+        "batchId": batch_id,
+        "files": [
+            {
+                "id": rec["id"],
+                "filename": rec["filename"],
+                "path": rec["path"],
+                "s3_key": rec["s3_key"],
+                "job_id": job_id,
+            }
+            for rec, job_id in zip(created, job_ids)
+        ],
+        "skipped": skipped,
+    }
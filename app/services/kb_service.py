@@ -1,9 +1,43 @@
+import logging
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional, Dict, Any
 
 from app.models.file import File
 from app.models.kb_metadata import KBMetadata
+from app.services.qdrant_service import (
+    set_payload_by_filter,
+    hybrid_search,
+    ahybrid_search,
+    retrieve_hits,
+    aretrieve_hits,
+    QDRANT_COLLECTION,
+)
+from app.services.qdrant_connection import run_async
+from app.services.embedding_service import embed_text, aembed_text
+from app.services.retrieval_cache import get_retrieval_cache
+from app.utils import bm25
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------
+# Vector payload sync
+# -----------------------
+def metadata_payload(metadata: Optional[KBMetadata]) -> Dict[str, Any]:
+    """Filterable KB metadata as stored on each chunk point."""
+    if metadata is None:
+        return {"category": None, "tags": []}
+    return {"category": metadata.category, "tags": metadata.tags or []}
+
+
+def sync_metadata_payload(file_id: int, metadata: Optional[KBMetadata]):
+    """Copy category/tags onto the file's chunk points so search can filter on them."""
+    try:
+        set_payload_by_filter({"fileId": file_id}, metadata_payload(metadata))
+    except Exception:
+        # Ingestion re-applies metadata when it finishes, so this is safe to skip.
+        logger.warning("Failed to sync KB metadata to vectors for fileId=%s", file_id, exc_info=True)
 
 
 # -----------------------
@@ -45,6 +79,7 @@ def add_metadata(
 
     db.commit()
     db.refresh(metadata)
+    sync_metadata_payload(file_id, metadata)
     return metadata
 
 
@@ -57,10 +92,55 @@ def delete_metadata(db: Session, file_id: int) -> bool:
     if metadata:
         db.delete(metadata)
         db.commit()
+        sync_metadata_payload(file_id, None)
         return True
     return False
 
 
+# -----------------------
+# Bulk file registration
+# -----------------------
+def create_kb_files(
+    db: Session,
+    entries: List[Dict[str, str]],
+    uploaded_by: int,
+    project_id: Optional[str] = None,
+    chat_session_id: Optional[str] = None,
+    category: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Insert File + KBMetadata rows for many uploaded KB files in one transaction.
+    Each entry has filename, s3_key and path (its location inside an archive,
+    stored as the metadata name). Returns the entries with their new file ids.
+    """
+    files = [
+        File(
+            filename=entry["filename"],
+            s3_key=entry["s3_key"],
+            uploaded_by=uploaded_by,
+            project_id=project_id,
+            chat_session_id=chat_session_id,
+            is_kb=True,
+        )
+        for entry in entries
+    ]
+    try:
+        db.add_all(files)
+        db.flush()  # assigns file ids for the metadata rows
+        db.add_all(
+            KBMetadata(file_id=f.id, name=entry.get("path") or f.filename, category=category, tags=tags)
+            for f, entry in zip(files, entries)
+        )
+        # Read ids before commit expires the rows (avoids a refresh per file).
+        created = [{**entry, "id": f.id} for f, entry in zip(files, entries)]
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return created
+
+
 # -----------------------
 # Project & File Queries
 # -----------------------
@@ -123,3 +203,89 @@ def filter_files(
         q = q.filter(File.filename.ilike(f"%{filename}%"))
 
     return q.order_by(File.created_at.desc()).all()
+
+
+# -----------------------
+# Semantic search over KB chunks
+# -----------------------
+def _chunk_filters(
+    project_id: Optional[str] = None,
+    file_id: Optional[int] = None,
+    category: Optional[str] = None,
+    tag: Optional[str] = None,
+) -> Dict[str, Any]:
+    # All filter fields are payload-indexed (see qdrant_service.PAYLOAD_INDEXES).
+    filters: Dict[str, Any] = {"type": "file_chunk", "is_kb": True}
+    if project_id:
+        filters["projectId"] = project_id
+    if file_id is not None:
+        filters["fileId"] = file_id
+    if category:
+        filters["category"] = category
+    if tag:
+        filters["tags"] = tag
+    return filters
+
+
+def _chunk_hits(hits) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": str(hit.id),
+            "score": hit.score,
+            "fileId": hit.payload.get("fileId"),
+            "filename": hit.payload.get("filename"),
+            "projectId": hit.payload.get("projectId") or None,
+            "category": hit.payload.get("category"),
+            "tags": hit.payload.get("tags"),
+            "text": hit.payload.get("text"),
+            "offset": hit.payload.get("offset"),
+            "end": hit.payload.get("end"),
+        }
+        for hit in hits
+    ]
+
+
+def search_chunks(
+    query: str,
+    project_id: Optional[str] = None,
+    file_id: Optional[int] = None,
+    category: Optional[str] = None,
+    tag: Optional[str] = None,
+    limit: int = 10,
+) -> List[Dict[str, Any]]:
+    """
+    Embed the query once and run a payload-filtered hybrid search over KB chunks:
+    dense and BM25 in one request, fused by rank (exact Jira keys, error codes, acronyms).
+    Repeated queries are answered from the retrieval cache, with no embedding or Qdrant
+    call, until their project is written.
+    """
+    filters = _chunk_filters(project_id, file_id, category, tag)
+    hits = get_retrieval_cache().retrieve(
+        QDRANT_COLLECTION, query, limit, filters,
+        embed=embed_text,
+        search=lambda vector: hybrid_search(vector, bm25.query_vector(query), limit=limit, filters=filters),
+        rehydrate=retrieve_hits,
+    )
+    return _chunk_hits(hits)
+
+
+async def asearch_chunks(
+    query: str,
+    project_id: Optional[str] = None,
+    file_id: Optional[int] = None,
+    category: Optional[str] = None,
+    tag: Optional[str] = None,
+    limit: int = 10,
+) -> List[Dict[str, Any]]:
+    """search_chunks for async routes: nothing blocks the caller's event loop."""
+    filters = _chunk_filters(project_id, file_id, category, tag)
+
+    async def search(vector):
+        return await run_async(ahybrid_search(vector, bm25.query_vector(query), limit=limit, filters=filters))
+
+    async def rehydrate(refs):
+        return await run_async(aretrieve_hits(refs))
+
+    return _chunk_hits(
+        await get_retrieval_cache().aretrieve(QDRANT_COLLECTION, query, limit, filters, aembed_text, search, rehydrate)
+    )
@@ -0,0 +1,216 @@
+"""
+Compaction of the chat memory collection: expire old memories and merge
+near-duplicates, so the collection grows with distinct knowledge rather than
+with traffic.
+
+Memories are grouped by (projectId, chatSessionId). Within a group, a memory
+whose vector has cosine similarity >= MEMORY_DEDUP_THRESHOLD to a newer one is
+folded into it: the newest point is kept (its answer is the current one) and
+records how many memories it absorbed, the earliest of their timestamps and
+the union of their tags; the older points are deleted. Memories older than
+MEMORY_TTL_DAYS are deleted outright.
+
+Run by app.scripts.compact_memory.
+"""
+import os
+import json
+import time
+import datetime
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from dotenv import load_dotenv
+
+import numpy as np
+
+from app.services import qdrant_service
+from app.services.qdrant_connection import get_client
+from app.services.qdrant_profiles import vector_bytes
+
+load_dotenv("creds.env")
+logger = logging.getLogger(__name__)
+
+# 0 keeps memories forever.
+MEMORY_TTL_DAYS = float(os.getenv("MEMORY_TTL_DAYS", "0"))
+MEMORY_DEDUP_THRESHOLD = float(os.getenv("MEMORY_DEDUP_THRESHOLD", "0.95"))
+
+SCAN_BATCH_SIZE = 1000
+VECTOR_BATCH_SIZE = 256
+# Memories compared per matrix product when clustering a group.
+CLUSTER_BLOCK = 256
+
+
+class _Memory(NamedTuple):
+    id: Any
+    ts: float
+    payload_bytes: int
+    tags: Tuple[str, ...]
+    merged: int
+    first_ts: float
+
+
+def memory_ts(payload: Dict[str, Any]) -> Optional[float]:
+    """Epoch seconds of a memory: payload "ts", or its ISO "timestamp" (points written before "ts")."""
+    ts = payload.get("ts")
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    try:
+        return datetime.datetime.fromisoformat(payload["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _tags(value) -> Tuple[str, ...]:
+    # Older memories (and ai_engine's "jira_summary" ones) store a single tag as a plain string.
+    if isinstance(value, str):
+        return (value,)
+    return tuple(value or ())
+
+
+def _memory(record) -> _Memory:
+    payload = record.payload or {}
+    ts = memory_ts(payload) or 0.0
+    first_ts = payload.get("first_ts")
+    return _Memory(
+        id=record.id,
+        ts=ts,
+        payload_bytes=len(json.dumps(payload, default=str)),
+        tags=_tags(payload.get("tags")),
+        merged=int(payload.get("merged") or 0),
+        first_ts=float(first_ts) if isinstance(first_ts, (int, float)) else ts,
+    )
+
+
+def cluster(vectors: np.ndarray, threshold: float) -> List[int]:
+    """
+    Greedy clustering of rows (newest first): each row joins its most similar
+    earlier representative at >= threshold, otherwise it becomes one. Returns
+    the representative index of every row. Blocks of rows are compared with
+    one matrix product each.
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+    rep_of: List[int] = []
+    reps: List[int] = []
+    rep_matrix = np.empty((0, vectors.shape[1]), dtype=vectors.dtype)
+    for start in range(0, len(vectors), CLUSTER_BLOCK):
+        block = vectors[start:start + CLUSTER_BLOCK]
+        if len(reps):
+            sims = block @ rep_matrix.T
+            best, best_sim = sims.argmax(axis=1), sims.max(axis=1)
+        inner = block @ block.T
+        new: List[int] = []
+        for i in range(len(block)):
+            if len(reps) and best_sim[i] >= threshold:
+                rep_of.append(reps[best[i]])
+                continue
+            if new:
+                sims_new = inner[i, new]
+                k = int(sims_new.argmax())
+                if sims_new[k] >= threshold:
+                    rep_of.append(start + new[k])
+                    continue
+            new.append(i)
+            rep_of.append(start + i)
+        reps.extend(start + i for i in new)
+        rep_matrix = np.vstack([rep_matrix, block[new]])
+    return rep_of
+
+
+async def _scan(collection: str) -> Dict[Tuple[Any, Any], List[_Memory]]:
+    """Every memory (payload only, no vectors), grouped by (projectId, chatSessionId)."""
+    client = get_client()
+    groups: Dict[Tuple[Any, Any], List[_Memory]] = defaultdict(list)
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=collection, limit=SCAN_BATCH_SIZE, offset=offset, with_payload=True, with_vectors=False
+        )
+        for r in records:
+            payload = r.payload or {}
+            groups[(payload.get("projectId"), payload.get("chatSessionId"))].append(_memory(r))
+        if offset is None:
+            return groups
+
+
+async def _vectors(collection: str, ids: List[Any]) -> Dict[Any, List[float]]:
+    client = get_client()
+    by_id = {}
+    for start in range(0, len(ids), VECTOR_BATCH_SIZE):
+        records = await client.retrieve(
+            collection, ids=ids[start:start + VECTOR_BATCH_SIZE], with_payload=False, with_vectors=True
+        )
+        for r in records:
+            by_id[r.id] = r.vector[""] if isinstance(r.vector, dict) else r.vector
+    return by_id
+
+
+async def acompact_memory(
+    collection: Optional[str] = None,
+    ttl_days: float = MEMORY_TTL_DAYS,
+    threshold: float = MEMORY_DEDUP_THRESHOLD,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Expire and merge memories in `collection` (default QDRANT_MEMORY_COLLECTION).
+    Returns a report with points and approximate bytes (vectors + payload) reclaimed;
+    with dry_run=True nothing is written.
+    """
+    schema = await qdrant_service.aensure_collection(collection or qdrant_service.QDRANT_MEMORY_COLLECTION)
+    per_vector = sum(vector_bytes(schema.profile, schema.vector_size).values())
+    cutoff = time.time() - ttl_days * 86400 if ttl_days > 0 else None
+    started = time.perf_counter()
+
+    groups = await _scan(schema.name)
+    scanned = sum(len(g) for g in groups.values())
+    expired: List[_Memory] = []
+    duplicates: List[_Memory] = []
+    updates: List[Tuple[Any, Dict[str, Any]]] = []
+    for memories in groups.values():
+        live = []
+        for m in memories:
+            (expired if cutoff is not None and m.ts < cutoff else live).append(m)
+        if len(live) < 2:
+            continue
+        vectors = await _vectors(schema.name, [m.id for m in live])
+        live = sorted((m for m in live if m.id in vectors), key=lambda m: m.ts, reverse=True)  # gone: deleted meanwhile
+        if len(live) < 2:
+            continue
+        rep_of = cluster(np.asarray([vectors[m.id] for m in live], dtype=np.float32), threshold)
+        absorbed: Dict[int, List[_Memory]] = defaultdict(list)
+        for i, rep in enumerate(rep_of):
+            if rep != i:
+                absorbed[rep].append(live[i])
+        for rep, folded in absorbed.items():
+            keep = live[rep]
+            duplicates.extend(folded)
+            tags = sorted(set(keep.tags).union(*(m.tags for m in folded)))
+            updates.append((keep.id, {
+                "merged": keep.merged + sum(m.merged + 1 for m in folded),
+                "first_ts": min([keep.first_ts] + [m.first_ts for m in folded]),
+                "tags": tags,
+            }))
+
+    removed = expired + duplicates
+    report = {
+        "collection": schema.name,
+        "groups": len(groups),
+        "points_scanned": scanned,
+        "expired": len(expired),
+        "merged": len(duplicates),
+        "kept_with_merges": len(updates),
+        "points_reclaimed": len(removed),
+        "bytes_reclaimed": int(sum(per_vector + m.payload_bytes for m in removed)),
+        "points_after": scanned - len(removed),
+        "dry_run": dry_run,
+    }
+    if not dry_run:
+        # Survivors first: a run interrupted in between may over-count merges on the
+        # next run, but the tags of deleted memories are never lost.
+        if updates:
+            await qdrant_service.aset_payloads(updates, collection=schema.name)
+        if removed:
+            await qdrant_service.adelete_points([m.id for m in removed], collection=schema.name)
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    logger.info("Memory compaction %s", report)
+    return report
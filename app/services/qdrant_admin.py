@@ -0,0 +1,334 @@
+"""
+Operational helpers for rebuilding collections behind an alias: copy points
+between collections, wait for indexing, and swap the alias atomically.
+
+Application code keeps addressing the alias name (e.g. "kb_chunks"), so a
+rebuilt collection goes live in one update_collection_aliases call without
+touching any callers. Used by app.scripts.migrate_collection,
+app.scripts.reindex_collection and app.scripts.recall_report.
+"""
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from qdrant_client.http import models as qmodels
+
+from app.services import qdrant_service
+from app.utils import bm25
+from app.services.qdrant_connection import get_client
+from app.services.qdrant_profiles import (
+    CollectionProfile,
+    vectors_config,
+    hnsw_config,
+    quantization_config,
+    vector_bytes,
+)
+
+logger = logging.getLogger(__name__)
+
+COPY_BATCH_SIZE = 256
+
+# Recomputes vectors for a batch of scrolled records (e.g. re-embedding payload["text"]);
+# None in place of a vector leaves that point out of the target.
+VectorsOf = Callable[[list], Awaitable[List[Optional[List[float]]]]]
+
+# payload_schema reports data types; map them back to index types for create_payload_index.
+_INDEX_TYPES = {
+    qmodels.PayloadSchemaType.KEYWORD.value: qmodels.PayloadSchemaType.KEYWORD,
+    qmodels.PayloadSchemaType.INTEGER.value: qmodels.PayloadSchemaType.INTEGER,
+    qmodels.PayloadSchemaType.FLOAT.value: qmodels.PayloadSchemaType.FLOAT,
+    qmodels.PayloadSchemaType.BOOL.value: qmodels.PayloadSchemaType.BOOL,
+    qmodels.PayloadSchemaType.GEO.value: qmodels.PayloadSchemaType.GEO,
+    qmodels.PayloadSchemaType.TEXT.value: qmodels.PayloadSchemaType.TEXT,
+    qmodels.PayloadSchemaType.DATETIME.value: qmodels.PayloadSchemaType.DATETIME,
+}
+
+
+async def aresolve_alias(name: str) -> Optional[str]:
+    """The collection an alias points at, or None when `name` is not an alias."""
+    aliases = await get_client().get_aliases()
+    for alias in aliases.aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    return None
+
+
+async def apayload_indexes(name: str) -> Dict[str, qmodels.PayloadSchemaType]:
+    """The payload indexes defined on a collection, in create_payload_index form."""
+    info = await get_client().get_collection(name)
+    indexes = {}
+    for field, schema in (info.payload_schema or {}).items():
+        data_type = getattr(schema.data_type, "value", schema.data_type)
+        if data_type in _INDEX_TYPES:
+            indexes[field] = _INDEX_TYPES[data_type]
+    return indexes
+
+
+async def acreate_collection(
+    name: str,
+    profile: CollectionProfile,
+    vector_size: int,
+    distance: qmodels.Distance = qmodels.Distance.COSINE,
+    payload_indexes: Optional[Dict[str, qmodels.PayloadSchemaType]] = None,
+    optimizers_config: Optional[qmodels.OptimizersConfigDiff] = None,
+    sparse: bool = False,
+):
+    """Create a fresh collection with `profile`; fails if it already exists."""
+    client = get_client()
+    await client.create_collection(
+        collection_name=name,
+        vectors_config=vectors_config(profile, vector_size, distance),
+        hnsw_config=hnsw_config(profile),
+        quantization_config=quantization_config(profile),
+        optimizers_config=optimizers_config,
+        sparse_vectors_config=qdrant_service.sparse_vectors_config() if sparse else None,
+    )
+    for field, schema in (payload_indexes or {}).items():
+        await client.create_payload_index(collection_name=name, field_name=field, field_schema=schema)
+
+
+async def acopy_points(
+    source: str,
+    target: str,
+    batch_size: int = COPY_BATCH_SIZE,
+    ids: Optional[Iterable] = None,
+    vectors_of: Optional[VectorsOf] = None,
+    sparse: bool = False,
+    skipped: Optional[Set] = None,
+) -> int:
+    """
+    Copy points (vectors and payload) from source to target, keeping their ids.
+    Upserts are idempotent, so an interrupted copy can simply be run again.
+    With `ids`, only those points are copied (catch-up after a first pass).
+    With `vectors_of`, dense vectors are recomputed per batch instead of copied;
+    ids of the points it returns no vector for are added to `skipped`.
+    With `sparse`, points get a BM25 vector (computed from payload text when missing).
+    """
+    client = get_client()
+    with_vectors = vectors_of is None
+    copied = 0
+    if ids is not None:
+        ids = list(ids)
+        for start in range(0, len(ids), batch_size):
+            records = await client.retrieve(
+                source, ids=ids[start:start + batch_size], with_payload=True, with_vectors=with_vectors
+            )
+            copied += await _upsert_records(target, records, vectors_of, sparse, skipped)
+        return copied
+
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=source, limit=batch_size, offset=offset, with_payload=True, with_vectors=with_vectors
+        )
+        copied += await _upsert_records(target, records, vectors_of, sparse, skipped)
+        if offset is None:
+            return copied
+
+
+def point_vector(record, dense: Optional[List[float]] = None, sparse: bool = False):
+    """
+    The vector to write for a copied record: its own dense vector (or `dense`),
+    plus the BM25 sparse vector when the target has one, computed from the
+    payload text if the record did not carry it.
+    """
+    named = dict(record.vector) if isinstance(record.vector, dict) else {"": record.vector}
+    if dense is not None:
+        named[""] = dense
+    if not sparse:
+        return named[""]
+    lexical = named.get(qdrant_service.SPARSE_VECTOR)
+    if lexical is None:
+        lexical = qdrant_service.sparse_vector(bm25.document_vector((record.payload or {}).get("text") or ""))
+    return {"": named[""], qdrant_service.SPARSE_VECTOR: lexical}
+
+
+async def _upsert_records(
+    target: str, records, vectors_of: Optional[VectorsOf] = None, sparse: bool = False,
+    skipped: Optional[Set] = None,
+) -> int:
+    if not records:
+        return 0
+    if vectors_of is None:
+        pairs = [(r, None) for r in records]
+    else:
+        pairs = list(zip(records, await vectors_of(records)))
+        left_out = [r.id for r, d in pairs if d is None]
+        if left_out:
+            if skipped is not None:
+                skipped.update(left_out)
+            pairs = [(r, d) for r, d in pairs if d is not None]
+    points = [
+        qmodels.PointStruct(id=r.id, vector=point_vector(r, d, sparse), payload=r.payload or {})
+        for r, d in pairs
+    ]
+    if points:
+        await get_client().upsert(collection_name=target, points=points, wait=True)
+    return len(points)
+
+
+async def apoint_ids(name: str, batch_size: int = 1000) -> Set:
+    client = get_client()
+    ids, offset = set(), None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=name, limit=batch_size, offset=offset, with_payload=False, with_vectors=False
+        )
+        ids.update(r.id for r in records)
+        if offset is None:
+            return ids
+
+
+async def acount(name: str) -> int:
+    return (await get_client().count(collection_name=name, exact=True)).count
+
+
+async def await_green(name: str, timeout: float = 600.0, poll: float = 1.0):
+    """Wait until the collection has finished optimizing (HNSW built, quantized)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        info = await get_client().get_collection(name)
+        if info.status == qmodels.CollectionStatus.GREEN:
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Qdrant collection {name!r} still {info.status} after {timeout:.0f}s")
+        await asyncio.sleep(poll)
+
+
+async def aswap_alias(alias: str, collection: str):
+    """Point `alias` at `collection` in a single atomic alias update."""
+    operations: List = []
+    if await aresolve_alias(alias) is not None:
+        operations.append(qmodels.DeleteAliasOperation(delete_alias=qmodels.DeleteAlias(alias_name=alias)))
+    operations.append(
+        qmodels.CreateAliasOperation(create_alias=qmodels.CreateAlias(collection_name=collection, alias_name=alias))
+    )
+    await get_client().update_collection_aliases(change_aliases_operations=operations)
+    # Cached descriptors describe the old collection's profile.
+    qdrant_service.forget_collection(alias)
+    logger.info("Qdrant alias %s -> %s", alias, collection)
+
+
+async def arebuild_collection(
+    alias: str,
+    profile: CollectionProfile,
+    vector_size: Optional[int] = None,
+    vectors_of: Optional[VectorsOf] = None,
+    batch_size: int = COPY_BATCH_SIZE,
+    drop_old: bool = False,
+    replace_collection: bool = False,
+    sparse: Optional[bool] = None,
+    allow_missing: bool = False,
+) -> str:
+    """
+    Rebuild the collection behind `alias` into a new one and swap the alias to it.
+
+    Copies every point into "<alias>__<profile>__<timestamp>" (recomputing vectors
+    with `vectors_of` when given), copies points written or deleted during the
+    first pass, checks the counts and waits for indexing before the swap. Points
+    `vectors_of` returns no vector for (chunks stored without their text) would
+    drop out of search, so nothing is swapped while there are any, unless
+    allow_missing=True: then they are left out and logged. A plain
+    collection named `alias` is only replaced with replace_collection=True: it is
+    deleted and the alias created in its place, so writes fail for a moment.
+    The new collection keeps BM25 sparse vectors if the source has them, and gets
+    them for the document chunks collection (QDRANT_SPARSE_VECTORS) or sparse=True.
+    Raises RuntimeError (nothing swapped) when a precondition or the count check fails.
+    """
+    client = get_client()
+    source = await aresolve_alias(alias)
+    is_alias = source is not None
+    if not is_alias:
+        if not await client.collection_exists(alias):
+            raise RuntimeError(f"Collection or alias {alias!r} does not exist")
+        if not replace_collection:
+            raise RuntimeError(
+                f"{alias!r} is a collection, not an alias. Re-run with --replace-collection to delete it "
+                "after the copy and recreate it as an alias (writes are rejected for a moment)."
+            )
+        source = alias
+
+    info = await client.get_collection(source)
+    vectors = info.config.params.vectors
+    vector_size = vector_size or vectors.size
+    if vector_size != vectors.size and vectors_of is None:
+        raise RuntimeError(f"Changing vector size {vectors.size} -> {vector_size} needs re-embedding")
+    if sparse is None:
+        sparse = qdrant_service.SPARSE_VECTOR in (info.config.params.sparse_vectors or {}) or (
+            alias == qdrant_service.QDRANT_COLLECTION and qdrant_service.QDRANT_SPARSE_VECTORS
+        )
+    indexes = await apayload_indexes(source)
+    target = f"{alias}__{profile.name}__{time.strftime('%Y%m%d%H%M%S')}"
+    logger.info(
+        "Rebuilding %s (%s points, size=%s) -> %s [profile=%s, size=%s, sparse=%s, ~%.0f B/point vector RAM]",
+        source, info.points_count, vectors.size, target, profile.name, vector_size, sparse,
+        vector_bytes(profile, vector_size)["ram"],
+    )
+    await acreate_collection(target, profile, vector_size, vectors.distance, indexes, sparse=sparse)
+
+    started = time.perf_counter()
+    skipped: Set = set()
+    copied = await acopy_points(source, target, batch_size, vectors_of=vectors_of, sparse=sparse, skipped=skipped)
+    logger.info("Copied %d points in %.1fs", copied, time.perf_counter() - started)
+    await _catch_up(source, target, batch_size, vectors_of, sparse, skipped)
+
+    if skipped:
+        # Only skipped points still in the source are missing from the target.
+        skipped &= await apoint_ids(source)
+        await _check_skipped(source, skipped, allow_missing)
+
+    await await_green(target)
+    source_count, target_count = await acount(source) - len(skipped), await acount(target)
+    if source_count != target_count:
+        raise RuntimeError(f"Point count mismatch: {source}={source_count} {target}={target_count}; nothing swapped")
+
+    if is_alias:
+        await aswap_alias(alias, target)
+        if drop_old:
+            await client.delete_collection(source)
+            logger.info("Dropped %s", source)
+    else:
+        reported = len(skipped)
+        await _catch_up(source, target, batch_size, vectors_of, sparse, skipped)
+        if len(skipped) > reported:
+            await _check_skipped(source, skipped, allow_missing)
+        await client.delete_collection(source)
+        await aswap_alias(alias, target)
+    logger.info("%s now serves profile %s (size=%s) from %s", alias, profile.name, vector_size, target)
+    return target
+
+
+async def _check_skipped(source: str, skipped: Set, allow_missing: bool):
+    """Refuse (RuntimeError) to swap while points got no vector, unless allow_missing; list their files."""
+    records = await get_client().retrieve(
+        source, ids=list(skipped)[:1000], with_payload=["fileId"], with_vectors=False
+    )
+    file_ids = sorted({(r.payload or {}).get("fileId") for r in records} - {None})
+    if not allow_missing:
+        raise RuntimeError(
+            f"{len(skipped)} points of {source} have no payload text to re-embed (fileIds {file_ids[:50]}). "
+            "Re-index those files (POST /knowledge-base/files/{id}/reindex) and run again, or pass "
+            "--allow-missing to leave them out of search; nothing swapped"
+        )
+    logger.warning(
+        "Leaving out %d points that got no vector (fileIds %s): %s",
+        len(skipped), file_ids[:50], sorted(map(str, skipped))[:20],
+    )
+
+
+async def _catch_up(
+    source: str, target: str, batch_size: int, vectors_of: Optional[VectorsOf], sparse: bool,
+    skipped: Optional[Set] = None,
+):
+    """Apply writes and deletes that happened on the source while copying."""
+    source_ids, target_ids = await apoint_ids(source), await apoint_ids(target)
+    missing, removed = source_ids - target_ids - (skipped or set()), target_ids - source_ids
+    if missing:
+        await acopy_points(
+            source, target, batch_size, ids=missing, vectors_of=vectors_of, sparse=sparse, skipped=skipped
+        )
+    if removed:
+        await get_client().delete(collection_name=target, points_selector=list(removed), wait=True)
+    if missing or removed:
+        logger.info("Caught up %d new and %d deleted points", len(missing), len(removed))
@@ -0,0 +1,123 @@
+"""
+The process-wide Qdrant connection: one AsyncQdrantClient (gRPC or pooled REST)
+owned by a dedicated event-loop thread.
+
+Async callers (routes) await run_async(coro) and never block their own loop;
+sync callers (ingestion workers, the reasoning engine) use run_sync(coro).
+Both hop onto the owner loop, so the client's channel / connection pool is only
+ever used from the loop it was created on.
+"""
+import os
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Optional
+
+import httpx
+from dotenv import load_dotenv
+from qdrant_client import AsyncQdrantClient
+
+load_dotenv("creds.env")
+logger = logging.getLogger(__name__)
+
+# ":memory:" runs qdrant-client's local mode (benchmarks, offline development).
+QDRANT_URL = os.getenv("QDRANT_URL", "http://qdrant:6333")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+# gRPC sends vectors as protobuf instead of JSON float arrays. Opt-in: it needs
+# Qdrant's gRPC port (QDRANT_GRPC_PORT, 6334) reachable, not just the REST port 6333.
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_TIMEOUT_SEC = int(os.getenv("QDRANT_TIMEOUT_SEC", "10"))
+# REST pool size (gRPC multiplexes every call over one HTTP/2 channel).
+QDRANT_MAX_CONNECTIONS = int(os.getenv("QDRANT_MAX_CONNECTIONS", "32"))
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_client: Optional[AsyncQdrantClient] = None
+_lock = threading.Lock()
+
+
+def _create_client() -> AsyncQdrantClient:
+    if QDRANT_URL == ":memory:":
+        return AsyncQdrantClient(location=":memory:")
+    return AsyncQdrantClient(
+        url=QDRANT_URL,
+        api_key=QDRANT_API_KEY,
+        prefer_grpc=QDRANT_PREFER_GRPC,
+        grpc_port=QDRANT_GRPC_PORT,
+        timeout=QDRANT_TIMEOUT_SEC,
+        # qdrant-client's default disables keep-alive; reuse connections instead.
+        limits=httpx.Limits(
+            max_connections=QDRANT_MAX_CONNECTIONS,
+            max_keepalive_connections=QDRANT_MAX_CONNECTIONS,
+            keepalive_expiry=30,
+        ),
+    )
+
+
+def _start() -> asyncio.AbstractEventLoop:
+    global _loop, _client
+    if _loop is not None:
+        return _loop
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="qdrant-loop", daemon=True).start()
+
+            async def create():
+                return _create_client()
+
+            # Created on the owner loop so gRPC/httpx resources bind to it.
+            _client = asyncio.run_coroutine_threadsafe(create(), loop).result()
+            _loop = loop
+            logger.info(
+                "Qdrant client ready (url=%s, grpc=%s, timeout=%ss)", QDRANT_URL, QDRANT_PREFER_GRPC, QDRANT_TIMEOUT_SEC
+            )
+    return _loop
+
+
+def get_client() -> AsyncQdrantClient:
+    """The shared client. Only await it on the owner loop, i.e. inside run_sync / run_async."""
+    _start()
+    return _client
+
+
+def set_client(client: AsyncQdrantClient):
+    """Swap the shared client (e.g. an instrumented or local-mode client in benchmarks)."""
+    global _client
+    _start()
+    _client = client
+
+
+def run_sync(coro: Awaitable) -> Any:
+    """Run a coroutine on the Qdrant loop and wait for it from a regular thread."""
+    loop = _start()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync() called on the Qdrant loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+async def run_async(coro: Awaitable) -> Any:
+    """Await a coroutine that runs on the Qdrant loop without blocking the caller's loop."""
+    loop = _start()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def close():
+    global _loop, _client
+    with _lock:
+        if _loop is None:
+            return
+        loop, client = _loop, _client
+        try:
+            asyncio.run_coroutine_threadsafe(client.close(), loop).result(timeout=5)
+        except Exception:
+            logger.warning("Error closing Qdrant client", exc_info=True)
+        loop.call_soon_threadsafe(loop.stop)
+        _loop = _client = None
@@ -0,0 +1,94 @@
+"""
+Collection profiles: how a Qdrant collection stores and indexes its vectors.
+
+Index-time settings (quantization, on-disk originals, HNSW m / ef_construct)
+apply when a collection is created; changing them means rebuilding it with
+`python -m app.scripts.migrate_collection`. Search-time settings (hnsw_ef,
+rescoring, oversampling) are sent with every query. Pick a profile with
+`python -m app.scripts.recall_report`.
+"""
+import os
+from typing import Dict, NamedTuple, Optional
+from dotenv import load_dotenv
+from qdrant_client.http import models as qmodels
+
+load_dotenv("creds.env")
+
+
+class CollectionProfile(NamedTuple):
+    name: str
+    quantization: Optional[str] = None  # None | "int8" | "binary"
+    on_disk: bool = False               # original float32 vectors on disk (mmap) instead of RAM
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    search_ef: Optional[int] = None     # None = Qdrant's default (ef_construct)
+    rescore: bool = True                # re-rank quantized candidates with the original vectors
+    oversampling: float = 1.0           # fetch limit * oversampling quantized candidates before rescoring
+
+
+PROFILES: Dict[str, CollectionProfile] = {
+    # Plain float32 in RAM: what every collection used before profiles existed.
+    "float": CollectionProfile("float"),
+    # int8 scalar quantization in RAM (4x smaller), originals on disk for rescoring.
+    "int8": CollectionProfile("int8", quantization="int8", on_disk=True, hnsw_ef_construct=128,
+                              search_ef=128, oversampling=2.0),
+    # 1 bit per dimension (32x smaller); works well for 1536-dim OpenAI embeddings with rescoring.
+    "binary": CollectionProfile("binary", quantization="binary", on_disk=True, hnsw_ef_construct=128,
+                                search_ef=128, oversampling=3.0),
+    # Denser graph and wider search for recall-sensitive collections; int8 kept in RAM alongside originals.
+    "high-recall": CollectionProfile("high-recall", quantization="int8", hnsw_m=32, hnsw_ef_construct=256,
+                                     search_ef=256, oversampling=1.5),
+}
+
+QDRANT_PROFILE = os.getenv("QDRANT_PROFILE", "float")
+# Overrides the profile's search ef without rebuilding (query-time only).
+QDRANT_SEARCH_EF = int(os.getenv("QDRANT_SEARCH_EF", "0")) or None
+
+
+def get_profile(name: Optional[str] = None) -> CollectionProfile:
+    name = name or QDRANT_PROFILE
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown Qdrant collection profile {name!r}; choose one of {sorted(PROFILES)}")
+
+
+def vectors_config(profile: CollectionProfile, size: int, distance: qmodels.Distance) -> qmodels.VectorParams:
+    return qmodels.VectorParams(size=size, distance=distance, on_disk=profile.on_disk or None)
+
+
+def hnsw_config(profile: CollectionProfile) -> qmodels.HnswConfigDiff:
+    return qmodels.HnswConfigDiff(m=profile.hnsw_m, ef_construct=profile.hnsw_ef_construct)
+
+
+def quantization_config(profile: CollectionProfile) -> Optional[qmodels.QuantizationConfig]:
+    if profile.quantization == "int8":
+        return qmodels.ScalarQuantization(
+            scalar=qmodels.ScalarQuantizationConfig(type=qmodels.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if profile.quantization == "binary":
+        return qmodels.BinaryQuantization(binary=qmodels.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def search_params(
+    profile: CollectionProfile, exact: bool = False, ef: Optional[int] = None
+) -> Optional[qmodels.SearchParams]:
+    """Per-query parameters; exact=True is brute-force over the original vectors (ground truth)."""
+    if exact:
+        return qmodels.SearchParams(exact=True, quantization=qmodels.QuantizationSearchParams(ignore=True))
+    ef = ef or QDRANT_SEARCH_EF or profile.search_ef
+    quantization = None
+    if profile.quantization:
+        quantization = qmodels.QuantizationSearchParams(rescore=profile.rescore, oversampling=profile.oversampling)
+    if ef is None and quantization is None:
+        return None
+    return qmodels.SearchParams(hnsw_ef=ef, quantization=quantization)
+
+
+def vector_bytes(profile: CollectionProfile, size: int) -> Dict[str, float]:
+    """Approximate bytes per point held in RAM vs on disk for the vectors alone."""
+    original = size * 4.0
+    quantized = {"int8": size * 1.0, "binary": size / 8.0}.get(profile.quantization, 0.0)
+    ram = quantized + (0.0 if profile.on_disk else original)
+    return {"ram": ram, "disk": original if profile.on_disk else 0.0}
@@ -1,41 +1,500 @@
 import os
-from qdrant_client import QdrantClient
+import asyncio
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
 from qdrant_client.http import models as qmodels
 from dotenv import load_dotenv
+
+from app.services.qdrant_connection import get_client, run_sync
+from app.services.embedding_service import EMBEDDING_DIMENSIONS
+from app.services.retrieval_cache import get_retrieval_cache
+from app.services.qdrant_profiles import (
+    CollectionProfile,
+    get_profile,
+    vectors_config,
+    hnsw_config,
+    quantization_config,
+    search_params,
+)
+
 load_dotenv("creds.env")
+logger = logging.getLogger(__name__)
+
+# Document chunks (KB and chat uploads) and conversation memory live in separate
+# collections, so memory lookups on the chat path never scan document vectors.
+QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "kb_chunks")
+QDRANT_MEMORY_COLLECTION = os.getenv("QDRANT_MEMORY_COLLECTION", "chat_memory")
+# Memory is small and latency-sensitive: plain float vectors unless overridden.
+QDRANT_MEMORY_PROFILE = os.getenv("QDRANT_MEMORY_PROFILE", "float")
+# Both used to share this collection; app.scripts.split_collections moves them out.
+LEGACY_COLLECTION = "ai_memory"
+
+# Document chunks also store a BM25 sparse vector (app.utils.bm25) under this name,
+# next to the unnamed dense vector, for hybrid search.
+SPARSE_VECTOR = "bm25"
+QDRANT_SPARSE_VECTORS = os.getenv("QDRANT_SPARSE_VECTORS", "true").lower() == "true"
+# Reciprocal-rank fusion constant: score = sum(1 / (RRF_K + rank)).
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Collections hold vectors of the configured embedding size (EMBEDDING_DIMENSIONS).
+DEFAULT_VECTOR_SIZE = EMBEDDING_DIMENSIONS
+
+# Payload fields used as search filters. Indexed so filtered search stays fast
+# as the collection grows (unindexed filters fall back to a full payload scan).
+PAYLOAD_INDEXES = {
+    "type": qmodels.PayloadSchemaType.KEYWORD,
+    "projectId": qmodels.PayloadSchemaType.KEYWORD,
+    "chatSessionId": qmodels.PayloadSchemaType.KEYWORD,
+    "category": qmodels.PayloadSchemaType.KEYWORD,
+    "tags": qmodels.PayloadSchemaType.KEYWORD,
+    "fileId": qmodels.PayloadSchemaType.INTEGER,
+    "is_kb": qmodels.PayloadSchemaType.BOOL,
+}
+
+MEMORY_PAYLOAD_INDEXES = {
+    "projectId": qmodels.PayloadSchemaType.KEYWORD,
+    "chatSessionId": qmodels.PayloadSchemaType.KEYWORD,
+    "tags": qmodels.PayloadSchemaType.KEYWORD,
+}
+
+# Every coroutine below runs on the shared Qdrant loop (see qdrant_connection):
+# async callers await them via run_async, and each has a blocking facade of the
+# same name without the "a" prefix for worker threads.
+
+
+class CollectionSchema(NamedTuple):
+    """What bootstrap verified about a collection; cached for the life of the process."""
+    name: str
+    vector_size: int
+    distance: qmodels.Distance
+    payload_indexes: Dict[str, qmodels.PayloadSchemaType]
+    profile: CollectionProfile
+    sparse: bool  # has the SPARSE_VECTOR named vector
+
+
+_schemas: Dict[str, CollectionSchema] = {}
+_schema_lock = asyncio.Lock()  # only ever used on the Qdrant loop
+
+
+def _satisfies(cached: Optional[CollectionSchema], vector_size: int, payload_indexes: Optional[Dict]) -> bool:
+    return (
+        cached is not None
+        and cached.vector_size == vector_size
+        and (payload_indexes or {}).keys() <= cached.payload_indexes.keys()
+    )
+
+
+def _vector_size(info) -> Optional[int]:
+    vectors = info.config.params.vectors
+    return vectors.size if isinstance(vectors, qmodels.VectorParams) else None
+
+
+def _has_sparse(info) -> bool:
+    return SPARSE_VECTOR in (info.config.params.sparse_vectors or {})
+
+
+def _quantization_kind(info) -> Optional[str]:
+    config = info.config.quantization_config
+    if isinstance(config, qmodels.ScalarQuantization):
+        return "int8"
+    if isinstance(config, qmodels.BinaryQuantization):
+        return "binary"
+    return None
+
+
+async def _exists(client, name: str) -> bool:
+    if await client.collection_exists(name):
+        return True
+    # Collections may be addressed through an alias (see app.scripts.migrate_collection).
+    aliases = await client.get_aliases()
+    return any(a.alias_name == name for a in aliases.aliases)
+
+
+async def abootstrap_collection(
+    name: str,
+    vector_size: int = DEFAULT_VECTOR_SIZE,
+    payload_indexes: Optional[Dict[str, qmodels.PayloadSchemaType]] = None,
+    distance: qmodels.Distance = qmodels.Distance.COSINE,
+    profile: Optional[CollectionProfile] = None,
+    sparse: bool = False,
+) -> CollectionSchema:
+    """
+    Make sure a collection exists with the expected vector size and payload indexes.
+    Runs the metadata calls once per process and returns the cached descriptor after
+    that. Never destructive: a collection is only created when collection_exists()
+    says it is missing, a vector size mismatch raises instead of recreating, and a
+    transient error propagates so the next call simply tries again.
+    New collections are created with `profile` (default: QDRANT_PROFILE); existing
+    ones keep their storage until rebuilt with app.scripts.migrate_collection.
+    With sparse=True new collections also get the SPARSE_VECTOR named sparse vector.
+    """
+    profile = profile or get_profile()
+    payload_indexes = payload_indexes or {}
+    cached = _schemas.get(name)
+    if _satisfies(cached, vector_size, payload_indexes):
+        return cached
+
+    client = get_client()
+    async with _schema_lock:
+        cached = _schemas.get(name)
+        if _satisfies(cached, vector_size, payload_indexes):
+            return cached
+
+        if not await _exists(client, name):
+            try:
+                await client.create_collection(
+                    collection_name=name,
+                    vectors_config=vectors_config(profile, vector_size, distance),
+                    hnsw_config=hnsw_config(profile),
+                    quantization_config=quantization_config(profile),
+                    sparse_vectors_config=sparse_vectors_config() if sparse else None,
+                )
+            except Exception:
+                # Another process may have created it in the meantime.
+                if not await _exists(client, name):
+                    raise
+                logger.info("Collection %s was created concurrently", name)
+
+        info = await client.get_collection(name)
+        actual_size = _vector_size(info)
+        if actual_size is not None and actual_size != vector_size:
+            raise RuntimeError(
+                f"Qdrant collection {name!r} has vector size {actual_size}, expected {vector_size}; "
+                "re-embed it with `python -m app.scripts.reindex_collection` instead of writing to this one"
+            )
+
+        if _quantization_kind(info) != profile.quantization:
+            logger.warning(
+                "Qdrant collection %s uses quantization=%s but profile %r expects %s; "
+                "rebuild it with `python -m app.scripts.migrate_collection`",
+                name, _quantization_kind(info), profile.name, profile.quantization,
+            )
+
+        if sparse and not _has_sparse(info):
+            logger.warning(
+                "Qdrant collection %s has no %r sparse vectors; search stays dense-only until it is "
+                "rebuilt with `python -m app.scripts.migrate_collection`", name, SPARSE_VECTOR,
+            )
+
+        existing = set((info.payload_schema or {}).keys())
+        indexes = dict(cached.payload_indexes) if cached else {}
+        for field, schema in payload_indexes.items():
+            if field not in existing:
+                await client.create_payload_index(collection_name=name, field_name=field, field_schema=schema)
+            indexes[field] = schema
+
+        schema = CollectionSchema(name, actual_size or vector_size, distance, indexes, profile, _has_sparse(info))
+        _schemas[name] = schema
+        logger.info(
+            "Qdrant collection %s ready (size=%s, profile=%s, sparse=%s, indexes=%s)",
+            name, schema.vector_size, profile.name, schema.sparse, sorted(indexes),
+        )
+        return schema
+
+
+def bootstrap_collection(
+    name: str,
+    vector_size: int = DEFAULT_VECTOR_SIZE,
+    payload_indexes: Optional[Dict[str, qmodels.PayloadSchemaType]] = None,
+    distance: qmodels.Distance = qmodels.Distance.COSINE,
+    profile: Optional[CollectionProfile] = None,
+    sparse: bool = False,
+) -> CollectionSchema:
+    cached = _schemas.get(name)
+    if _satisfies(cached, vector_size, payload_indexes):
+        return cached  # skip the loop hop on the hot path
+    return run_sync(abootstrap_collection(name, vector_size, payload_indexes, distance, profile, sparse))
+
+
+def forget_collection(name: str):
+    """Drop the cached descriptor, e.g. after the collection was deleted or its alias moved."""
+    _schemas.pop(name, None)
+    get_retrieval_cache().note_write(name)
+
+
+async def aensure_collection(collection: Optional[str] = None) -> CollectionSchema:
+    """A collection's descriptor; only the first call per process talks to Qdrant."""
+    name = collection or QDRANT_COLLECTION
+    cached = _schemas.get(name)
+    if cached is not None:
+        return cached
+    if name == QDRANT_COLLECTION:
+        return await abootstrap_collection(name, DEFAULT_VECTOR_SIZE, PAYLOAD_INDEXES, sparse=QDRANT_SPARSE_VECTORS)
+    if name == QDRANT_MEMORY_COLLECTION:
+        return await abootstrap_collection(
+            name, DEFAULT_VECTOR_SIZE, MEMORY_PAYLOAD_INDEXES, profile=get_profile(QDRANT_MEMORY_PROFILE)
+        )
+    return await abootstrap_collection(name, DEFAULT_VECTOR_SIZE)
+
+
+def ensure_collection(collection: Optional[str] = None) -> CollectionSchema:
+    return _schemas.get(collection or QDRANT_COLLECTION) or run_sync(aensure_collection(collection))
+
+
+async def adelete_collection(name: str):
+    forget_collection(name)
+    await get_client().delete_collection(name)
+    get_retrieval_cache().note_write(name)
+
+
+def delete_collection(name: str):
+    run_sync(adelete_collection(name))
+
+
+DELETE_BATCH_SIZE = 1000
+
+
+def build_filter(filters: Dict[str, Any] | qmodels.Filter | None):
+    """Equality filter on each key; list values match any of their elements."""
+    if not filters:
+        return None
+    if isinstance(filters, qmodels.Filter):
+        return filters
+    must = []
+    for k, v in filters.items():
+        match = qmodels.MatchAny(any=list(v)) if isinstance(v, (list, tuple, set)) else qmodels.MatchValue(value=v)
+        must.append(qmodels.FieldCondition(key=k, match=match))
+    return qmodels.Filter(must=must)
 
-QDRANT_URL = os.getenv("QDRANT_URL", "http://qdrant:6333")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
-QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "ai_memory")
-
-client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
-
-def ensure_collection(vector_size: int = 1536):
-    exists = False
-    try:
-        client.get_collection(QDRANT_COLLECTION)
-        exists = True
-    except Exception:
-        exists = False
-    if not exists:
-        client.recreate_collection(
-            collection_name=QDRANT_COLLECTION,
-            vectors_config=qmodels.VectorParams(size=vector_size, distance=qmodels.Distance.COSINE),
+
+def sparse_vectors_config() -> Dict[str, qmodels.SparseVectorParams]:
+    return {SPARSE_VECTOR: qmodels.SparseVectorParams(index=qmodels.SparseIndexParams(on_disk=False))}
+
+
+def sparse_vector(pair: Tuple[List[int], List[float]]) -> qmodels.SparseVector:
+    indices, values = pair
+    return qmodels.SparseVector(indices=indices, values=values)
+
+
+def hybrid_vector(dense: List[float], sparse: Tuple[List[int], List[float]]) -> Dict[str, Any]:
+    """Point vector with the unnamed dense vector ("") and the BM25 sparse vector."""
+    return {"": dense, SPARSE_VECTOR: sparse_vector(sparse)}
+
+
+def _build_points(points: List[Any]) -> List[qmodels.PointStruct]:
+    return [qmodels.PointStruct(**p) if isinstance(p, dict) else p for p in points]
+
+
+async def aupsert_points(points: List[Dict[str, Any]], collection: Optional[str] = None):
+    schema = await aensure_collection(collection)
+    built = _build_points(points)
+    await get_client().upsert(collection_name=schema.name, points=built)
+    # After the write: a search that started before it must not be cached as current.
+    get_retrieval_cache().note_upsert(schema.name, (p.payload for p in built))
+
+
+def upsert_points(points: List[Dict[str, Any]], collection: Optional[str] = None):
+    run_sync(aupsert_points(points, collection))
+
+
+async def ascroll_points(
+    filters: Dict[str, Any],
+    payload_fields: List[str] | None = None,
+    page_size: int = 1000,
+    collection: Optional[str] = None,
+) -> Dict[Any, Dict[str, Any]]:
+    """Return {id: payload} for all points matching filters, fetching only payload_fields (no vectors)."""
+    schema = await aensure_collection(collection)
+    client = get_client()
+    found: Dict[Any, Dict[str, Any]] = {}
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=schema.name,
+            scroll_filter=build_filter(filters),
+            limit=page_size,
+            offset=offset,
+            with_payload=payload_fields or False,
+            with_vectors=False,
         )
+        for p in points:
+            found[p.id] = p.payload or {}
+        if offset is None:
+            return found
+
+
+def scroll_points(
+    filters: Dict[str, Any],
+    payload_fields: List[str] | None = None,
+    page_size: int = 1000,
+    collection: Optional[str] = None,
+) -> Dict[Any, Dict[str, Any]]:
+    return run_sync(ascroll_points(filters, payload_fields, page_size, collection))
+
+
+def scroll_point_ids(filters: Dict[str, Any], page_size: int = 1000, collection: Optional[str] = None) -> Set[Any]:
+    """Return the ids of all points matching filters (ids only, no vectors or payload)."""
+    return set(scroll_points(filters, page_size=page_size, collection=collection))
+
+
+async def aset_payloads(updates: List[Tuple[Any, Dict[str, Any]]], collection: Optional[str] = None):
+    """Apply per-point payload updates, many per request."""
+    schema = await aensure_collection(collection)
+    for start in range(0, len(updates), DELETE_BATCH_SIZE):
+        await get_client().batch_update_points(
+            collection_name=schema.name,
+            update_operations=[
+                qmodels.SetPayloadOperation(set_payload=qmodels.SetPayload(payload=payload, points=[pid]))
+                for pid, payload in updates[start:start + DELETE_BATCH_SIZE]
+            ],
+        )
+    get_retrieval_cache().note_write(schema.name)
+
+
+def set_payloads(updates: List[Tuple[Any, Dict[str, Any]]], collection: Optional[str] = None):
+    run_sync(aset_payloads(updates, collection))
+
+
+async def aset_payload_by_filter(filters: Dict[str, Any], payload: Dict[str, Any], collection: Optional[str] = None):
+    """Set the same payload keys on every point matching filters (one request)."""
+    schema = await aensure_collection(collection)
+    await get_client().set_payload(collection_name=schema.name, payload=payload, points=build_filter(filters))
+    get_retrieval_cache().note_write(schema.name)
+
+
+def set_payload_by_filter(filters: Dict[str, Any], payload: Dict[str, Any], collection: Optional[str] = None):
+    run_sync(aset_payload_by_filter(filters, payload, collection))
+
+
+async def adelete_points(ids: List[Any], collection: Optional[str] = None):
+    schema = await aensure_collection(collection)
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        await get_client().delete(
+            collection_name=schema.name,
+            points_selector=qmodels.PointIdsList(points=ids[start:start + DELETE_BATCH_SIZE]),
+        )
+    get_retrieval_cache().note_write(schema.name)
+
+
+def delete_points(ids: List[Any], collection: Optional[str] = None):
+    run_sync(adelete_points(ids, collection))
+
+
+async def adelete_by_filter(filters: Dict[str, Any], collection: Optional[str] = None):
+    """Delete every point matching filters in one request (e.g. {"fileId": [1, 2, 3]})."""
+    schema = await aensure_collection(collection)
+    await get_client().delete(
+        collection_name=schema.name, points_selector=qmodels.FilterSelector(filter=build_filter(filters))
+    )
+    get_retrieval_cache().note_write(schema.name)
+
+
+def delete_by_filter(filters: Dict[str, Any], collection: Optional[str] = None):
+    run_sync(adelete_by_filter(filters, collection))
+
+
+async def acount_points(filters: Dict[str, Any], collection: Optional[str] = None) -> int:
+    schema = await aensure_collection(collection)
+    return (await get_client().count(collection_name=schema.name, count_filter=build_filter(filters), exact=True)).count
+
+
+def count_points(filters: Dict[str, Any], collection: Optional[str] = None) -> int:
+    return run_sync(acount_points(filters, collection))
+
+
+async def asearch(
+    query_vector: List[float],
+    limit: int = 10,
+    filters: Dict[str, Any] | qmodels.Filter | None = None,
+    collection: Optional[str] = None,
+    exact: bool = False,
+):
+    """Filtered vector search using the collection profile's hnsw_ef / rescoring (exact=True: brute force)."""
+    schema = await aensure_collection(collection)
+    return await get_client().search(
+        collection_name=schema.name,
+        query_vector=query_vector,
+        limit=limit,
+        query_filter=build_filter(filters),
+        search_params=search_params(schema.profile, exact=exact),
+    )
+
+
+def search(
+    query_vector: List[float],
+    limit: int = 10,
+    filters: Dict[str, Any] | qmodels.Filter | None = None,
+    collection: Optional[str] = None,
+    exact: bool = False,
+):
+    return run_sync(asearch(query_vector, limit, filters, collection, exact))
+
+
+async def aretrieve_hits(refs: List[Tuple[Any, float]], collection: Optional[str] = None) -> List[qmodels.ScoredPoint]:
+    """
+    Hits for (id, score) pairs kept by the retrieval cache, with their current
+    payloads (one retrieve by id, no vectors). Points deleted since are dropped.
+    """
+    if not refs:
+        return []
+    schema = await aensure_collection(collection)
+    records = await get_client().retrieve(
+        collection_name=schema.name, ids=[pid for pid, _ in refs], with_payload=True, with_vectors=False
+    )
+    payloads = {r.id: r.payload for r in records}
+    return [
+        qmodels.ScoredPoint(id=pid, version=0, score=score, payload=payloads[pid])
+        for pid, score in refs if pid in payloads
+    ]
+
+
+def retrieve_hits(refs: List[Tuple[Any, float]], collection: Optional[str] = None) -> List[qmodels.ScoredPoint]:
+    return run_sync(aretrieve_hits(refs, collection))
+
+
+def rrf_fuse(result_lists: List[List[qmodels.ScoredPoint]], limit: int, k: int = RRF_K) -> List[qmodels.ScoredPoint]:
+    """Reciprocal-rank fusion: rank-based, so dense cosine and sparse BM25 scores need no calibration."""
+    fused: Dict[Any, float] = {}
+    hits: Dict[Any, qmodels.ScoredPoint] = {}
+    for results in result_lists:
+        for rank, hit in enumerate(results, start=1):
+            fused[hit.id] = fused.get(hit.id, 0.0) + 1.0 / (k + rank)
+            hits.setdefault(hit.id, hit)
+    ranked = sorted(fused, key=fused.get, reverse=True)[:limit]
+    for pid in ranked:
+        hits[pid].score = fused[pid]
+    return [hits[pid] for pid in ranked]
 
-from typing import List, Dict, Any
 
-def upsert_points(points: List[Dict[str, Any]]):
-    ensure_collection()
-    client.upsert(collection_name=QDRANT_COLLECTION, points=points)
+async def ahybrid_search(
+    query_vector: List[float],
+    sparse_query: Tuple[List[int], List[float]],
+    limit: int = 10,
+    filters: Dict[str, Any] | qmodels.Filter | None = None,
+    collection: Optional[str] = None,
+    exact: bool = False,
+):
+    """
+    Dense + BM25 sparse search in one search_batch request, fused with RRF.
+    Each side fetches `limit` hits; scores in the result are RRF scores. Falls back
+    to dense search when the collection has no sparse vectors or the query no terms.
+    """
+    schema = await aensure_collection(collection)
+    if not schema.sparse or not sparse_query[0]:
+        return await asearch(query_vector, limit, filters, collection, exact)
+    query_filter = build_filter(filters)
+    dense, lexical = await get_client().search_batch(
+        collection_name=schema.name,
+        requests=[
+            qmodels.SearchRequest(
+                vector=query_vector, filter=query_filter, limit=limit, with_payload=True,
+                params=search_params(schema.profile, exact=exact),
+            ),
+            qmodels.SearchRequest(
+                vector=qmodels.NamedSparseVector(name=SPARSE_VECTOR, vector=sparse_vector(sparse_query)),
+                filter=query_filter, limit=limit, with_payload=True,
+            ),
+        ],
+    )
+    return rrf_fuse([dense, lexical], limit)
 
 
-def search(query_vector: List[float], limit: int = 10, filters: Dict[str, Any] | None = None):
-    from qdrant_client.http.models import Filter, FieldCondition, MatchValue
-    qfilter = None
-    if filters:
-        must = []
-        for k, v in filters.items():
-            must.append(FieldCondition(key=k, match=MatchValue(value=v)))
-        qfilter = Filter(must=must)
-    return client.search(collection_name=QDRANT_COLLECTION, query_vector=query_vector, limit=limit, query_filter=qfilter)
+def hybrid_search(
+    query_vector: List[float],
+    sparse_query: Tuple[List[int], List[float]],
+    limit: int = 10,
+    filters: Dict[str, Any] | qmodels.Filter | None = None,
+    collection: Optional[str] = None,
+    exact: bool = False,
+):
+    return run_sync(ahybrid_search(query_vector, sparse_query, limit, filters, collection, exact))
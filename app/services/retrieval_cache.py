@@ -0,0 +1,246 @@
+"""
+Process-local cache of retrieval results: (collection, normalized query, limit,
+filters) -> (query embedding, top-k hits with their payloads). A repeated
+question makes no embeddings call and no Qdrant request at all. Payloads are
+chunk or memory text, bounded by the chunk size, so an entry is typically a few
+tens of KB; the cache evicts by total bytes (RETRIEVAL_CACHE_MAX_MB) as well as
+by entry count. An entry too large for the budget keeps only (id, score) pairs
+and has its payloads fetched by id with the caller's `rehydrate` on a hit.
+
+Freshness is tracked with version counters rather than by scanning entries:
+qdrant_service bumps the counter of every projectId / chatSessionId scope an
+upsert touches, an "any write" counter per collection, and a collection epoch
+for writes whose scope it can't see (deletes, payload updates). An entry is
+served only while the counters it was computed under are unchanged; otherwise
+its embedding is reused and only the search runs again. Writes made by other
+processes (a standalone ingestion worker) are picked up after the TTL.
+"""
+import os
+import re
+import time
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from dotenv import load_dotenv
+
+from app.services.embedding_cache import normalize_text
+
+load_dotenv("creds.env")
+
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true"
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "2048"))
+RETRIEVAL_CACHE_TTL_SEC = float(os.getenv("RETRIEVAL_CACHE_TTL_SEC", "120"))
+RETRIEVAL_CACHE_MAX_MB = float(os.getenv("RETRIEVAL_CACHE_MAX_MB", "64"))
+
+# Payload fields whose values scope invalidation.
+SCOPE_FIELDS = ("projectId", "chatSessionId")
+
+
+class _Entry(NamedTuple):
+    vector: array  # float32
+    refs: List[Tuple[Any, float]]  # (point id, score) of each hit, in rank order
+    hits: Optional[Tuple[Any, ...]]  # the hits themselves, or None when too large to keep
+    versions: Tuple[int, ...]
+    expires: float
+    size: int  # approximate bytes held
+
+
+def _payload_bytes(hits: List[Any]) -> int:
+    """Rough in-memory size of the hits' payloads (string lengths dominate)."""
+    total = 0
+    for h in hits:
+        for k, v in (h.payload or {}).items():
+            total += 64 + len(k)
+            if isinstance(v, str):
+                total += len(v)
+            elif isinstance(v, (list, tuple, dict)):
+                total += 32 * len(v)
+    return total
+
+
+def _query_key(query: str) -> str:
+    return re.sub(r"[?!.]+$", "", normalize_text(query).casefold())
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(_freeze(v) for v in value))
+    return value
+
+
+class RetrievalCache:
+    def __init__(
+        self,
+        max_entries: int = RETRIEVAL_CACHE_MAX_ENTRIES,
+        ttl_sec: float = RETRIEVAL_CACHE_TTL_SEC,
+        max_bytes: int = int(RETRIEVAL_CACHE_MAX_MB * 1024 * 1024),
+    ):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._versions: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0  # a scope was written since: re-searched with the cached embedding
+        self.expired = 0
+        self.evictions = 0
+
+    # -- versions --------------------------------------------------------
+    @staticmethod
+    def _scopes(collection: str, filters: Dict[str, Any]) -> List[tuple]:
+        scoped = [
+            (collection, f, filters[f]) for f in SCOPE_FIELDS
+            if f in filters and not isinstance(filters[f], (list, tuple, set))
+        ]
+        return [(collection,)] + (scoped or [(collection, "*")])
+
+    def _snapshot(self, scopes: List[tuple]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(s, 0) for s in scopes)
+
+    def _bump(self, keys: Iterable[tuple]):
+        with self._lock:
+            for k in keys:
+                self._versions[k] = self._versions.get(k, 0) + 1
+
+    def note_upsert(self, collection: str, payloads: Iterable[Optional[Dict[str, Any]]]):
+        """Invalidate the projectId / chatSessionId scopes written by an upsert."""
+        keys = {(collection, "*")}
+        for payload in payloads:
+            for f in SCOPE_FIELDS:
+                value = (payload or {}).get(f)
+                if value is not None:
+                    keys.add((collection, f, value))
+        self._bump(keys)
+
+    def note_write(self, collection: str):
+        """Invalidate every entry of a collection (deletes, payload updates, rebuilds)."""
+        self._bump([(collection,)])
+
+    # -- lookups ---------------------------------------------------------
+    def _lookup(self, key: tuple, scopes: List[tuple]):
+        """(entry or None, fresh, versions now). Versions are read before searching."""
+        with self._lock:
+            versions = self._snapshot(scopes)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False, versions
+            if entry.expires < time.monotonic():
+                self.expired += 1
+                self._bytes -= self._entries.pop(key).size
+                return None, False, versions
+            if entry.versions != versions:
+                self.invalidated += 1
+                return entry, False, versions
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry, True, versions
+
+    def _store(self, key: tuple, vector, hits: List[Any], versions: Tuple[int, ...]):
+        vector = array("f", vector)
+        refs = [(h.id, h.score) for h in hits]
+        size = 256 + vector.itemsize * len(vector) + 64 * len(refs)
+        payload_bytes = _payload_bytes(hits)
+        # Keep the hits unless this one entry would take a large share of the budget.
+        kept = tuple(hits) if size + payload_bytes <= self.max_bytes // 16 else None
+        if kept is not None:
+            size += payload_bytes
+        entry = _Entry(vector, refs, kept, versions, time.monotonic() + self.ttl_sec, size)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def retrieve(
+        self,
+        collection: str,
+        query: str,
+        limit: int,
+        filters: Dict[str, Any],
+        embed: Callable[[str], Any],
+        search: Callable[[Any], List[Any]],
+        rehydrate: Callable[[List[Tuple[Any, float]]], List[Any]],
+    ) -> List[Any]:
+        """
+        Cached hits for the query, else embed (unless a stale entry has the
+        vector) and search. Entries too large to keep their payloads are
+        re-read by id with `rehydrate`.
+        """
+        key = (collection, _query_key(query), limit, _freeze(filters))
+        entry, fresh, versions = self._lookup(key, self._scopes(collection, filters))
+        if fresh:
+            return list(entry.hits) if entry.hits is not None else rehydrate(entry.refs)
+        vector = entry.vector.tolist() if entry else embed(query)
+        hits = search(vector)
+        self._store(key, vector, hits, versions)
+        return hits
+
+    async def aretrieve(
+        self,
+        collection: str,
+        query: str,
+        limit: int,
+        filters: Dict[str, Any],
+        embed: Callable[[str], Awaitable[Any]],
+        search: Callable[[Any], Awaitable[List[Any]]],
+        rehydrate: Callable[[List[Tuple[Any, float]]], Awaitable[List[Any]]],
+    ) -> List[Any]:
+        key = (collection, _query_key(query), limit, _freeze(filters))
+        entry, fresh, versions = self._lookup(key, self._scopes(collection, filters))
+        if fresh:
+            return list(entry.hits) if entry.hits is not None else await rehydrate(entry.refs)
+        vector = entry.vector.tolist() if entry else await embed(query)
+        hits = await search(vector)
+        self._store(key, vector, hits, versions)
+        return hits
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses + self.invalidated + self.expired
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+
+class _NoCache:
+    """Stand-in when RETRIEVAL_CACHE_ENABLED=false: always embeds and searches."""
+
+    def note_upsert(self, collection, payloads):
+        pass
+
+    def note_write(self, collection):
+        pass
+
+    def retrieve(self, collection, query, limit, filters, embed, search, rehydrate):
+        return search(embed(query))
+
+    async def aretrieve(self, collection, query, limit, filters, embed, search, rehydrate):
+        return await search(await embed(query))
+
+    def stats(self):
+        return {"enabled": False}
+
+
+_cache = RetrievalCache() if RETRIEVAL_CACHE_ENABLED else _NoCache()
+
+
+def get_retrieval_cache():
+    return _cache
@@ -1,5 +1,6 @@
 import os
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 from dotenv import load_dotenv
 load_dotenv("creds.env")
@@ -10,6 +11,20 @@ S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # set for LocalStack
 S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY")
 S3_SECRET_KEY = os.getenv("S3_SECRET_KEY")
 
+# Multipart transfer tuning: objects above the threshold are uploaded in parts and
+# downloaded with parallel ranged GETs, S3_MAX_CONCURRENCY parts at a time.
+MB = 1024 * 1024
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8"))
+S3_MULTIPART_CHUNKSIZE_MB = int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB", "8"))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "10"))
+
+transfer_config = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD_MB * MB,
+    multipart_chunksize=S3_MULTIPART_CHUNKSIZE_MB * MB,
+    max_concurrency=S3_MAX_CONCURRENCY,
+    use_threads=True,
+)
+
 _session = boto3.session.Session()
 s3 = _session.client(
     "s3",
@@ -17,7 +32,8 @@ s3 = _session.client(
     endpoint_url=S3_ENDPOINT_URL,
     aws_access_key_id=S3_ACCESS_KEY,
     aws_secret_access_key=S3_SECRET_KEY,
-    config=Config(s3={"addressing_style": "path"}),
+    # Enough pooled connections for a couple of concurrent multipart transfers.
+    config=Config(s3={"addressing_style": "path"}, max_pool_connections=max(10, S3_MAX_CONCURRENCY * 2)),
 )
 
 
@@ -35,12 +51,40 @@ def upload_bytes(key: str, data: bytes, content_type: str = "application/octet-s
 
 def upload_fileobj(key: str, fileobj, content_type: str = "application/octet-stream"):
     """✅ Streaming upload — no full in-memory read."""
-    s3.upload_fileobj(Fileobj=fileobj, Bucket=S3_BUCKET, Key=key, ExtraArgs={"ContentType": content_type})
+    s3.upload_fileobj(
+        Fileobj=fileobj, Bucket=S3_BUCKET, Key=key, ExtraArgs={"ContentType": content_type}, Config=transfer_config
+    )
     return key
 
 
 def download_fileobj(key: str, fileobj):
-    """✅ Streaming download into a file-like object (e.g., tempfile)."""
-    s3.download_fileobj(S3_BUCKET, key, fileobj)
+    """✅ Streaming download into a file-like object (e.g., tempfile); parallel ranged GETs for large objects."""
+    s3.download_fileobj(S3_BUCKET, key, fileobj, Config=transfer_config)
     fileobj.seek(0)
-    return fileobj
\ No newline at end of file
+    return fileobj
+
+
+def get_object_size(key: str) -> int:
+    return s3.head_object(Bucket=S3_BUCKET, Key=key)["ContentLength"]
+
+
+def download_bytes(key: str) -> bytes:
+    """Single GET into memory — only for small objects."""
+    return s3.get_object(Bucket=S3_BUCKET, Key=key)["Body"].read()
+
+
+def list_objects(prefix: str):
+    """Yield {"Key", "Size", "LastModified"} for every object under prefix."""
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=prefix):
+        yield from page.get("Contents", [])
+
+
+def delete_objects(keys):
+    """Delete keys in batches of 1000 (the DeleteObjects limit); missing keys are not an error."""
+    keys = list(keys)
+    for start in range(0, len(keys), 1000):
+        s3.delete_objects(
+            Bucket=S3_BUCKET,
+            Delete={"Objects": [{"Key": k} for k in keys[start:start + 1000]], "Quiet": True},
+        )
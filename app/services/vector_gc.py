@@ -0,0 +1,245 @@
+"""
+Garbage collection of vectors and S3 objects whose owning rows are gone.
+
+Two paths:
+  * ORM hooks (register_orm_hooks): when a File, ChatSession or User is deleted
+    through a SQLAlchemy session, its chunk points (by fileId), chat memories
+    and engine state (by chatSessionId) and uploaded S3 object are removed
+    after the commit, on a background thread. Nothing happens if the
+    transaction rolls back.
+  * A sweep (sweep / app.scripts.gc_vectors, or every GC_SWEEP_INTERVAL_SEC in
+    the API process) for what the hooks cannot see: bulk query deletes,
+    database-level ON DELETE CASCADE, rows removed by hand. It diffs Postgres
+    file ids against the fileIds in Qdrant and the S3 keys under
+    GC_S3_PREFIXES, and with GC_SWEEP_SESSIONS=true also the chatSessionIds of
+    chat memories against chat_sessions.
+
+Qdrant is read before Postgres, so a file created during the sweep is never
+mistaken for an orphan; S3 objects younger than GC_S3_GRACE_SEC are skipped
+because uploads reach S3 before their File row is committed.
+"""
+import os
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Set
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.file import File
+from app.models.user import User
+from app.models.chat_session import ChatSession
+from app.services import ingestion_queue, qdrant_service, s3_service
+from app.services.engine_state import get_engine_state_store
+from app.services.qdrant_connection import get_client, run_sync
+
+load_dotenv("creds.env")
+logger = logging.getLogger(__name__)
+
+# 0 disables the in-process periodic sweep (run app.scripts.gc_vectors from cron instead).
+GC_SWEEP_INTERVAL_SEC = float(os.getenv("GC_SWEEP_INTERVAL_SEC", "0"))
+GC_S3_PREFIXES = [p for p in os.getenv("GC_S3_PREFIXES", "kb/,uploads/").split(",") if p]
+GC_S3_GRACE_SEC = float(os.getenv("GC_S3_GRACE_SEC", "3600"))
+# Memories may carry session ids that never had a chat_sessions row; only sweep them when asked.
+GC_SWEEP_SESSIONS = os.getenv("GC_SWEEP_SESSIONS", "false").lower() == "true"
+
+# Ids per filter-delete request (a MatchAny condition).
+GC_DELETE_BATCH = 500
+SCAN_BATCH_SIZE = 1000
+
+_PENDING = "vector_gc"
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vector-gc")
+
+
+# -----------------------
+# Reconcilers
+# -----------------------
+def _batches(values: Iterable[Any], size: int = GC_DELETE_BATCH) -> Iterable[List[Any]]:
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def delete_file_vectors(file_ids: Iterable[int], dry_run: bool = False) -> int:
+    """Delete the chunk points of these files with batched filter-deletes; returns the points removed."""
+    removed = 0
+    for batch in _batches(file_ids):
+        removed += qdrant_service.count_points({"fileId": batch})
+        if not dry_run:
+            qdrant_service.delete_by_filter({"fileId": batch})
+    return removed
+
+
+def delete_session_vectors(session_ids: Iterable[str], dry_run: bool = False) -> int:
+    """Delete the chat memories of these sessions; returns the points removed."""
+    collection = qdrant_service.QDRANT_MEMORY_COLLECTION
+    removed = 0
+    for batch in _batches(session_ids):
+        removed += qdrant_service.count_points({"chatSessionId": batch}, collection=collection)
+        if not dry_run:
+            qdrant_service.delete_by_filter({"chatSessionId": batch}, collection=collection)
+    return removed
+
+
+def delete_unreferenced_objects(keys: Iterable[str]) -> int:
+    """Delete S3 objects of deleted files unless another File row still points at them."""
+    keys = set(keys)
+    if not keys:
+        return 0
+    with SessionLocal() as db:
+        referenced = {k for (k,) in db.query(File.s3_key).filter(File.s3_key.in_(keys))}
+    orphaned = keys - referenced
+    s3_service.delete_objects(orphaned)
+    return len(orphaned)
+
+
+def reconcile(file_ids: Iterable[int] = (), s3_keys: Iterable[str] = (), session_ids: Iterable[str] = ()) -> Dict[str, int]:
+    """Remove what deleted files and sessions left behind in Qdrant and S3."""
+    file_ids, session_ids = list(file_ids), list(session_ids)
+    if file_ids:
+        ingestion_queue.cancel_jobs(file_ids)
+    report = {
+        "file_points": delete_file_vectors(file_ids) if file_ids else 0,
+        "memory_points": delete_session_vectors(session_ids) if session_ids else 0,
+        "s3_objects": delete_unreferenced_objects(s3_keys),
+        "engine_states": get_engine_state_store().forget(session_ids),
+    }
+    logger.info("Vector GC for files=%s sessions=%s: %s", file_ids, session_ids, report)
+    return report
+
+
+# -----------------------
+# ORM hooks
+# -----------------------
+def _pending(session: Session) -> Dict[str, set]:
+    return session.info.setdefault(_PENDING, {"files": set(), "keys": set(), "sessions": set()})
+
+
+def _before_flush(session: Session, flush_context, instances):
+    pending = None
+    for obj in session.deleted:
+        if isinstance(obj, File):
+            pending = pending or _pending(session)
+            pending["files"].add(obj.id)
+            pending["keys"].add(obj.s3_key)
+        elif isinstance(obj, ChatSession):
+            pending = pending or _pending(session)
+            pending["sessions"].add(obj.id)
+        elif isinstance(obj, User):
+            # chat_sessions rows go with the user via ON DELETE CASCADE, which the ORM never sees.
+            pending = pending or _pending(session)
+            with session.no_autoflush:
+                pending["sessions"].update(
+                    sid for (sid,) in session.query(ChatSession.id).filter(ChatSession.user_id == obj.id)
+                )
+
+
+def _after_commit(session: Session):
+    pending = session.info.pop(_PENDING, None)
+    if pending and (pending["files"] or pending["sessions"]):
+        future = _executor.submit(reconcile, pending["files"], pending["keys"], pending["sessions"])
+        future.add_done_callback(_log_failure)
+
+
+def _after_rollback(session: Session):
+    session.info.pop(_PENDING, None)
+
+
+def _log_failure(future):
+    if future.exception() is not None:
+        logger.warning("Vector GC failed; the next sweep will retry", exc_info=future.exception())
+
+
+def register_orm_hooks():
+    """Reconcile Qdrant and S3 after commits that delete files, sessions or users (idempotent)."""
+    if not event.contains(Session, "before_flush", _before_flush):
+        event.listen(Session, "before_flush", _before_flush)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
+
+
+# -----------------------
+# Sweep
+# -----------------------
+async def _apayload_values(collection: str, field: str) -> Set[Any]:
+    """Distinct values of one payload field over a whole collection."""
+    client = get_client()
+    values: Set[Any] = set()
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=collection, limit=SCAN_BATCH_SIZE, offset=offset, with_payload=[field], with_vectors=False
+        )
+        values.update((r.payload or {}).get(field) for r in records)
+        if offset is None:
+            values.discard(None)
+            values.discard("")
+            return values
+
+
+def _sweep_files(dry_run: bool) -> Dict[str, int]:
+    indexed = run_sync(_apayload_values(qdrant_service.ensure_collection().name, "fileId"))
+    with SessionLocal() as db:
+        existing = {i for (i,) in db.query(File.id)}
+    orphaned = sorted(indexed - existing)
+    return {"orphaned_files": len(orphaned), "points_deleted": delete_file_vectors(orphaned, dry_run)}
+
+
+def _sweep_objects(dry_run: bool) -> Dict[str, int]:
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=GC_S3_GRACE_SEC)
+    objects = [o for prefix in GC_S3_PREFIXES for o in s3_service.list_objects(prefix)]
+    with SessionLocal() as db:
+        referenced = {k for (k,) in db.query(File.s3_key)}
+    orphaned = [o for o in objects if o["Key"] not in referenced and o["LastModified"] < cutoff]
+    if orphaned and not dry_run:
+        s3_service.delete_objects(o["Key"] for o in orphaned)
+    return {"objects_deleted": len(orphaned), "bytes_reclaimed": sum(o["Size"] for o in orphaned)}
+
+
+def _sweep_sessions(dry_run: bool) -> Dict[str, int]:
+    collection = qdrant_service.ensure_collection(qdrant_service.QDRANT_MEMORY_COLLECTION).name
+    referenced = run_sync(_apayload_values(collection, "chatSessionId"))
+    with SessionLocal() as db:
+        existing = {i for (i,) in db.query(ChatSession.id)}
+    orphaned = sorted(referenced - existing)
+    return {"orphaned_sessions": len(orphaned), "points_deleted": delete_session_vectors(orphaned, dry_run)}
+
+
+def sweep(dry_run: bool = False, sessions: bool = GC_SWEEP_SESSIONS, s3: bool = True) -> Dict[str, Any]:
+    """Diff Postgres against Qdrant (and S3) and delete orphans; returns what was reclaimed."""
+    report: Dict[str, Any] = {"dry_run": dry_run, "files": _sweep_files(dry_run)}
+    if s3:
+        report["s3"] = _sweep_objects(dry_run)
+    if sessions:
+        report["sessions"] = _sweep_sessions(dry_run)
+    logger.info("Vector GC sweep: %s", report)
+    return report
+
+
+_stop = threading.Event()
+_sweeper = None
+
+
+def _sweep_forever(interval: float):
+    while not _stop.wait(interval):
+        try:
+            sweep()
+        except Exception:
+            logger.warning("Vector GC sweep failed", exc_info=True)
+
+
+def start_gc_sweeper():
+    global _sweeper
+    if GC_SWEEP_INTERVAL_SEC > 0 and _sweeper is None:
+        _stop.clear()
+        _sweeper = threading.Thread(target=_sweep_forever, args=(GC_SWEEP_INTERVAL_SEC,), name="vector-gc-sweep", daemon=True)
+        _sweeper.start()
+
+
+def stop_gc_sweeper():
+    global _sweeper
+    _stop.set()
+    _sweeper = None
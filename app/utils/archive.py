@@ -0,0 +1,48 @@
+import os
+import tarfile
+import zipfile
+from typing import BinaryIO, Generator, NamedTuple
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+class ArchiveMember(NamedTuple):
+    path: str  # path inside the archive
+    size: int
+    fileobj: BinaryIO
+
+
+def is_archive(filename: str) -> bool:
+    return (filename or "").lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _is_noise(path: str) -> bool:
+    """OS metadata that archivers add (__MACOSX/, .DS_Store, dotfiles)."""
+    parts = path.replace("\\", "/").split("/")
+    return any(part.startswith(".") or part == "__MACOSX" for part in parts if part)
+
+
+def iter_archive_members(fileobj: BinaryIO, filename: str) -> Generator[ArchiveMember, None, None]:
+    """
+    Yield the regular files of a zip or (optionally compressed) tar archive one
+    at a time. Tar is read as a forward-only stream and zip members are
+    decompressed lazily, so the archive is never unpacked to disk or memory.
+    A member's fileobj is only valid until the next member is requested.
+    """
+    if filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(fileobj) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or _is_noise(info.filename):
+                    continue
+                with zf.open(info) as member:
+                    yield ArchiveMember(info.filename, info.file_size, member)
+    else:
+        with tarfile.open(fileobj=fileobj, mode="r|*") as tf:
+            for info in tf:
+                if not info.isfile() or _is_noise(info.name):
+                    continue
+                yield ArchiveMember(info.name, info.size, tf.extractfile(info))
+
+
+def member_basename(path: str) -> str:
+    return os.path.basename(path.replace("\\", "/"))
@@ -0,0 +1,75 @@
+"""
+Local BM25-style sparse vectors for lexical retrieval (no external service).
+
+Tokens are hashed into a 32-bit index space. Documents get BM25's saturated,
+length-normalized term frequency; queries weight every distinct term 1.0, so
+the dot product Qdrant computes is the BM25 score without the IDF factor
+(qdrant-client 1.9 predates server-side IDF). Stopwords are dropped, and
+identifiers such as Jira keys ("DEM-42"), error codes and file names are kept
+whole in addition to their parts, so an exact identifier outranks documents
+that merely share a prefix.
+"""
+import os
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from dotenv import load_dotenv
+
+load_dotenv("creds.env")
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# Typical chunk length in tokens (CHUNK_SIZE=1000 characters is ~170 tokens).
+BM25_AVG_DOC_TOKENS = float(os.getenv("BM25_AVG_DOC_TOKENS", "170"))
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_./:#][a-z0-9]+)*")
+_PARTS = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her
+here hers herself him himself his how i if in into is it its itself just me more most my myself no nor not
+now of off on once only or other our ours ourselves out over own same she should so some such than that the
+their theirs them themselves then there these they this those through to too under until up very was we
+were what when where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+SparseVector = Tuple[List[int], List[float]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; compound identifiers yield the whole token and its parts."""
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if token.isalnum():
+            if token not in STOPWORDS:
+                terms.append(token)
+            continue
+        terms.append(token)
+        terms.extend(p for p in _PARTS.findall(token) if p not in STOPWORDS)
+    return terms
+
+
+@lru_cache(maxsize=65536)
+def _index(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def _vector(weights: Dict[int, float]) -> SparseVector:
+    indices = sorted(weights)
+    return indices, [weights[i] for i in indices]
+
+
+def document_vector(text: str) -> SparseVector:
+    """(indices, values) for a stored chunk."""
+    counts = Counter(map(_index, tokenize(text)))
+    length_norm = BM25_K1 * (1 - BM25_B + BM25_B * sum(counts.values()) / BM25_AVG_DOC_TOKENS)
+    return _vector({i: tf * (BM25_K1 + 1) / (tf + length_norm) for i, tf in counts.items()})
+
+
+def query_vector(text: str) -> SparseVector:
+    """(indices, values) for a search query; empty when it has no searchable terms."""
+    return _vector({_index(t): 1.0 for t in tokenize(text)})
+
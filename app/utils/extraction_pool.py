@@ -0,0 +1,216 @@
+import os
+import time
+import queue
+import logging
+import itertools
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Generator, Optional, Tuple
+from dotenv import load_dotenv
+
+from app.utils.text_extraction import (
+    DocumentSource,
+    pdf_page_count,
+    extract_pdf_pages,
+    extract_docx_paragraphs,
+    iter_pdf_pages,
+    iter_docx_paragraphs,
+)
+
+load_dotenv("creds.env")
+logger = logging.getLogger(__name__)
+
+# 0 disables the pool and parses inline (useful for local debugging).
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+EXTRACTION_MAX_FILE_MB = float(os.getenv("EXTRACTION_MAX_FILE_MB", "200"))
+# Per task (one page range, a page count or one DOCX), from the moment a worker starts
+# it: time queued behind other documents' tasks, or spent by the consumer embedding
+# between pages, does not count.
+EXTRACTION_TIMEOUT_SEC = float(os.getenv("EXTRACTION_TIMEOUT_SEC", "300"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "20"))
+# Page-range tasks in flight per document; keeps memory bounded and leaves room for other files.
+PDF_TASKS_IN_FLIGHT = int(os.getenv("PDF_TASKS_IN_FLIGHT", "4"))
+
+
+class DocumentTooLarge(ValueError):
+    pass
+
+
+class ExtractionTimeout(TimeoutError):
+    pass
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+# Workers report (task id, time.monotonic()) here when they start a task; the clock is
+# system-wide, so the parent can compare it with its own.
+_started_queue = None
+_started: Dict[int, float] = {}
+_started_lock = threading.Lock()
+_task_ids = itertools.count()
+# How often a wait re-checks whether a queued task has started.
+_START_POLL_SEC = 0.1
+
+
+def _init_worker(started_queue):
+    global _started_queue
+    _started_queue = started_queue
+
+
+def _run_task(task_id: int, fn, *args):
+    _started_queue.put((task_id, time.monotonic()))
+    return fn(*args)
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Lazily start the extraction pool. Uses 'spawn' so workers don't inherit the
+    API process's threads, sockets or event loop.
+    """
+    global _pool, _started_queue
+    if EXTRACTION_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                ctx = multiprocessing.get_context("spawn")
+                _started_queue = ctx.Queue()
+                _pool = ProcessPoolExecutor(
+                    max_workers=EXTRACTION_WORKERS,
+                    mp_context=ctx,
+                    initializer=_init_worker,
+                    initargs=(_started_queue,),
+                )
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def check_document_size(source: DocumentSource):
+    size = len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source)
+    size_mb = size / (1024 * 1024)
+    if size_mb > EXTRACTION_MAX_FILE_MB:
+        raise DocumentTooLarge(
+            f"Document is {size_mb:.1f} MB; limit is {EXTRACTION_MAX_FILE_MB:.0f} MB (EXTRACTION_MAX_FILE_MB)"
+        )
+
+
+def _recycle_pool(pool: ProcessPoolExecutor):
+    """
+    Kill the workers of a pool with a hung task and start over with a fresh pool.
+    Future.cancel() can't stop a running task, so this is the only way to get the
+    process back; other tasks on the old pool fail with BrokenProcessPool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    for proc in list((pool._processes or {}).values()):
+        proc.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(pool: ProcessPoolExecutor, fn, *args) -> Tuple[Future, int]:
+    task_id = next(_task_ids)
+    return pool.submit(_run_task, task_id, fn, *args), task_id
+
+
+def _start_time(task_id: int) -> Optional[float]:
+    """When a worker started the task, or None while it is still queued."""
+    with _started_lock:
+        started_queue = _started_queue
+        try:
+            while started_queue is not None:
+                tid, started = started_queue.get_nowait()
+                _started[tid] = started
+        except queue.Empty:
+            pass
+        # Reports of tasks nobody waits for (their document was abandoned) are dropped eventually.
+        stale = time.monotonic() - 2 * EXTRACTION_TIMEOUT_SEC
+        for tid in [t for t, started in _started.items() if started < stale and t != task_id]:
+            del _started[tid]
+        return _started.get(task_id)
+
+
+def _result(pool: ProcessPoolExecutor, task: Tuple[Future, int]):
+    """
+    The task's result, once it is done. Only a task that has run for
+    EXTRACTION_TIMEOUT_SEC is hung: then the pool is recycled, since its worker
+    can't be stopped any other way.
+    """
+    future, task_id = task
+    deadline = None
+    try:
+        while True:
+            if deadline is None:
+                started = _start_time(task_id)
+                if started is not None:
+                    deadline = started + EXTRACTION_TIMEOUT_SEC
+            wait = _START_POLL_SEC if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                return future.result(timeout=wait)
+            except FutureTimeout:
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+    finally:
+        with _started_lock:
+            _started.pop(task_id, None)
+    logger.warning("Extraction task ran for over %.0fs; recycling the extraction pool", EXTRACTION_TIMEOUT_SEC)
+    _recycle_pool(pool)
+    raise ExtractionTimeout(f"Text extraction task exceeded {EXTRACTION_TIMEOUT_SEC:.0f}s")
+
+
+def iter_pdf_pages_pooled(path: DocumentSource) -> Generator[str, None, None]:
+    """
+    Yield PDF page texts in order, parsing page ranges in parallel worker processes.
+    At most PDF_TASKS_IN_FLIGHT ranges are outstanding, so memory stays bounded.
+    """
+    check_document_size(path)
+    pool = get_pool()
+    if pool is None:
+        yield from iter_pdf_pages(path)
+        return
+
+    if isinstance(path, (bytes, bytearray)):
+        # Small in-memory document: one task, so the bytes are pickled only once.
+        for page_text in _result(pool, _submit(pool, extract_pdf_pages, path, 0, 2**31)):
+            if page_text:
+                yield page_text
+        return
+
+    page_count = _result(pool, _submit(pool, pdf_page_count, path))
+
+    pending = deque()
+    try:
+        for start in range(0, page_count, PDF_PAGES_PER_TASK):
+            pending.append(_submit(pool, extract_pdf_pages, path, start, start + PDF_PAGES_PER_TASK))
+            if len(pending) >= PDF_TASKS_IN_FLIGHT:
+                for page_text in _result(pool, pending.popleft()):
+                    if page_text:
+                        yield page_text
+        while pending:
+            for page_text in _result(pool, pending.popleft()):
+                if page_text:
+                    yield page_text
+    finally:
+        # Consumer stopped early or we timed out: drop queued ranges.
+        for fut, _ in pending:
+            fut.cancel()
+
+
+def iter_docx_paragraphs_pooled(path: DocumentSource) -> Generator[str, None, None]:
+    check_document_size(path)
+    pool = get_pool()
+    if pool is None:
+        yield from iter_docx_paragraphs(path)
+        return
+
+    yield from _result(pool, _submit(pool, extract_docx_paragraphs, path))
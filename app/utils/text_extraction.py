@@ -1,44 +1,193 @@
 import fitz  # PyMuPDF
 import docx
+import io
 import re
-from typing import List, Generator
+import zlib
+import codecs
+from typing import BinaryIO, Iterable, List, Generator, Tuple, Union
+
+# A document is either a path on disk or its raw bytes (small files skip the temp file).
+DocumentSource = Union[str, bytes]
+
+_WHITESPACE = re.compile(r"\s+")
+_SPACE = re.compile(" ")
+# Expected number of word ends between content-defined cut candidates.
+CDC_DIVISOR = 16
+TEXT_READ_BLOCK = 64 * 1024
 
 
 # -----------------------------
 # PDF Parser (stream-safe)
 # -----------------------------
-def parse_pdf_file(filepath: str) -> str:
+def _open_pdf(source: DocumentSource):
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def iter_pdf_pages(filepath: DocumentSource) -> Generator[str, None, None]:
     """
-    Extract text from a PDF file page by page.
-    Avoids inflating memory by processing incrementally.
+    Yield the text of a PDF page by page.
+    Only one page is held in memory at a time.
     """
-    text_parts = []
-    with fitz.open(filepath) as doc:
+    with _open_pdf(filepath) as doc:
         for page in doc:
             page_text = page.get_text("text")
             if page_text:
-                text_parts.append(page_text)
-    return "\n".join(text_parts)
+                yield page_text
+
+
+def pdf_page_count(filepath: DocumentSource) -> int:
+    with _open_pdf(filepath) as doc:
+        return doc.page_count
+
+
+def extract_pdf_pages(filepath: DocumentSource, start: int, stop: int) -> List[str]:
+    """
+    Extract the text of pages [start, stop). Runs in the extraction process pool,
+    so a large PDF can be split into page ranges parsed in parallel.
+    """
+    with _open_pdf(filepath) as doc:
+        return [doc[i].get_text("text") for i in range(start, min(stop, doc.page_count))]
+
+
+def parse_pdf_file(filepath: str) -> str:
+    """
+    Extract text from a PDF file page by page.
+    Prefer iter_pdf_pages for large documents; this joins everything into one string.
+    """
+    return "\n".join(iter_pdf_pages(filepath))
 
 
 # -----------------------------
 # DOCX Parser
 # -----------------------------
-def parse_docx_file(filepath: str) -> str:
+def iter_docx_paragraphs(filepath: DocumentSource) -> Generator[str, None, None]:
     """
-    Extract text from a DOCX file paragraph by paragraph.
+    Yield the non-empty paragraphs of a DOCX file.
     """
-    text_parts = []
+    if isinstance(filepath, (bytes, bytearray)):
+        filepath = io.BytesIO(filepath)
     doc = docx.Document(filepath)
     for para in doc.paragraphs:
         if para.text.strip():
-            text_parts.append(para.text.strip())
-    return "\n".join(text_parts)
+            yield para.text.strip()
+
+
+def extract_docx_paragraphs(filepath: DocumentSource) -> List[str]:
+    """
+    Extract all non-empty paragraphs (python-docx parses the whole document anyway).
+    """
+    return list(iter_docx_paragraphs(filepath))
+
+
+def parse_docx_file(filepath: str) -> str:
+    """
+    Extract text from a DOCX file paragraph by paragraph.
+    """
+    return "\n".join(iter_docx_paragraphs(filepath))
+
+
+# -----------------------------
+# Plain text reader
+# -----------------------------
+def iter_text_file(fileobj: BinaryIO, block_size: int = TEXT_READ_BLOCK) -> Generator[str, None, None]:
+    """
+    Yield decoded UTF-8 text in fixed-size blocks (invalid bytes are dropped).
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    while True:
+        block = fileobj.read(block_size)
+        if not block:
+            break
+        text = decoder.decode(block)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
 
 
 # -----------------------------
 # Text Chunker
 # -----------------------------
+def _find_cut(buf: str, start: int, min_body: int, max_body: int) -> int:
+    """
+    Content-defined cut point: the first word end in [start+min_body, start+max_body]
+    whose word hashes to 0 mod CDC_DIVISOR, else the last word end in that window,
+    else start+max_body. Because cuts depend only on nearby content, an edit only
+    moves the cuts around it and chunking re-synchronizes right after.
+    """
+    lo, hi = start + min_body, start + max_body
+    last_space = -1
+    word_start = buf.rfind(" ", start, lo) + 1 or start
+    for m in _SPACE.finditer(buf, lo, hi + 1):
+        j = m.start()
+        if zlib.crc32(buf[word_start:j].encode("utf-8")) % CDC_DIVISOR == 0:
+            return j
+        last_space = j
+        word_start = j + 1
+    return last_space if last_space > start else hi
+
+
+def iter_chunks(
+    segments: Iterable[str],
+    max_chars: int = 1000,
+    overlap: int = 100,
+) -> Generator[Tuple[int, str], None, None]:
+    """
+    Incrementally split a stream of text segments (pages, paragraphs, blocks)
+    into overlapping chunks of at most max_chars.
+
+    Whitespace is normalized across segment boundaries, so chunks and their
+    overlap carry over from one page to the next. Chunk boundaries are
+    content-defined (see _find_cut), so re-chunking an edited document yields
+    the same chunks everywhere except around the edit. Yields (offset, chunk),
+    where offset is the chunk's start position in the normalized text stream.
+    Memory use is bounded by the largest segment plus one chunk.
+    """
+    max_body = max_chars - overlap
+    if max_body <= 0:
+        raise ValueError("overlap must be smaller than max_chars")
+    min_body = max_body // 2
+
+    buf = ""            # normalized text, starting `overlap` chars before the next body
+    buf_start = 0       # stream offset of buf[0]
+    pos = 0             # start of the next chunk body within buf
+
+    for segment in segments:
+        if not segment:
+            continue
+        norm = _WHITESPACE.sub(" ", segment)
+        if buf_start == 0 and not buf:
+            norm = norm.lstrip()
+        elif buf.endswith(" "):
+            norm = norm.lstrip()
+        elif not norm.startswith(" "):
+            norm = " " + norm  # segment boundary acts as whitespace
+        if not norm:
+            continue
+        buf += norm
+
+        # Only cut while more text is known to follow, so the final chunk can
+        # be right-stripped the same way the whole text would have been.
+        while len(buf) - pos > max_body:
+            cut = _find_cut(buf, pos, min_body, max_body)
+            chunk_start = max(pos - overlap, 0)
+            yield buf_start + chunk_start, buf[chunk_start:cut]
+            pos = cut
+        keep_from = max(pos - overlap, 0)
+        if keep_from:
+            buf = buf[keep_from:]
+            buf_start += keep_from
+            pos -= keep_from
+
+    buf = buf.rstrip()
+    if len(buf) > pos:
+        chunk_start = max(pos - overlap, 0)
+        yield buf_start + chunk_start, buf[chunk_start:]
+
+
 def chunk_text(
     text: str,
     max_chars: int = 1000,
@@ -49,14 +198,6 @@ def chunk_text(
     Each chunk has max_chars, with overlap to preserve context.
     """
     if not text:
-        return []
-
-    # Normalize whitespace
-    text = re.sub(r"\s+", " ", text).strip()
-
-    start = 0
-    while start < len(text):
-        end = min(start + max_chars, len(text))
-        chunk = text[start:end]
+        return
+    for _, chunk in iter_chunks([text], max_chars=max_chars, overlap=overlap):
         yield chunk
-        start += max_chars - overlap
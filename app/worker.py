@@ -0,0 +1,231 @@
+"""
+Ingestion worker: claims jobs from the ingestion_jobs table and runs the
+extract -> chunk -> embed -> upsert pipeline for them.
+
+Run standalone with `python -m app.worker`, or let the API process start an
+embedded worker (INGESTION_EMBEDDED_WORKER=true, the default).
+"""
+import os
+import time
+import socket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from app.db.session import SessionLocal
+from app.services import ingestion_queue, kb_service
+from app.services.file_service import save_file_and_process_from_s3, process_files_from_s3
+
+load_dotenv("creds.env")
+logger = logging.getLogger(__name__)
+
+INGESTION_CONCURRENCY = int(os.getenv("INGESTION_CONCURRENCY", "4"))
+INGESTION_TENANT_CONCURRENCY = int(os.getenv("INGESTION_TENANT_CONCURRENCY", "2"))
+INGESTION_POLL_SEC = float(os.getenv("INGESTION_POLL_SEC", "1.0"))
+INGESTION_EMBEDDED_WORKER = os.getenv("INGESTION_EMBEDDED_WORKER", "true").lower() == "true"
+# Jobs from one bulk import are claimed up to this many at a time and share embedding batches.
+INGESTION_GROUP_SIZE = int(os.getenv("INGESTION_GROUP_SIZE", "16"))
+# Heartbeat / progress writes happen at most this often per job.
+PROGRESS_INTERVAL_SEC = 2.0
+
+
+class IngestionWorker:
+    def __init__(self, concurrency: int = INGESTION_CONCURRENCY, tenant_limit: int = INGESTION_TENANT_CONCURRENCY):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self.concurrency = concurrency
+        self.tenant_limit = tenant_limit
+        self._slots = threading.Semaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ingest")
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _extra_payload(db, job):
+        if not job.is_kb:
+            return None
+        return kb_service.metadata_payload(kb_service.get_metadata(db, job.file_id))
+
+    def _succeeded(self, job, chunks: int):
+        if job.is_kb:
+            # Metadata may have been edited while the job ran.
+            with SessionLocal() as db:
+                kb_service.sync_metadata_payload(job.file_id, kb_service.get_metadata(db, job.file_id))
+        ingestion_queue.mark_succeeded(job.id, self.worker_id, chunks)
+
+    def _failed(self, job, error: Exception):
+        try:
+            ingestion_queue.mark_failed(job.id, self.worker_id, f"{type(error).__name__}: {error}")
+        except ingestion_queue.LeaseLost:
+            self._lost(job)
+
+    @staticmethod
+    def _lost(job):
+        # The lease expired and requeue_stale handed the job to another worker: its outcome wins.
+        logger.warning("Ingestion job %s was taken over by another worker; dropping this run's result", job.id)
+
+    def run_job(self, job):
+        last_beat = 0.0
+
+        def on_progress(chunks_done: int):
+            nonlocal last_beat
+            now = time.monotonic()
+            if now - last_beat >= PROGRESS_INTERVAL_SEC:
+                last_beat = now
+                ingestion_queue.record_progress(job.id, self.worker_id, chunks_done)
+
+        try:
+            with SessionLocal() as db:
+                extra_payload = self._extra_payload(db, job)
+
+            chunks = save_file_and_process_from_s3(
+                job.s3_key,
+                job.filename,
+                job.project_id,
+                job.chat_session_id,
+                job.file_id,
+                job.is_kb,
+                on_progress=on_progress,
+                extra_payload=extra_payload,
+            )
+            self._succeeded(job, chunks)
+        except ingestion_queue.LeaseLost:
+            self._lost(job)
+        except Exception as e:
+            logger.exception("Ingestion job %s failed (attempt %s/%s)", job.id, job.attempts, job.max_attempts)
+            self._failed(job, e)
+        finally:
+            self._slots.release()
+
+    def run_group(self, jobs):
+        """Index several jobs from one bulk import through a single shared embedding stream."""
+        job_ids = [job.id for job in jobs]
+        last_beat = 0.0
+
+        def on_progress():
+            nonlocal last_beat
+            now = time.monotonic()
+            if now - last_beat >= PROGRESS_INTERVAL_SEC:
+                last_beat = now
+                ingestion_queue.touch(job_ids, self.worker_id)
+
+        try:
+            try:
+                with SessionLocal() as db:
+                    documents = [
+                        {
+                            "s3_key": job.s3_key,
+                            "filename": job.filename,
+                            "projectId": job.project_id,
+                            "chatSessionId": job.chat_session_id,
+                            "fileId": job.file_id,
+                            "is_kb": job.is_kb,
+                            "extra_payload": self._extra_payload(db, job),
+                        }
+                        for job in jobs
+                    ]
+                results = process_files_from_s3(documents, on_progress=on_progress)
+            except Exception as e:
+                logger.exception("Ingestion group %s failed", job_ids)
+                results = [e] * len(jobs)
+
+            for job, result in zip(jobs, results):
+                try:
+                    if isinstance(result, Exception):
+                        raise result
+                    self._succeeded(job, result)
+                except ingestion_queue.LeaseLost:
+                    self._lost(job)
+                except Exception as e:
+                    logger.error(
+                        "Ingestion job %s failed (attempt %s/%s): %s", job.id, job.attempts, job.max_attempts, e
+                    )
+                    self._failed(job, e)
+        finally:
+            self._slots.release()
+
+    def _dispatch(self):
+        """Claim and submit work for the slot just acquired; the slot is released unless a job took it."""
+        jobs = []
+        submitted = False
+        try:
+            job = ingestion_queue.claim_next(self.worker_id, self.tenant_limit)
+            if job is None:
+                self._stop.wait(INGESTION_POLL_SEC)
+                return
+            jobs.append(job)
+            if job.batch_id and INGESTION_GROUP_SIZE > 1:
+                jobs += ingestion_queue.claim_batch(self.worker_id, job.batch_id, INGESTION_GROUP_SIZE - 1)
+            if len(jobs) > 1:
+                self._executor.submit(self.run_group, jobs)
+            else:
+                self._executor.submit(self.run_job, job)
+            submitted = True
+        finally:
+            if not submitted:
+                self._slots.release()
+                try:
+                    ingestion_queue.release_jobs([j.id for j in jobs], self.worker_id)
+                except Exception:
+                    logger.warning("Could not release claimed jobs %s; their lease will expire", [j.id for j in jobs])
+
+    def run_forever(self):
+        logger.info(
+            "Ingestion worker %s started (concurrency=%d, per-tenant=%d)",
+            self.worker_id, self.concurrency, self.tenant_limit,
+        )
+        last_reap = 0.0
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() - last_reap > 60:
+                    last_reap = time.monotonic()
+                    requeued = ingestion_queue.requeue_stale()
+                    if requeued:
+                        logger.warning("Re-queued %d stale ingestion jobs", requeued)
+
+                if not self._slots.acquire(timeout=INGESTION_POLL_SEC):
+                    continue
+                self._dispatch()
+            except Exception:
+                logger.exception("Ingestion worker loop error")
+                self._stop.wait(INGESTION_POLL_SEC)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run_forever, name="ingestion-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = False):
+        self._stop.set()
+        self._executor.shutdown(wait=wait)
+
+
+_embedded_worker = None
+
+
+def start_embedded_worker():
+    global _embedded_worker
+    if INGESTION_EMBEDDED_WORKER and _embedded_worker is None:
+        ingestion_queue.init_queue_db()
+        _embedded_worker = IngestionWorker()
+        _embedded_worker.start()
+
+
+def stop_embedded_worker():
+    global _embedded_worker
+    if _embedded_worker is not None:
+        _embedded_worker.stop()
+        _embedded_worker = None
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    ingestion_queue.init_queue_db()
+    worker = IngestionWorker()
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop(wait=True)
+
+
+if __name__ == "__main__":
+    main()
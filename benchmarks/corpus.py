@@ -0,0 +1,102 @@
+"""
+Deterministic synthetic corpora for the benchmarks: Zipf-distributed pseudo-words,
+grouped into paragraphs, rendered as .txt, .pdf or .docx documents. Every document
+mentions one Jira-style issue key (issue_key(i)) for identifier lookups.
+"""
+import io
+import random
+import string
+from typing import Iterator, List, Tuple
+
+import docx
+import fitz  # PyMuPDF
+
+WORDS_PER_PARAGRAPH = 80
+PARAGRAPHS_PER_PAGE = 6
+ISSUE_PROJECTS = ("DEM", "OPS", "PAY", "WEB")
+
+
+def issue_key(i: int) -> str:
+    """The issue key mentioned in document i, e.g. "DEM-41"."""
+    return f"{ISSUE_PROJECTS[i % len(ISSUE_PROJECTS)]}-{i + 1}"
+
+
+class Vocabulary:
+    def __init__(self, size: int = 5000, seed: int = 0):
+        rng = random.Random(seed)
+        self.words = [
+            "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 10)))
+            for _ in range(size)
+        ]
+        # Zipf-like: the k-th word is ~1/k as frequent as the first.
+        weights = [1.0 / (k + 1) for k in range(size)]
+        total = 0.0
+        self.cum_weights = []
+        for w in weights:
+            total += w
+            self.cum_weights.append(total)
+
+    def sample(self, rng: random.Random, n: int) -> List[str]:
+        return rng.choices(self.words, cum_weights=self.cum_weights, k=n)
+
+
+def _paragraphs(vocab: Vocabulary, rng: random.Random, words: int) -> List[str]:
+    paragraphs = []
+    while words > 0:
+        n = min(words, WORDS_PER_PARAGRAPH)
+        paragraphs.append(" ".join(vocab.sample(rng, n)) + ".")
+        words -= n
+    return paragraphs
+
+
+def _render_pdf(paragraphs: List[str]) -> bytes:
+    doc = fitz.open()
+    for start in range(0, len(paragraphs), PARAGRAPHS_PER_PAGE):
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), "\n".join(paragraphs[start:start + PARAGRAPHS_PER_PAGE]), fontsize=7)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _render_docx(paragraphs: List[str]) -> bytes:
+    doc = docx.Document()
+    for p in paragraphs:
+        doc.add_paragraph(p)
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def generate_corpus(
+    n_docs: int,
+    words_per_doc: int,
+    formats: Tuple[str, ...] = ("txt",),
+    seed: int = 0,
+) -> Iterator[Tuple[str, bytes, List[str]]]:
+    """Yield (filename, content, paragraphs) for n_docs documents, cycling through formats."""
+    vocab = Vocabulary(seed=seed)
+    for i in range(n_docs):
+        rng = random.Random(seed * 1_000_003 + i)
+        fmt = formats[i % len(formats)]
+        paragraphs = _paragraphs(vocab, rng, words_per_doc)
+        k = rng.randrange(len(paragraphs))
+        paragraphs[k] = f"Tracked in {issue_key(i)}. " + paragraphs[k]
+        if fmt == "pdf":
+            content = _render_pdf(paragraphs)
+        elif fmt == "docx":
+            content = _render_docx(paragraphs)
+        else:
+            content = "\n\n".join(paragraphs).encode("utf-8")
+        yield f"doc{i:05d}.{fmt}", content, paragraphs
+
+
+def generate_queries(paragraphs: List[List[str]], n: int, seed: int = 1, words: int = 6) -> List[str]:
+    """Queries built from a random window of words in a random paragraph of the corpus."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        para = rng.choice(rng.choice(paragraphs)).rstrip(".").split()
+        start = rng.randrange(max(len(para) - words, 0) + 1)
+        queries.append(" ".join(para[start:start + words]))
+    return queries
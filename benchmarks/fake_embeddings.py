@@ -0,0 +1,141 @@
+"""
+Deterministic stand-in for the OpenAI embeddings endpoint (POST /v1/embeddings).
+
+    python -m benchmarks.fake_embeddings --port 8765 --latency-ms 40 --chat-latency-ms 300
+
+A vector is a signed, hashed bag of words normalized to unit length, so it is a
+pure function of (text, dimensions): identical texts embed identically and texts
+sharing words score as similar, which keeps retrieval numbers meaningful.
+Supports both float and base64 encoding_format, like the real API. The vectors
+are app.services.embedding_providers.hashing_embedding; this server adds the
+HTTP round trip (and --latency-ms) that EMBEDDING_PROVIDER=hashing skips.
+
+POST /v1/chat/completions is scripted for the reasoning engine's loop: a JSON
+request is answered with the SCRIPTED_ACTIONS, then an output. When the system
+prompt offers "actions" lists they come in one step, otherwise one per step;
+plain requests (project extraction) get "unknown". GET /rest/api/3/project and
+/rest/api/3/search return no projects and no issues, so JIRA_BASE_URL can
+point here too.
+"""
+import sys
+import json
+import time
+import array
+import base64
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services.embedding_providers import hashing_embedding
+
+DEFAULT_DIMENSIONS = 1536
+# Tools a scripted turn calls: independent of each other, as in a typical project summary.
+SCRIPTED_ACTIONS = [
+    {"function": "getCurrentDate"},
+    {"function": "getProjects"},
+    {"function": "getProjectSummary", "input": "P0"},
+]
+
+
+def fake_embedding(text: str, dimensions: int = DEFAULT_DIMENSIONS):
+    # The app's offline provider, so EMBEDDING_PROVIDER=hashing runs give identical vectors.
+    return hashing_embedding(text, dimensions)
+
+
+class EmbeddingsHandler(BaseHTTPRequestHandler):
+    latency_sec = 0.0
+    chat_latency_sec = 0.0
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/rest/api/3/project"):
+            self._send(200, [])
+            return
+        if "/rest/api/3/search" in self.path:
+            self._send(200, {"issues": [], "total": 0})
+            return
+        # Readiness probe used by the benchmark runner.
+        self._send(200, {"status": "ok"})
+
+    def do_POST(self):
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            self._chat(json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}"))
+            return
+        if not self.path.rstrip("/").endswith("/embeddings"):
+            self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        inputs = body.get("input") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = int(body.get("dimensions") or DEFAULT_DIMENSIONS)
+        as_base64 = body.get("encoding_format") == "base64"
+
+        data = []
+        tokens = 0
+        for i, text in enumerate(inputs):
+            vec = fake_embedding(text, dimensions)
+            tokens += len(text) // 4 + 1
+            if as_base64:
+                vec = base64.b64encode(array.array("f", vec).tobytes()).decode("ascii")
+            data.append({"object": "embedding", "index": i, "embedding": vec})
+
+        if self.latency_sec:
+            time.sleep(self.latency_sec)
+        self._send(200, {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "fake"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    def _chat(self, body):
+        messages = body.get("messages") or []
+        observed = sum(m.get("role") == "developer" for m in messages)
+        parallel = bool(messages) and '"actions"' in (messages[0].get("content") or "")
+        if (body.get("response_format") or {}).get("type") != "json_object":
+            content = "unknown"
+        elif parallel and not observed:
+            content = json.dumps({"type": "action", "actions": SCRIPTED_ACTIONS})
+        elif not parallel and observed < len(SCRIPTED_ACTIONS):
+            content = json.dumps({"type": "action", **SCRIPTED_ACTIONS[observed]})
+        else:
+            content = json.dumps({"type": "output", "output": f"Answer after {len(messages)} messages."})
+        if self.chat_latency_sec:
+            time.sleep(self.chat_latency_sec)
+        self._send(200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    def _send(self, status: int, payload):
+        raw = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int, latency_ms: float = 0.0, chat_latency_ms: float = 0.0):
+    EmbeddingsHandler.latency_sec = latency_ms / 1000.0
+    EmbeddingsHandler.chat_latency_sec = chat_latency_ms / 1000.0
+    server = ThreadingHTTPServer(("127.0.0.1", port), EmbeddingsHandler)
+    server.daemon_threads = True
+    print(f"fake embeddings listening on http://127.0.0.1:{server.server_address[1]}/v1", file=sys.stderr, flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated per-request latency")
+    parser.add_argument("--chat-latency-ms", type=float, default=0.0, help="simulated chat completion latency")
+    args = parser.parse_args()
+    serve(args.port, args.latency_ms, args.chat_latency_ms)
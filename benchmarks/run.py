@@ -0,0 +1,461 @@
+"""
+Offline ingestion + retrieval benchmark.
+
+    pip install -r benchmarks/requirements.txt   # the app's requirements plus moto
+    python -m benchmarks.run --docs 200 --words 3000 --formats txt,pdf,docx --json after.json --baseline before.json
+
+Everything external is replaced by a local stand-in:
+  * OpenAI embeddings -> benchmarks.fake_embeddings (subprocess, OPENAI_BASE_URL),
+                         or the in-process hashing provider with --embedder hashing
+  * Qdrant            -> qdrant-client local mode (QDRANT_URL=":memory:")
+  * S3                -> moto's in-process mock (or --s3-endpoint for LocalStack)
+
+Phases: upload (stage_upload), ingest (save_file_and_process_from_s3, or
+process_files_from_s3 with --group-size > 1), reindex (same files again, nothing
+changed), search (embed + filtered vector search), vector_search (pre-embedded
+query), id_search (issue-key queries such as "DEM-41 status"; hit_rate is the
+share whose document ranks first), memory_add and memory_search
+(MemoryManager, with the KB already loaded). search_repeat and
+memory_search_repeat ask the same questions again (the retrieval cache's case;
+a memory is written to another project first, which must not invalidate P0).
+With --chat-turns, chat runs that many reasoning-engine turns (run_ai_message
+against the scripted chat endpoint: three independent tool calls each)
+--chat-concurrency at a time; its hit_rate is the share of turns answered
+without an error. Reports docs/sec, chunks/sec,
+p50/p99 latency per phase and peak RSS.
+"""
+import io
+import os
+import asyncio
+import sys
+import json
+import time
+import socket
+import logging
+import resource
+import argparse
+import platform
+import importlib.util
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.corpus import generate_corpus, generate_queries, issue_key
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# -----------------------------
+# Measurement helpers
+# -----------------------------
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[k]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if platform.system() == "Darwin" else rss / 1024
+
+
+def summarize(
+    name: str,
+    wall: float,
+    latencies: List[float],
+    docs: int = 0,
+    chunks: int = 0,
+    ops: int = 0,
+    hit_rate: Optional[float] = None,
+) -> Dict[str, Any]:
+    return {
+        "phase": name,
+        "wall_sec": round(wall, 3),
+        "docs_per_sec": round(docs / wall, 2) if docs and wall else None,
+        "chunks_per_sec": round(chunks / wall, 1) if chunks and wall else None,
+        "ops_per_sec": round(ops / wall, 1) if ops and wall else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "hit_rate": round(hit_rate, 3) if hit_rate is not None else None,
+    }
+
+
+def timed_map(fn: Callable, items: List[Any], concurrency: int):
+    """Run fn over items with `concurrency` threads; returns (wall, latencies, results)."""
+    def one(item):
+        t0 = time.perf_counter()
+        result = fn(item)
+        return time.perf_counter() - t0, result
+
+    t0 = time.perf_counter()
+    if concurrency <= 1:
+        out = [one(item) for item in items]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            out = list(pool.map(one, items))
+    return time.perf_counter() - t0, [lat for lat, _ in out], [res for _, res in out]
+
+
+# -----------------------------
+# Local stand-ins
+# -----------------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_embeddings(latency_ms: float, chat_latency_ms: float = 0.0) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_embeddings", "--port", str(port), "--latency-ms", str(latency_ms),
+         "--chat-latency-ms", str(chat_latency_ms)],
+        cwd=REPO_ROOT,
+    )
+    base_url = f"http://127.0.0.1:{port}/v1"
+    deadline = time.monotonic() + 15
+    while True:
+        try:
+            urllib.request.urlopen(f"{base_url}/health", timeout=1).read()
+            return proc, base_url
+        except OSError:
+            if time.monotonic() > deadline or proc.poll() is not None:
+                proc.kill()
+                raise RuntimeError("fake embeddings server did not start")
+            time.sleep(0.1)
+
+
+class InstrumentedClient:
+    """
+    Wraps the shared AsyncQdrantClient: counts calls per method and adds a
+    simulated network round trip (rtt_sec) to each, without blocking the loop.
+    """
+
+    def __init__(self, client, rtt_sec: float = 0.0):
+        self._client = client
+        self._rtt_sec = rtt_sec
+        self.calls: Dict[str, int] = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def instrumented(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if self._rtt_sec:
+                await asyncio.sleep(self._rtt_sec)
+            return await attr(*args, **kwargs)
+
+        return instrumented
+
+
+def configure_environment(args, embeddings_url: Optional[str]):
+    """Must run before any app module is imported: they read configuration at import time."""
+    os.environ.update({
+        "OPENAI_API_KEY": "benchmark",
+        "EMBEDDING_PROVIDER": "hashing" if embeddings_url is None else "openai",
+        "S3_BUCKET": "pmgenie-benchmark",
+        "S3_ACCESS_KEY": "benchmark",
+        "S3_SECRET_KEY": "benchmark",
+        "S3_REGION": "us-east-1",
+        "EXTRACTION_WORKERS": str(args.extraction_workers),
+        "EMBEDDING_CACHE_ENABLED": "true" if args.embedding_cache else "false",
+        "EMBEDDING_CACHE_PATH": os.path.join(args.workdir, "embedding_cache.sqlite3"),
+        "INGESTION_EMBEDDED_WORKER": "false",
+        "QDRANT_URL": ":memory:",
+    })
+    if embeddings_url is not None:
+        os.environ["OPENAI_BASE_URL"] = embeddings_url
+        # The fake server also answers the project list, so the engine's Jira calls stay local.
+        os.environ.update({
+            "JIRA_BASE_URL": embeddings_url.rsplit("/v1", 1)[0],
+            "JIRA_EMAIL": "benchmark",
+            "JIRA_API_TOKEN": "benchmark",
+        })
+    if args.s3_endpoint:
+        os.environ["S3_ENDPOINT_URL"] = args.s3_endpoint
+    else:
+        os.environ.pop("S3_ENDPOINT_URL", None)
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def run(args) -> Dict[str, Any]:
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    os.makedirs(args.workdir, exist_ok=True)
+    embeddings_proc, embeddings_url = None, None
+    if args.embedder == "server":
+        embeddings_proc, embeddings_url = start_fake_embeddings(args.embed_latency_ms, args.chat_latency_ms)
+    configure_environment(args, embeddings_url)
+
+    mock = None
+    if not args.s3_endpoint:
+        from moto import mock_aws
+        mock = mock_aws()
+        mock.start()
+
+    try:
+        from app.services import qdrant_connection, qdrant_service, s3_service, file_service, kb_service
+        from app.services.embedding_service import embed_text
+        from app.utils.extraction_pool import shutdown_pool
+
+        qdrant = InstrumentedClient(qdrant_connection.get_client(), args.qdrant_rtt_ms / 1000.0)
+        qdrant_connection.set_client(qdrant)
+        s3_service.ensure_bucket()
+
+        formats = tuple(f.strip() for f in args.formats.split(",") if f.strip())
+        docs = []
+        sample_paragraphs = []
+        t0 = time.perf_counter()
+        for i, (filename, content, paragraphs) in enumerate(generate_corpus(args.docs, args.words, formats, args.seed)):
+            docs.append({
+                "filename": filename,
+                "content": content,
+                "s3_key": f"kb/benchmark/{filename}",
+                "fileId": i + 1,
+                "projectId": f"P{i % args.projects}",
+            })
+            sample_paragraphs.append(paragraphs[:3])
+        corpus_bytes = sum(len(d["content"]) for d in docs)
+        print(f"corpus: {len(docs)} docs, {corpus_bytes / 1e6:.1f} MB, generated in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+        results = []
+
+        # -- upload -------------------------------------------------------
+        wall, lat, _ = timed_map(
+            lambda d: file_service.stage_upload(d["s3_key"], io.BytesIO(d["content"])), docs, args.concurrency
+        )
+        results.append(summarize("upload", wall, lat, docs=len(docs)))
+        if args.no_handoff:
+            # Force ingestion to fetch every document from S3.
+            file_service._handoff.clear()
+            file_service._handoff_bytes = 0
+        for d in docs:
+            d.pop("content")
+
+        # -- ingest / reindex -----------------------------------------------
+        def ingest_one(d):
+            return file_service.save_file_and_process_from_s3(
+                d["s3_key"], d["filename"], d["projectId"], None, d["fileId"], True
+            )
+
+        def ingest_group(group):
+            counts = file_service.process_files_from_s3([
+                {
+                    "s3_key": d["s3_key"],
+                    "filename": d["filename"],
+                    "projectId": d["projectId"],
+                    "chatSessionId": None,
+                    "fileId": d["fileId"],
+                    "is_kb": True,
+                }
+                for d in group
+            ])
+            for c in counts:
+                if isinstance(c, Exception):
+                    raise c
+            return sum(counts)
+
+        for phase in ("ingest", "reindex"):
+            if args.group_size > 1:
+                groups = [docs[i:i + args.group_size] for i in range(0, len(docs), args.group_size)]
+                wall, lat, counts = timed_map(ingest_group, groups, args.concurrency)
+            else:
+                wall, lat, counts = timed_map(ingest_one, docs, args.concurrency)
+            results.append(summarize(phase, wall, lat, docs=len(docs), chunks=sum(counts)))
+            if phase == "ingest":
+                total_chunks = sum(counts)
+
+        # -- search ---------------------------------------------------------
+        queries = generate_queries(sample_paragraphs, args.queries, seed=args.seed + 1)
+
+        def search_one(q):
+            return kb_service.search_chunks(q, project_id="P0", limit=args.top_k)
+
+        wall, lat, _ = timed_map(search_one, queries, args.search_concurrency)
+        results.append(summarize("search", wall, lat, ops=len(queries)))
+
+        wall, lat, _ = timed_map(search_one, queries, args.search_concurrency)
+        results.append(summarize("search_repeat", wall, lat, ops=len(queries)))
+
+        vectors = [embed_text(q) for q in queries]
+
+        def vector_search_one(v):
+            return qdrant_service.search(v, limit=args.top_k, filters={"type": "file_chunk", "projectId": "P0"})
+
+        wall, lat, _ = timed_map(vector_search_one, vectors, args.search_concurrency)
+        results.append(summarize("vector_search", wall, lat, ops=len(vectors)))
+
+        id_docs = [docs[i % len(docs)] for i in range(0, args.queries * 7, 7)]
+
+        def id_search_one(d):
+            hits = kb_service.search_chunks(f"{issue_key(d['fileId'] - 1)} status", project_id=d["projectId"], limit=args.top_k)
+            return bool(hits) and hits[0]["fileId"] == d["fileId"]
+
+        wall, lat, found = timed_map(id_search_one, id_docs, args.search_concurrency)
+        results.append(summarize("id_search", wall, lat, ops=len(id_docs), hit_rate=sum(found) / len(found)))
+
+        # -- memory ---------------------------------------------------------
+        from ai_reasoning_engine.memory_manager import MemoryManager
+        memory = MemoryManager()
+        turns = generate_queries(sample_paragraphs, args.memories, seed=args.seed + 2)
+
+        def memory_add_one(i):
+            return memory.add_memory(turns[i], f"answer {i}", project_name=f"P{i % args.projects}", session_id=f"S{i % 8}")
+
+        wall, lat, _ = timed_map(memory_add_one, list(range(len(turns))), args.search_concurrency)
+        results.append(summarize("memory_add", wall, lat, ops=len(turns)))
+
+        def memory_search_one(q):
+            return memory.query_memory(q, top_k=3, project_name="P0")
+
+        wall, lat, _ = timed_map(memory_search_one, queries, args.search_concurrency)
+        results.append(summarize("memory_search", wall, lat, ops=len(queries)))
+
+        memory.add_memory("unrelated question", "unrelated answer", project_name="P1", session_id="S0")
+        wall, lat, _ = timed_map(memory_search_one, queries, args.search_concurrency)
+        results.append(summarize("memory_search_repeat", wall, lat, ops=len(queries)))
+
+        # -- chat -----------------------------------------------------------
+        if embeddings_proc is not None and args.chat_turns:
+            from app.services.ai_service import run_ai_message
+
+            async def chat_all():
+                gate = asyncio.Semaphore(args.chat_concurrency)
+
+                async def one(i, q):
+                    async with gate:
+                        t0 = time.perf_counter()
+                        # One chat session per concurrent user: turns of a session run one at a time.
+                        answer = await run_ai_message(f"{q} for project P0", chat_session_id=f"chat-{i % args.chat_concurrency}")
+                        return time.perf_counter() - t0, not answer.startswith(("Error:", "I reached"))
+
+                t0 = time.perf_counter()
+                out = await asyncio.gather(*(one(i, q) for i, q in enumerate(queries[:args.chat_turns])))
+                return time.perf_counter() - t0, [lat for lat, _ in out], [ok for _, ok in out]
+
+            wall, lat, answered = asyncio.run(chat_all())
+            results.append(summarize("chat", wall, lat, ops=len(lat), hit_rate=sum(answered) / len(answered)))
+
+        return {
+            "params": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+            "corpus": {"docs": len(docs), "bytes": corpus_bytes, "chunks": total_chunks},
+            "git_rev": _git_rev(),
+            "qdrant_calls": dict(sorted(qdrant.calls.items())),
+            "results": results,
+        }
+    finally:
+        if "shutdown_pool" in locals():
+            shutdown_pool()
+            qdrant_connection.close()
+        if mock is not None:
+            mock.stop()
+        if embeddings_proc is not None:
+            embeddings_proc.terminate()
+            embeddings_proc.wait(timeout=5)
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# -----------------------------
+# Reporting
+# -----------------------------
+COLUMNS = ("phase", "wall_sec", "docs_per_sec", "chunks_per_sec", "ops_per_sec", "p50_ms", "p99_ms", "peak_rss_mb", "hit_rate")
+
+
+def _fmt(v) -> str:
+    return "-" if v is None else str(v)
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    corpus = report["corpus"]
+    print(f"\n{corpus['docs']} docs, {corpus['bytes'] / 1e6:.1f} MB, {corpus['chunks']} chunks @ {report['git_rev']}")
+    rows = [list(COLUMNS)] + [[_fmt(r[c]) for c in COLUMNS] for r in report["results"]]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(COLUMNS))]
+    for row in rows:
+        print("  ".join(cell.rjust(w) for cell, w in zip(row, widths)))
+    if report.get("qdrant_calls"):
+        print("qdrant calls: " + ", ".join(f"{k}={v}" for k, v in report["qdrant_calls"].items()))
+
+    if baseline:
+        before = {r["phase"]: r for r in baseline["results"]}
+        print(f"\nvs baseline @ {baseline.get('git_rev')}:")
+        changed = {
+            k: (baseline["params"].get(k), v)
+            for k, v in report["params"].items()
+            if k != "workdir" and baseline["params"].get(k) != v
+        }
+        if changed:
+            print("  warning: parameters differ: " + ", ".join(f"{k} {a} -> {b}" for k, (a, b) in changed.items()))
+        for r in report["results"]:
+            b = before.get(r["phase"])
+            if not b:
+                continue
+            deltas = []
+            for col in COLUMNS[1:]:
+                if r[col] is not None and b.get(col):
+                    deltas.append(f"{col} {b[col]} -> {r[col]} ({(r[col] - b[col]) / b[col] * 100:+.1f}%)")
+            print(f"  {r['phase']}: " + "; ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--words", type=int, default=2000, help="words per document")
+    parser.add_argument("--formats", default="txt", help="comma-separated: txt,pdf,docx")
+    parser.add_argument("--projects", type=int, default=4, help="documents are spread over this many projectIds")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--memories", type=int, default=200, help="chat memories stored before memory_search")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel ingestion jobs (like INGESTION_CONCURRENCY)")
+    parser.add_argument("--group-size", type=int, default=1, help=">1 indexes documents in shared-embedding groups")
+    parser.add_argument("--search-concurrency", type=int, default=1)
+    parser.add_argument("--extraction-workers", type=int, default=2)
+    parser.add_argument("--embedder", choices=("server", "hashing"), default="server",
+                        help="server: fake OpenAI endpoint over HTTP; hashing: EMBEDDING_PROVIDER=hashing in-process")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="simulated embeddings API latency (server)")
+    parser.add_argument("--chat-turns", type=int, default=0, help="engine turns in the chat phase (server embedder only)")
+    parser.add_argument("--chat-concurrency", type=int, default=32, help="turns in flight, like concurrent chat users")
+    parser.add_argument("--chat-latency-ms", type=float, default=300.0, help="simulated chat completion latency")
+    parser.add_argument("--qdrant-rtt-ms", type=float, default=0.0, help="simulated Qdrant round trip per call")
+    parser.add_argument("--embedding-cache", action="store_true", help="enable the SQLite embedding cache")
+    parser.add_argument("--no-handoff", action="store_true", help="ingest from S3 instead of the in-process upload handoff")
+    parser.add_argument("--s3-endpoint", help="use a LocalStack endpoint instead of moto's in-process mock")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=os.path.join(REPO_ROOT, ".benchmarks"))
+    parser.add_argument("--json", help="write the report here")
+    parser.add_argument("--baseline", help="a previous --json report to compare against")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    if not args.s3_endpoint and importlib.util.find_spec("moto") is None:
+        parser.error("the S3 mock needs moto: pip install -r benchmarks/requirements.txt (or pass --s3-endpoint)")
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    report = run(args)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 import os
+import asyncio
+import weakref
+import httpx
 import requests
 from requests.auth import HTTPBasicAuth
 from dotenv import load_dotenv
@@ -34,6 +37,42 @@ def get_projects():
         return []
 
 
+ISSUE_FIELDS = "key,summary,status,priority,assignee,reporter,duedate,created,updated,issuetype,parent,labels,subtasks,issuelinks,project"
+
+
+def _compact_issue(issue):
+    fields = issue.get("fields", {})
+
+    subtasks = [sub.get("key") for sub in fields.get("subtasks", [])]
+    # Only "is blocked by": a Blocks link whose other end is the inward issue. The
+    # outward side ("blocks") and other link types (relates, duplicates) are not blockers.
+    blockers = [
+        link["inwardIssue"]["key"]
+        for link in fields.get("issuelinks", [])
+        if (link.get("type") or {}).get("name") == "Blocks" and "inwardIssue" in link
+    ]
+
+    return {
+        "key": issue.get("key"),
+        "summary": fields.get("summary"),
+        "status": fields.get("status", {}).get("name"),
+        # Jira's workflow-independent bucket: "new", "indeterminate" or "done".
+        "status_category": (fields.get("status", {}).get("statusCategory") or {}).get("key"),
+        "priority": fields.get("priority", {}).get("name"),
+        "assignee": fields.get("assignee", {}).get("displayName") if fields.get("assignee") else "Unassigned",
+        "reporter": fields.get("reporter", {}).get("displayName") if fields.get("reporter") else None,
+        "duedate": fields.get("duedate"),
+        "created": fields.get("created"),
+        "updated": fields.get("updated"),
+        "subtasks": subtasks,
+        "parent": fields.get("parent", {}).get("key") if fields.get("parent") else None,
+        "blockers": blockers,
+        "labels": fields.get("labels", []),
+        "issue_type": fields.get("issuetype", {}).get("name"),
+        "project": fields.get("project", {}).get("name")
+    }
+
+
 def get_issues(project_key, max_results_per_page=100):
     """
     Fetch all issues for a project with pagination support.
@@ -48,7 +87,7 @@ def get_issues(project_key, max_results_per_page=100):
             "jql": f"project={project_key}",
             "maxResults": max_results_per_page,
             "startAt": start_at,
-            "fields": "key,summary,status,priority,assignee,reporter,duedate,created,updated,issuetype,parent,labels,subtasks,issuelinks,project"
+            "fields": ISSUE_FIELDS,
         }
 
         try:
@@ -63,34 +102,7 @@ def get_issues(project_key, max_results_per_page=100):
             if not issues:
                 break  # No more issues
 
-            for issue in issues:
-                fields = issue.get("fields", {})
-
-                subtasks = [sub.get("key") for sub in fields.get("subtasks", [])]
-                blockers = []
-                for link in fields.get("issuelinks", []):
-                    if "inwardIssue" in link:
-                        blockers.append(link["inwardIssue"]["key"])
-                    elif "outwardIssue" in link:
-                        blockers.append(link["outwardIssue"]["key"])
-
-                all_issues.append({
-                    "key": issue.get("key"),
-                    "summary": fields.get("summary"),
-                    "status": fields.get("status", {}).get("name"),
-                    "priority": fields.get("priority", {}).get("name"),
-                    "assignee": fields.get("assignee", {}).get("displayName") if fields.get("assignee") else "Unassigned",
-                    "reporter": fields.get("reporter", {}).get("displayName") if fields.get("reporter") else None,
-                    "duedate": fields.get("duedate"),
-                    "created": fields.get("created"),
-                    "updated": fields.get("updated"),
-                    "subtasks": subtasks,
-                    "parent": fields.get("parent", {}).get("key") if fields.get("parent") else None,
-                    "blockers": blockers,
-                    "labels": fields.get("labels", []),
-                    "issue_type": fields.get("issuetype", {}).get("name"),
-                    "project": fields.get("project", {}).get("name")
-                })
+            all_issues.extend(_compact_issue(issue) for issue in issues)
 
             # Move to next page
             start_at += max_results_per_page
@@ -104,3 +116,60 @@ def get_issues(project_key, max_results_per_page=100):
             break
 
     return all_issues
+
+
+# -----------------------
+# Async variants for the reasoning engine (httpx; no thread per request)
+# -----------------------
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _async_client() -> httpx.AsyncClient:
+    # One pooled client per event loop: httpx connections cannot move between loops.
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(headers=HEADERS, auth=(JIRA_EMAIL, JIRA_API_TOKEN), timeout=15)
+        _async_clients[loop] = client
+    return client
+
+
+async def aget_projects():
+    """get_projects without blocking the event loop."""
+    url = f"{JIRA_BASE_URL}/rest/api/3/project"
+    try:
+        response = await _async_client().get(url, timeout=10)
+        if response.status_code == 200:
+            return response.json()
+        print(f"[JIRA] Failed to fetch projects: {response.status_code} - {response.text}")
+        return []
+    except httpx.HTTPError as e:
+        print(f"[JIRA] Exception while fetching projects: {e}")
+        return []
+
+
+async def aget_issues(project_key, max_results_per_page=100):
+    """get_issues without blocking the event loop; pages are fetched in order."""
+    url = f"{JIRA_BASE_URL}/rest/api/3/search"
+    start_at = 0
+    all_issues = []
+    client = _async_client()
+    while True:
+        params = {"jql": f"project={project_key}", "maxResults": max_results_per_page, "startAt": start_at, "fields": ISSUE_FIELDS}
+        try:
+            response = await client.get(url, params=params)
+        except httpx.HTTPError as e:
+            print(f"[JIRA] Exception while fetching issues: {e}")
+            break
+        if response.status_code != 200:
+            print(f"[JIRA] Failed to fetch issues: {response.status_code} - {response.text}")
+            break
+        data = response.json()
+        issues = data.get("issues", [])
+        if not issues:
+            break
+        all_issues.extend(_compact_issue(issue) for issue in issues)
+        start_at += max_results_per_page
+        if start_at >= data.get("total", 0):
+            break
+    return all_issues
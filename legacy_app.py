@@ -3,7 +3,7 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from ai_reasoning_engine.ai_engine import ai_reasoning_engine
+from ai_reasoning_engine.ai_engine import aai_reasoning_engine
 
 app = FastAPI()
 
@@ -21,5 +21,5 @@ class QueryInput(BaseModel):
 
 @app.post("/chat")
 async def chat_endpoint(input: QueryInput):
-    response = ai_reasoning_engine(input.query)
+    response = await aai_reasoning_engine(input.query)
     return {"response": response}
@@ -10,7 +10,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 
 # Import Base and models BEFORE setting target_metadata
 from app.models.base import Base
-from app.models import user, chat, file  # Import all models so metadata is populated
+from app.models import user, chat, file, ingestion_job  # Import all models so metadata is populated
 
 from app.db.session import engine  # This should be the same engine you use in app
 
@@ -0,0 +1,59 @@
+"""add ingestion jobs
+
+Revision ID: 3f9b2c1d7e44
+Revises: ae4e1e57c2b0
+Create Date: 2026-10-18 09:12:40.118522
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9b2c1d7e44'
+down_revision: Union[str, Sequence[str], None] = 'ae4e1e57c2b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ingestion_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.Column('s3_key', sa.String(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('project_id', sa.String(), nullable=True),
+    sa.Column('chat_session_id', sa.String(), nullable=True),
+    sa.Column('is_kb', sa.Boolean(), nullable=False),
+    sa.Column('tenant', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('locked_by', sa.String(length=128), nullable=True),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('chunks_done', sa.Integer(), nullable=False),
+    sa.Column('chunks_total', sa.Integer(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingestion_jobs_id'), 'ingestion_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_ingestion_jobs_file_id'), 'ingestion_jobs', ['file_id'], unique=False)
+    op.create_index('ix_ingestion_jobs_status_run_after', 'ingestion_jobs', ['status', 'run_after'], unique=False)
+    op.create_index('ix_ingestion_jobs_tenant_status', 'ingestion_jobs', ['tenant', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ingestion_jobs_tenant_status', table_name='ingestion_jobs')
+    op.drop_index('ix_ingestion_jobs_status_run_after', table_name='ingestion_jobs')
+    op.drop_index(op.f('ix_ingestion_jobs_file_id'), table_name='ingestion_jobs')
+    op.drop_index(op.f('ix_ingestion_jobs_id'), table_name='ingestion_jobs')
+    op.drop_table('ingestion_jobs')
@@ -0,0 +1,30 @@
+"""add ingestion job batch id
+
+Revision ID: 8d4e6f2a9c13
+Revises: 3f9b2c1d7e44
+Create Date: 2026-10-18 14:03:27.540193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4e6f2a9c13'
+down_revision: Union[str, Sequence[str], None] = '3f9b2c1d7e44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingestion_jobs', sa.Column('batch_id', sa.String(length=36), nullable=True))
+    op.create_index(op.f('ix_ingestion_jobs_batch_id'), 'ingestion_jobs', ['batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_ingestion_jobs_batch_id'), table_name='ingestion_jobs')
+    op.drop_column('ingestion_jobs', 'batch_id')
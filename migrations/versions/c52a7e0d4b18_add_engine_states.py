@@ -0,0 +1,37 @@
+"""add engine states
+
+Revision ID: c52a7e0d4b18
+Revises: 8d4e6f2a9c13
+Create Date: 2026-10-18 16:21:08.304917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52a7e0d4b18'
+down_revision: Union[str, Sequence[str], None] = '8d4e6f2a9c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('engine_states',
+    sa.Column('chat_session_id', sa.String(length=36), nullable=False),
+    sa.Column('project_name', sa.String(length=255), nullable=True),
+    sa.Column('project_key', sa.String(length=32), nullable=True),
+    sa.Column('pending_query', sa.Text(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('chat_session_id')
+    )
+    op.create_index(op.f('ix_engine_states_updated_at'), 'engine_states', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_engine_states_updated_at'), table_name='engine_states')
+    op.drop_table('engine_states')
@@ -0,0 +1,21 @@
+"""
+Unit tests run offline: every external service is replaced by a local stand-in
+before any app module reads its configuration at import time.
+"""
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="pmgenie-tests-")
+os.environ.setdefault("QDRANT_URL", ":memory:")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/app.db")
+os.environ.setdefault("INGESTION_DATABASE_URL", f"sqlite:///{_tmp}/queue.db")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("EMBEDDING_PROVIDER", "hashing")
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+# jira_fetcher refuses to import without credentials; tests never reach this host.
+os.environ.setdefault("JIRA_BASE_URL", "https://jira.invalid")
+os.environ.setdefault("JIRA_EMAIL", "tests@example.com")
+os.environ.setdefault("JIRA_API_TOKEN", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ai_reasoning_engine import ai_engine
+
+
+async def _slow(tool_input):
+    await asyncio.sleep(0.2)
+    return f"slow:{tool_input}"
+
+
+async def _hang(tool_input):
+    await asyncio.sleep(10)
+
+
+def _sync(tool_input):
+    return f"sync:{tool_input}:{threading.current_thread().name}"
+
+
+def _fail():
+    raise RuntimeError("jira down")
+
+
+@pytest.fixture(autouse=True)
+def tools(monkeypatch):
+    monkeypatch.setattr(ai_engine, "TOOLS", {
+        "slow": {"func": None, "afunc": _slow, "needs_input": True},
+        "hang": {"func": None, "afunc": _hang, "needs_input": True, "timeout": 0.1},
+        "sync": {"func": _sync, "needs_input": True},
+        "fail": {"func": _fail, "needs_input": False},
+    })
+
+
+def _run(call):
+    return asyncio.run(ai_engine._run_actions(call))
+
+
+def test_actions_run_concurrently_and_keep_their_order():
+    started = time.perf_counter()
+    result = _run({"actions": [{"function": "slow", "input": i} for i in range(4)]})
+    assert time.perf_counter() - started < 0.5
+    assert [o["observation"] for o in result["observations"]] == [f"slow:{i}" for i in range(4)]
+    assert [o["input"] for o in result["observations"]] == [0, 1, 2, 3]
+
+
+def test_single_action_keeps_the_plain_observation_shape():
+    assert _run({"function": "slow", "input": "DEM"}) == {"type": "observation", "observation": "slow:DEM"}
+    assert _run({"actions": [{"function": "slow", "input": "DEM"}]})["observation"] == "slow:DEM"
+
+
+def test_sync_tools_run_on_the_tool_pool():
+    result = _run({"function": "sync", "input": "x"})
+    assert result["observation"].startswith("sync:x:ai-tool")
+
+
+def test_failures_are_reported_per_action():
+    result = _run({"actions": [
+        {"function": "slow", "input": "ok"},
+        {"function": "hang", "input": "x"},
+        {"function": "fail"},
+        {"function": "nope"},
+    ]})
+    first, hung, failed, unknown = result["observations"]
+    assert first["observation"] == "slow:ok"
+    assert hung["error"] == "timed out after 0.1s"
+    assert failed["error"] == "jira down"
+    assert unknown["error"] == "unknown function 'nope'"
+
+
+def test_a_single_failing_action_is_not_unwrapped():
+    result = _run({"function": "fail"})
+    assert result["observations"] == [{"function": "fail", "input": None, "error": "jira down"}]
+
+
+def test_actions_beyond_the_cap_are_not_run(monkeypatch):
+    monkeypatch.setattr(ai_engine, "AI_MAX_ACTIONS_PER_STEP", 2)
+    result = _run({"actions": [{"function": "slow", "input": i} for i in range(3)] + ["fail"]})
+    observations = result["observations"]
+    assert [o.get("observation") for o in observations[:2]] == ["slow:0", "slow:1"]
+    assert all(o["error"] == "not run: at most 2 actions per step" for o in observations[2:])
+    assert observations[3]["function"] == "fail"
+
+
+def test_sync_entry_points_work_inside_a_running_loop(monkeypatch):
+    async def answer(user_query, session_id=None):
+        return f"answer:{user_query}"
+
+    monkeypatch.setattr(ai_engine, "aai_reasoning_engine", answer)
+
+    async def caller():
+        return ai_engine.ai_reasoning_engine("status?")
+
+    assert ai_engine.ai_reasoning_engine("status?") == "answer:status?"
+    assert asyncio.run(caller()) == "answer:status?"
@@ -0,0 +1,75 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from app.utils.archive import is_archive, iter_archive_members, member_basename
+
+FILES = {
+    "docs/readme.txt": b"hello",
+    "docs/spec.md": b"# Spec\n" * 100,
+    "__MACOSX/docs/._spec.md": b"resource fork",
+    "docs/.DS_Store": b"finder",
+    ".hidden/notes.txt": b"hidden",
+}
+EXPECTED = {"docs/readme.txt": b"hello", "docs/spec.md": b"# Spec\n" * 100}
+
+
+def _zip() -> io.BytesIO:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("docs/", b"")
+        for path, data in FILES.items():
+            zf.writestr(path, data)
+    buf.seek(0)
+    return buf
+
+
+def _tar(mode: str) -> io.BytesIO:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode=mode) as tf:
+        directory = tarfile.TarInfo("docs")
+        directory.type = tarfile.DIRTYPE
+        tf.addfile(directory)
+        for path, data in FILES.items():
+            info = tarfile.TarInfo(path)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    buf.seek(0)
+    return buf
+
+
+@pytest.mark.parametrize("filename, archive", [
+    ("bundle.zip", _zip),
+    ("bundle.tar", lambda: _tar("w")),
+    ("bundle.tar.gz", lambda: _tar("w:gz")),
+    ("bundle.tgz", lambda: _tar("w:gz")),
+    ("bundle.tar.bz2", lambda: _tar("w:bz2")),
+])
+def test_yields_regular_files_without_os_noise(filename, archive):
+    # Members are read before the next one is requested, as their fileobj only lives until then.
+    members = {m.path: (m.size, m.fileobj.read()) for m in iter_archive_members(archive(), filename)}
+    assert members == {path: (len(data), data) for path, data in EXPECTED.items()}
+
+
+def test_tar_is_read_as_a_forward_only_stream():
+    class ForwardOnly(io.RawIOBase):
+        def __init__(self, data):
+            self._buf = io.BytesIO(data)
+
+        def readable(self):
+            return True
+
+        def readinto(self, b):
+            return self._buf.readinto(b)
+
+    stream = ForwardOnly(_tar("w:gz").getvalue())
+    assert [m.path for m in iter_archive_members(stream, "upload.tar.gz")] == list(EXPECTED)
+
+
+def test_is_archive_and_member_basename():
+    assert is_archive("Docs.ZIP") and is_archive("a.tar.xz") and is_archive("a.tgz")
+    assert not is_archive("report.pdf") and not is_archive("") and not is_archive(None)
+    assert member_basename("docs/sub/spec.md") == "spec.md"
+    assert member_basename("docs\\spec.md") == "spec.md"
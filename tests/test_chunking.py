@@ -0,0 +1,70 @@
+import random
+import re
+import string
+
+import pytest
+
+from app.utils.text_extraction import _find_cut, iter_chunks
+
+
+def _text(words: int, seed: int = 0) -> str:
+    # A varied vocabulary, like real prose: content-defined cuts need words that hash to a cut.
+    rng = random.Random(seed)
+    vocab = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9))) for _ in range(500)]
+    return " ".join(rng.choice(vocab) + ("\n\n" if rng.random() < 0.05 else "") for _ in range(words))
+
+
+def _normalized(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def test_chunks_are_bounded_and_offsets_point_into_the_normalized_text():
+    text = _text(3000)
+    normalized = _normalized(text)
+    chunks = list(iter_chunks([text], max_chars=500, overlap=50))
+    assert len(chunks) > 10
+    for offset, chunk in chunks:
+        assert 0 < len(chunk) <= 500
+        assert normalized[offset:offset + len(chunk)] == chunk
+    # Every character is covered and consecutive chunks overlap.
+    assert chunks[0][0] == 0
+    assert chunks[-1][0] + len(chunks[-1][1]) == len(normalized)
+    for (prev_offset, prev), (offset, _) in zip(chunks, chunks[1:]):
+        assert offset < prev_offset + len(prev)
+
+
+def test_segmentation_does_not_change_chunks():
+    words = _text(2000).split(" ")
+    whole = list(iter_chunks([" ".join(words)], max_chars=400, overlap=40))
+    pages = [" ".join(words[i:i + 137]) for i in range(0, len(words), 137)]
+    assert list(iter_chunks(pages, max_chars=400, overlap=40)) == whole
+
+
+def test_an_edit_only_changes_nearby_chunks():
+    words = _text(4000, seed=1).split(" ")
+    edited = words[:2000] + ["inserted", "words", "here"] + words[2000:]
+    before = [c for _, c in iter_chunks([" ".join(words)], max_chars=500, overlap=50)]
+    after = [c for _, c in iter_chunks([" ".join(edited)], max_chars=500, overlap=50)]
+    changed = len(set(after) - set(before))
+    assert changed <= 3
+    assert before[:5] == after[:5] and before[-5:] == after[-5:]
+
+
+def test_overlap_must_be_smaller_than_max_chars():
+    with pytest.raises(ValueError):
+        list(iter_chunks(["text"], max_chars=100, overlap=100))
+
+
+def test_empty_and_blank_segments_yield_nothing():
+    assert list(iter_chunks(["", "   ", "\n"])) == []
+
+
+def test_find_cut_stays_in_window_on_a_word_end():
+    buf = _normalized(_text(500))
+    cut = _find_cut(buf, 100, 200, 400)
+    assert 300 <= cut <= 500
+    assert buf[cut] == " "
+
+
+def test_find_cut_without_spaces_cuts_at_max_body():
+    assert _find_cut("x" * 1000, 0, 100, 300) == 300
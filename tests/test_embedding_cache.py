@@ -0,0 +1,44 @@
+import pytest
+
+from app.services.embedding_cache import EmbeddingCache, cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(path=str(tmp_path / "cache.sqlite3"), max_entries=10)
+
+
+def test_round_trip_as_float32(cache):
+    cache.put_many("m", None, ["a", "b"], [[0.5, 0.25], [1.0, -2.0]])
+    assert cache.get_many("m", None, ["b", "missing", "a"]) == {0: [1.0, -2.0], 2: [0.5, 0.25]}
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_key_normalizes_whitespace_but_not_model_or_dimensions():
+    assert cache_key("m", None, "hello   world\n") == cache_key("m", None, " hello world")
+    assert cache_key("m", None, "text") != cache_key("m", 256, "text")
+    assert cache_key("m", None, "text") != cache_key("other", None, "text")
+
+
+def test_duplicate_texts_in_one_lookup(cache):
+    cache.put_many("m", None, ["a"], [[1.0]])
+    assert cache.get_many("m", None, ["a", "a"]) == {0: [1.0], 1: [1.0]}
+
+
+def test_evicts_least_recently_used(cache):
+    for i in range(10):
+        cache.put_many("m", None, [f"t{i}"], [[float(i)]])
+    cache.get_many("m", None, ["t0"])  # t0 becomes the most recently used
+    cache.put_many("m", None, ["t10"], [[10.0]])
+    # Over capacity: trimmed to 90%, oldest first (t1 and t2).
+    assert cache.stats()["entries"] == 9
+    kept = cache.get_many("m", None, ["t0", "t1", "t2", "t3", "t10"])
+    assert sorted(kept) == [0, 3, 4]
+
+
+def test_entries_survive_reopen(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    EmbeddingCache(path=path).put_many("m", 8, ["a"], [[0.125]])
+    reopened = EmbeddingCache(path=path)
+    assert reopened.stats()["entries"] == 1
+    assert reopened.get_many("m", 8, ["a"]) == {0: [0.125]}
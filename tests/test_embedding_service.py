@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services import embedding_service
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_service import approx_tokens, iter_batches
+
+
+def test_batches_keep_order_and_items():
+    items = [f"text {i}" for i in range(10)]
+    batches = list(iter_batches(items, max_items=3, max_tokens=10_000))
+    assert [len(b) for b in batches] == [3, 3, 3, 1]
+    assert [i for b in batches for i in b] == items
+
+
+def test_batches_respect_token_cap():
+    items = ["x" * 400] * 6  # 101 tokens each
+    batches = list(iter_batches(items, max_items=100, max_tokens=250))
+    assert [len(b) for b in batches] == [2, 2, 2]
+    for batch in batches:
+        assert sum(approx_tokens(t) for t in batch) <= 250
+
+
+def test_oversized_item_gets_its_own_batch():
+    items = ["short", "y" * 4000, "short"]
+    batches = list(iter_batches(items, max_items=100, max_tokens=100))
+    assert batches == [["short"], ["y" * 4000], ["short"]]
+
+
+def test_text_of_extracts_the_text():
+    items = [{"id": i, "text": "z" * 396} for i in range(4)]  # 100 tokens each
+    batches = list(iter_batches(items, text_of=lambda item: item["text"], max_items=100, max_tokens=200))
+    assert [[item["id"] for item in b] for b in batches] == [[0, 1], [2, 3]]
+
+
+def test_empty_input_yields_nothing():
+    assert list(iter_batches([])) == []
+
+
+def test_async_cache_io_does_not_block_the_event_loop(tmp_path, monkeypatch):
+    cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(embedding_service, "get_cache", lambda: cache)
+    ticks = []
+
+    async def ticker(stop):
+        while not stop.is_set():
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        stop = asyncio.Event()
+        ticking = asyncio.create_task(ticker(stop))
+        # An ingestion thread holding the cache lock for 0.3s (e.g. during an eviction sweep).
+        held = threading.Event()
+
+        def ingest():
+            with cache._lock:
+                held.set()
+                time.sleep(0.3)
+
+        writer = threading.Thread(target=ingest)
+        writer.start()
+        held.wait()
+        vector = await embedding_service.aembed_text("query")
+        writer.join()
+        stop.set()
+        await ticking
+        return vector
+
+    vector = asyncio.run(main())
+    assert len(ticks) >= 10
+    assert cache.get_many(embedding_service.provider.name, None, ["query"]) == {0: pytest.approx(vector)}
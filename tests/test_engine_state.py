@@ -0,0 +1,39 @@
+import asyncio
+import uuid
+
+from app.db.session import init_db
+from app.services.engine_state import EngineStateStore, empty_state
+
+
+async def _turn(store, session_id, project):
+    async with store.aturn(session_id) as state:
+        state["project_name"] = project
+
+
+def test_evicted_session_starts_from_empty_state():
+    store = EngineStateStore(max_sessions=2, persistent=False)
+
+    async def scenario():
+        await _turn(store, "a", "Apollo")
+        await _turn(store, "b", "Borealis")
+        assert (await store.aload("a"))["project_name"] == "Apollo"  # a is now most recent
+        await _turn(store, "c", "Cosmos")  # evicts b, the least recently used
+        assert store.stats()["sessions_cached"] == 2
+        assert [(await store.aload(s))["project_name"] for s in ("a", "c")] == ["Apollo", "Cosmos"]
+        return await store.aload("b")
+
+    assert asyncio.run(scenario()) == empty_state()
+
+
+def test_database_backend_reloads_evicted_sessions():
+    init_db()
+    store = EngineStateStore(max_sessions=1, persistent=True)
+    first, second = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def scenario():
+        await _turn(store, first, "Apollo")
+        await _turn(store, second, "Borealis")  # evicts first from the cache only
+        return await store.aload(first)
+
+    assert asyncio.run(scenario())["project_name"] == "Apollo"
+    assert store.forget([first, second]) == 2
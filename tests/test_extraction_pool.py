@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from app.utils import extraction_pool
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A one-worker pool with a 1s task limit, warmed up so spawning doesn't skew timings."""
+    monkeypatch.setattr(extraction_pool, "EXTRACTION_WORKERS", 1)
+    monkeypatch.setattr(extraction_pool, "EXTRACTION_TIMEOUT_SEC", 1.0)
+    extraction_pool.shutdown_pool()
+    pool = extraction_pool.get_pool()
+    assert extraction_pool._result(pool, extraction_pool._submit(pool, abs, -1)) == 1
+    yield pool
+    extraction_pool.shutdown_pool()
+
+
+def test_hung_task_times_out_and_the_pool_recovers(pool):
+    started = time.monotonic()
+    with pytest.raises(extraction_pool.ExtractionTimeout):
+        extraction_pool._result(pool, extraction_pool._submit(pool, time.sleep, 30))
+    assert time.monotonic() - started < 5
+
+    fresh = extraction_pool.get_pool()
+    assert fresh is not pool
+    assert extraction_pool._result(fresh, extraction_pool._submit(fresh, abs, -2)) == 2
+
+
+def test_time_queued_behind_other_tasks_does_not_count(pool):
+    # Each task runs 0.6s, under the 1s limit; the last one waits 1.2s for the single worker.
+    tasks = [extraction_pool._submit(pool, time.sleep, 0.6) for _ in range(3)]
+    started = time.monotonic()
+    assert [extraction_pool._result(pool, t) for t in tasks] == [None, None, None]
+    assert time.monotonic() - started >= 1.6
+    assert extraction_pool.get_pool() is pool
+
+
+def test_slow_consumer_does_not_count(pool):
+    task = extraction_pool._submit(pool, abs, -3)
+    time.sleep(1.5)  # e.g. embedding the previous pages
+    assert extraction_pool._result(pool, task) == 3
+    assert extraction_pool.get_pool() is pool
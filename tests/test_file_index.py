@@ -0,0 +1,89 @@
+import random
+import string
+from contextlib import contextmanager
+
+import pytest
+
+from app.services import embedding_service, file_service, qdrant_service
+
+
+def _document(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    vocab = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9))) for _ in range(500)]
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+
+@pytest.fixture
+def documents(monkeypatch):
+    """s3_key -> text; open_document serves these instead of S3."""
+    store = {}
+
+    @contextmanager
+    def open_document(s3_key):
+        yield store[s3_key].encode("utf-8")
+
+    monkeypatch.setattr(file_service, "open_document", open_document)
+    return store
+
+
+@pytest.fixture
+def embedded(monkeypatch):
+    """Texts sent for embedding, in order."""
+    texts = []
+    embed_texts = embedding_service.embed_texts
+
+    def counting(batch, dimensions=None):
+        texts.extend(batch)
+        return embed_texts(batch, dimensions)
+
+    monkeypatch.setattr(embedding_service, "embed_texts", counting)
+    return texts
+
+
+def _stored(file_id):
+    return qdrant_service.scroll_points({"fileId": file_id}, payload_fields=["text", "offset", "end"])
+
+
+def _index(file_id, key="doc.txt"):
+    return file_service.save_file_and_process_from_s3(key, "doc.txt", "P1", "S1", file_id)
+
+
+def test_chunk_point_id_is_deterministic_and_scoped_to_the_file():
+    h = file_service.chunk_hash("some chunk text")
+    assert file_service.chunk_point_id(1, h) == file_service.chunk_point_id(1, h)
+    assert file_service.chunk_point_id(1, h) != file_service.chunk_point_id(2, h)
+    assert file_service.chunk_point_id(1, h) != file_service.chunk_point_id(1, file_service.chunk_hash("other"))
+
+
+def test_reindexing_an_unchanged_file_embeds_nothing(documents, embedded):
+    documents["doc.txt"] = _document(3000)
+    chunks = _index(101)
+    stored = _stored(101)
+    assert chunks == len(stored) == len(embedded) > 5
+
+    embedded.clear()
+    assert _index(101) == chunks
+    assert embedded == []
+    assert _stored(101) == stored
+
+
+def test_an_edit_reembeds_only_changed_chunks_and_drops_stale_ones(documents, embedded):
+    words = _document(6000, seed=2).split(" ")
+    documents["doc.txt"] = " ".join(words)
+    _index(102)
+    before = _stored(102)
+
+    embedded.clear()
+    documents["doc.txt"] = " ".join(words[:3000] + ["freshly", "inserted", "sentence"] + words[3000:])
+    chunks = _index(102)
+    after = _stored(102)
+
+    assert 0 < len(embedded) <= 3
+    assert len(after) == chunks
+    assert any("freshly inserted sentence" in p["text"] for p in after.values())
+    # Chunks that vanished from the file are deleted; the rest keep their ids.
+    assert len(set(before) - set(after)) == len(set(after) - set(before)) == len(embedded)
+    # Unchanged chunks after the edit were moved, not re-embedded: their offsets follow the text.
+    normalized = documents["doc.txt"]
+    for p in after.values():
+        assert normalized[p["offset"]:p["end"]] == p["text"]
@@ -0,0 +1,50 @@
+from qdrant_client.http import models as qmodels
+
+from app.services.qdrant_service import rrf_fuse
+from app.utils import bm25
+
+
+def _score(query: str, document: str) -> float:
+    q, d = dict(zip(*bm25.query_vector(query))), dict(zip(*bm25.document_vector(document)))
+    return sum(w * d.get(i, 0.0) for i, w in q.items())
+
+
+def test_tokenize_keeps_identifiers_whole_and_drops_stopwords():
+    terms = bm25.tokenize("What is the status of DEM-42 in auth_service.py?")
+    assert "dem-42" in terms and "dem" in terms and "42" in terms
+    assert "auth_service.py" in terms and "auth" in terms
+    assert not {"what", "is", "the", "of", "in"} & set(terms)
+
+
+def test_vectors_are_sorted_and_query_terms_weigh_one():
+    indices, values = bm25.document_vector("deploy deploy rollback")
+    assert indices == sorted(indices) and len(indices) == 2
+    assert bm25.query_vector("deploy rollback")[1] == [1.0, 1.0]
+    assert bm25.query_vector("what is the") == ([], [])
+
+
+def test_term_frequency_saturates_and_long_documents_are_normalized():
+    once, twice, many = (_score("outage", "outage " * n + "report") for n in (1, 2, 20))
+    assert once < twice < many < (bm25.BM25_K1 + 1)
+    assert _score("outage", "outage report") > _score("outage", "outage " + "filler words " * 200)
+
+
+def test_exact_identifier_outranks_a_shared_prefix():
+    query = "DEM-42 status"
+    assert _score(query, "Ticket DEM-42 is blocked on review") > _score(query, "Ticket DEM-421 is blocked on review")
+
+
+def _hits(*ids):
+    return [qmodels.ScoredPoint(id=pid, version=0, score=1.0 / rank) for rank, pid in enumerate(ids, start=1)]
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = rrf_fuse([_hits("a", "b", "c"), _hits("d", "b", "e")], limit=5, k=60)
+    # Second in both lists beats first in one; scores are rank-based, not the input scores.
+    assert [h.id for h in fused] == ["b", "a", "d", "c", "e"]
+    assert fused[0].score == 2 / 62 and fused[1].score == 1 / 61
+
+
+def test_rrf_truncates_to_limit_and_handles_empty_lists():
+    assert [h.id for h in rrf_fuse([_hits("a", "b", "c"), []], limit=2)] == ["a", "b"]
+    assert rrf_fuse([[], []], limit=5) == []
@@ -0,0 +1,134 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.ingestion_job import IngestionJob
+from app.services import ingestion_queue as q
+
+
+@pytest.fixture(autouse=True)
+def queue(monkeypatch):
+    q.init_queue_db()
+    with q.QueueSession() as db:
+        db.query(IngestionJob).delete()
+        db.commit()
+    monkeypatch.setattr(q, "INGESTION_RETRY_BASE_SEC", 10.0)
+
+
+def _enqueue(n=1, tenant=None):
+    return [q.enqueue(f"key-{i}", f"file-{i}.txt", "P1", "S1", i, tenant=tenant) for i in range(n)]
+
+
+def _job(job_id) -> IngestionJob:
+    with q.QueueSession() as db:
+        job = db.get(IngestionJob, job_id)
+        db.expunge(job)
+        return job
+
+
+def _update(job_id, **values):
+    with q.QueueSession() as db:
+        db.query(IngestionJob).filter(IngestionJob.id == job_id).update(values)
+        db.commit()
+
+
+def _expire_lease(job_id):
+    _update(job_id, locked_at=datetime.utcnow() - timedelta(seconds=q.INGESTION_LEASE_SEC + 1))
+
+
+def test_concurrent_workers_never_claim_the_same_job():
+    ids = _enqueue(30)
+    claimed, lock = [], threading.Lock()
+
+    def worker(n):
+        while (job := q.claim_next(f"w{n}")) is not None:
+            with lock:
+                claimed.append(job.id)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == ids
+
+
+def test_claim_takes_the_oldest_runnable_job_and_counts_the_attempt():
+    first, second = _enqueue(2)
+    _update(first, run_after=datetime.utcnow() + timedelta(hours=1))
+    job = q.claim_next("w1")
+    assert (job.id, job.status, job.locked_by, job.attempts) == (second, "running", "w1", 1)
+    assert q.claim_next("w1") is None
+
+
+def test_tenant_limit():
+    _enqueue(3, tenant="acme")
+    assert q.claim_next("w1", tenant_limit=2) is not None
+    assert q.claim_next("w1", tenant_limit=2) is not None
+    assert q.claim_next("w1", tenant_limit=2) is None
+    assert q.claim_next("w1", tenant_limit=0) is not None
+
+
+def test_failure_retries_with_backoff_then_fails():
+    (job_id,) = _enqueue()
+    delays = []
+    for attempt in range(1, q.INGESTION_MAX_ATTEMPTS + 1):
+        _update(job_id, run_after=datetime.utcnow())
+        assert q.claim_next("w1").attempts == attempt
+        q.mark_failed(job_id, "w1", "ValueError: bad pdf")
+        job = _job(job_id)
+        if attempt < q.INGESTION_MAX_ATTEMPTS:
+            assert job.status == "queued" and job.locked_by is None
+            delays.append((job.run_after - datetime.utcnow()).total_seconds())
+    assert all(0.8 * 10 * 2 ** n - 1 <= d <= 1.2 * 10 * 2 ** n for n, d in enumerate(delays))
+    job = _job(job_id)
+    assert (job.status, job.last_error) == ("failed", "ValueError: bad pdf")
+    assert job.finished_at is not None
+
+
+def test_requeue_stale_hands_back_expired_leases_and_fails_exhausted_jobs():
+    crashed, exhausted, healthy = _enqueue(3)
+    for _ in range(3):
+        q.claim_next("w1")
+    _expire_lease(crashed)
+    _expire_lease(exhausted)
+    _update(exhausted, attempts=q.INGESTION_MAX_ATTEMPTS)
+
+    assert q.requeue_stale() == 1
+    job = _job(crashed)
+    assert (job.status, job.locked_by, job.attempts) == ("queued", None, 1)
+    assert job.run_after > datetime.utcnow() and "lease expired" in job.last_error
+    assert _job(exhausted).status == "failed"
+    assert _job(healthy).status == "running"
+
+
+def test_a_worker_that_lost_its_lease_cannot_overwrite_the_new_owner():
+    (job_id,) = _enqueue()
+    q.claim_next("slow")
+    _expire_lease(job_id)
+    q.requeue_stale()
+    _update(job_id, run_after=datetime.utcnow())
+    assert q.claim_next("fast").id == job_id
+    q.mark_succeeded(job_id, "fast", 12)
+
+    with pytest.raises(q.LeaseLost):
+        q.record_progress(job_id, "slow", 3)
+    with pytest.raises(q.LeaseLost):
+        q.touch([job_id], "slow")
+    with pytest.raises(q.LeaseLost):
+        q.mark_failed(job_id, "slow", "TimeoutError: too slow")
+    with pytest.raises(q.LeaseLost):
+        q.mark_succeeded(job_id, "slow", 1)
+    job = _job(job_id)
+    assert (job.status, job.chunks_total, job.last_error) == ("succeeded", 12, None)
+
+
+def test_release_returns_claimed_jobs_without_counting_the_attempt():
+    (job_id,) = _enqueue()
+    q.claim_next("w1")
+    q.release_jobs([job_id], "other")  # not ours: untouched
+    assert _job(job_id).status == "running"
+    q.release_jobs([job_id], "w1")
+    job = _job(job_id)
+    assert (job.status, job.attempts, job.locked_by) == ("queued", 0, None)
@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+
+from ai_reasoning_engine import jira_tools
+from ai_reasoning_engine.project_resolver import ProjectResolver
+from jira_client.jira_fetcher import _compact_issue
+
+TODAY = "2025-05-08"
+
+
+def _issue(key, status="To Do", category="new", priority="Medium", assignee="Asha", duedate=None, blockers=()):
+    return {"key": key, "summary": f"Summary of {key}", "status": status, "status_category": category,
+            "priority": priority, "assignee": assignee, "duedate": duedate, "issue_type": "Task",
+            "blockers": list(blockers)}
+
+
+ISSUES = [
+    _issue("DEM-1", duedate="2025-05-01", priority="High"),                        # overdue
+    _issue("DEM-2", "In Progress", "indeterminate", duedate="2025-05-10",
+           blockers=["DEM-1", "DEM-3"]),                                           # due soon, blocked by DEM-1
+    _issue("DEM-3", "Done", "done", duedate="2025-04-01"),                         # done: not overdue
+    _issue("DEM-4", assignee="Unassigned", duedate="2025-07-01", blockers=["OPS-9"]),
+    _issue("DEM-5", "Closed", None, assignee="Ravi", blockers=["DEM-1"]),          # done by status name
+]
+
+
+def test_is_done_prefers_status_category():
+    assert jira_tools.is_done(ISSUES[2]) and jira_tools.is_done(ISSUES[4])
+    assert not jira_tools.is_done(_issue("X-1", status="Done", category="indeterminate"))
+
+
+def test_breakdown():
+    result = jira_tools.breakdown(ISSUES, {})
+    assert result["total"] == 5 and result["open"] == 3
+    assert result["by_status"] == {"To Do": 2, "In Progress": 1, "Done": 1, "Closed": 1}
+    assert result["by_priority"] == {"Medium": 4, "High": 1}
+
+
+def test_due_dates():
+    result = jira_tools.due_dates(ISSUES, {"today": TODAY, "days": 7})
+    assert [i["key"] for i in result["overdue"]["issues"]] == ["DEM-1"]
+    assert [i["key"] for i in result["due_in_7_days"]["issues"]] == ["DEM-2"]
+    assert result["open_without_duedate"] == 0
+
+
+def test_blockers_skip_done_issues_and_done_blockers():
+    result = jira_tools.blockers(ISSUES, {})
+    assert [(i["key"], i["blocked_by"]) for i in result["issues"]] == [("DEM-2", ["DEM-1"]), ("DEM-4", ["OPS-9"])]
+
+
+def test_assignee_load():
+    load = jira_tools.assignee_load(ISSUES, {"today": TODAY})["assignees"]
+    assert list(load) == ["Asha", "Unassigned"]
+    assert load["Asha"] == {"open": 2, "To Do": 1, "In Progress": 1, "high_priority": 1, "overdue": 1}
+
+
+def test_page_selects_fields_and_filters_status():
+    result = jira_tools.page(ISSUES, {"page": 2, "page_size": 2, "fields": "key,status"})
+    assert (result["total"], result["pages"]) == (5, 3)
+    assert result["issues"] == [{"key": "DEM-3", "status": "Done"}, {"key": "DEM-4", "status": "To Do"}]
+    assert jira_tools.page(ISSUES, {"status": "to do"})["total"] == 2
+
+
+def test_listed_issues_are_capped_but_counted():
+    many = [_issue(f"BIG-{n}", duedate="2025-01-01") for n in range(jira_tools.MAX_LISTED + 5)]
+    overdue = jira_tools.due_dates(many, {"today": TODAY})["overdue"]
+    assert overdue["count"] == len(many) and len(overdue["issues"]) == jira_tools.MAX_LISTED
+
+
+def test_compact_issue_keeps_only_is_blocked_by_links():
+    issue = {"key": "DEM-2", "fields": {"issuelinks": [
+        {"type": {"name": "Blocks"}, "inwardIssue": {"key": "DEM-1"}},    # DEM-2 is blocked by DEM-1
+        {"type": {"name": "Blocks"}, "outwardIssue": {"key": "DEM-7"}},   # DEM-2 blocks DEM-7
+        {"type": {"name": "Relates"}, "inwardIssue": {"key": "DEM-8"}},
+    ], "status": {"name": "To Do", "statusCategory": {"key": "new"}}}}
+    compact = _compact_issue(issue)
+    assert compact["blockers"] == ["DEM-1"]
+    assert compact["status_category"] == "new"
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    resolver = ProjectResolver(load_projects=lambda: [{"key": "DEM", "name": "Demo Platform"}], aliases={})
+    monkeypatch.setattr(jira_tools, "get_resolver", lambda: resolver)
+    monkeypatch.setattr(jira_tools, "_issues", {"DEM": (time.monotonic() + 60, ISSUES)})
+    return jira_tools
+
+
+def test_tools_resolve_the_project_and_use_cached_issues(tools):
+    result = tools.get_blockers("Demo Platform")
+    assert result["project"] == "DEM" and result["count"] == 2
+    summary = tools.get_project_summary('{"project": "DEM", "today": "2025-05-08"}')
+    assert summary["breakdown"]["open"] == 3 and summary["due_dates"]["overdue"]["count"] == 1
+    page = asyncio.run(tools.aget_issues_page({"project_name": "demo platform", "page_size": 1}))
+    assert page["project"] == "DEM" and page["pages"] == 5
+
+
+def test_bad_input_comes_back_as_an_error_observation(tools):
+    assert tools.get_issue_breakdown("") == {"error": "a project name or key is required"}
+    assert asyncio.run(tools.aget_due_dates({"project": "DEM", "today": "not a date"}))["error"]
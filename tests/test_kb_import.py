@@ -0,0 +1,61 @@
+import io
+import tarfile
+
+import pytest
+
+moto = pytest.importorskip("moto")
+boto3 = pytest.importorskip("boto3")
+
+from app.db.session import SessionLocal, init_db
+from app.models.file import File
+from app.services import file_service, kb_import, s3_service
+
+SMALL = b"small document\n" * 10
+LARGE = b"large document line\n" * 4000  # ~80 KB, over the in-memory limit below
+
+
+def _tar() -> io.BytesIO:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for path, data in {"docs/small.txt": SMALL, "docs/large.txt": LARGE}.items():
+            info = tarfile.TarInfo(path)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    buf.seek(0)
+    return buf
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="kb-test")
+        monkeypatch.setattr(s3_service, "s3", client)
+        monkeypatch.setattr(s3_service, "S3_BUCKET", "kb-test")
+        monkeypatch.setattr(file_service, "INGEST_IN_MEMORY_MAX_MB", 0.01)
+        monkeypatch.setattr(kb_import, "INGEST_IN_MEMORY_MAX_MB", 0.01)
+        yield client
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def test_tar_member_over_the_in_memory_limit_streams_to_s3(s3, db, monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(kb_import, "enqueue_many", lambda jobs, **kw: enqueued.extend(jobs) or list(range(len(jobs))))
+
+    result = kb_import.import_kb_files(db, [("docs.tar.gz", _tar())], user_id=1)
+
+    assert result["skipped"] == []
+    files = {f["path"]: f for f in result["files"]}
+    assert set(files) == {"docs/small.txt", "docs/large.txt"}
+    for path, data in {"docs/small.txt": SMALL, "docs/large.txt": LARGE}.items():
+        body = s3.get_object(Bucket="kb-test", Key=files[path]["s3_key"])["Body"].read()
+        assert body == data
+        assert db.get(File, files[path]["id"]).is_kb
+    assert len(enqueued) == 2
@@ -0,0 +1,76 @@
+import time
+import uuid
+
+import pytest
+
+from ai_reasoning_engine.memory_manager import MemoryManager
+from app.services import qdrant_service
+from app.services.memory_compaction import acompact_memory
+from app.services.qdrant_connection import run_sync
+
+DAY = 86400
+
+
+@pytest.fixture
+def collection():
+    name = f"memories_{uuid.uuid4().hex[:8]}"
+    qdrant_service.bootstrap_collection(name, 4, qdrant_service.MEMORY_PAYLOAD_INDEXES)
+    yield name
+    qdrant_service.delete_collection(name)
+
+
+def _add(collection, vector, age_days=0.0, tags=None, project="P1", session="S1"):
+    point_id = str(uuid.uuid4())
+    payload = {"type": "memory", "text": f"memory {point_id}", "ts": time.time() - age_days * DAY,
+               "projectId": project, "chatSessionId": session}
+    if tags is not None:
+        payload["tags"] = tags
+    qdrant_service.upsert_points([{"id": point_id, "vector": vector, "payload": payload}], collection=collection)
+    return point_id
+
+
+def _points(collection):
+    return qdrant_service.scroll_points({}, payload_fields=["tags", "merged"], collection=collection)
+
+
+def test_merges_string_and_list_tagged_duplicates(collection):
+    oldest = _add(collection, [1, 0, 0, 0], age_days=2, tags="jira_summary")
+    older = _add(collection, [1, 0, 0, 0.01], age_days=1, tags=["sprint"])
+    newest = _add(collection, [1, 0.01, 0, 0], tags=[])
+    distinct = _add(collection, [0, 1, 0, 0], tags="jira_summary")
+    other_session = _add(collection, [1, 0, 0, 0], session="S2")
+
+    report = run_sync(acompact_memory(collection, ttl_days=0, threshold=0.95))
+
+    assert report["merged"] == 2 and report["points_after"] == 3
+    points = _points(collection)
+    assert set(points) == {newest, distinct, other_session}
+    assert points[newest] == {"tags": ["jira_summary", "sprint"], "merged": 2}
+    assert points[distinct]["tags"] == "jira_summary"  # untouched: nothing merged into it
+    # The merged memory is still found by a tag filter on the string tag.
+    assert set(qdrant_service.scroll_points({"tags": "jira_summary"}, collection=collection)) == {newest, distinct}
+    assert {oldest, older}.isdisjoint(points)
+
+
+def test_expires_memories_older_than_the_ttl(collection):
+    stale = _add(collection, [1, 0, 0, 0], age_days=40)
+    fresh = _add(collection, [0, 1, 0, 0], age_days=5)
+
+    report = run_sync(acompact_memory(collection, ttl_days=30, threshold=0.95))
+
+    assert report["expired"] == 1 and report["points_reclaimed"] == 1
+    assert set(_points(collection)) == {fresh}
+    assert stale not in _points(collection)
+
+
+def test_dry_run_reports_without_deleting(collection):
+    ids = {_add(collection, [1, 0, 0, 0], age_days=n) for n in range(3)}
+    report = run_sync(acompact_memory(collection, ttl_days=1.5, threshold=0.95, dry_run=True))
+    assert (report["expired"], report["merged"], report["dry_run"]) == (1, 1, True)
+    assert set(_points(collection)) == ids
+
+
+def test_memory_point_stores_tags_as_a_list():
+    assert MemoryManager._memory_point("t", [0.0], "P", "S", "jira_summary").payload["tags"] == ["jira_summary"]
+    assert MemoryManager._memory_point("t", [0.0], "P", "S", None).payload["tags"] == []
+    assert MemoryManager._memory_point("t", [0.0], "P", "S", ("a", "b")).payload["tags"] == ["a", "b"]
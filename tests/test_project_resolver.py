@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from ai_reasoning_engine.project_resolver import ProjectIndex, ProjectResolver, UNKNOWN
+
+PROJECTS = [
+    {"key": "DEM", "name": "Demo Platform"},
+    {"key": "SAR", "name": "Sarthi Mobile"},
+    {"key": "SARW", "name": "Sarthi Web"},
+    {"key": "SAL", "name": "Sales Pipeline"},
+]
+
+
+@pytest.fixture
+def resolver():
+    return ProjectResolver(load_projects=lambda: PROJECTS, aliases={"crm": "SAL"})
+
+
+def _no_llm(query, candidates):
+    raise AssertionError(f"unexpected LLM call for {query!r}")
+
+
+@pytest.mark.parametrize("query, key, method", [
+    ("What's blocking DEM-42?", "DEM", "key"),
+    ("open issues in SAR", "SAR", "key"),
+    ("status of the sarthi mobile project", "SAR", "exact"),
+    ("how is the CRM doing", "SAL", "exact"),
+    ("any overdue items in the pipeline", "SAL", "token"),
+    ("summary of the piepline please", "SAL", "fuzzy"),
+])
+def test_resolved_without_an_llm_call(resolver, query, key, method):
+    resolution = resolver.resolve(query, llm_fallback=_no_llm)
+    assert (resolution.key, resolution.method) == (key, method)
+    assert resolution.name == {p["key"]: p["name"] for p in PROJECTS}[key]
+
+
+def test_no_project_mentioned_stays_unknown_locally(resolver):
+    resolution = resolver.resolve("what's the date today?", llm_fallback=_no_llm)
+    assert (resolution.name, resolution.key, resolution.method) == (UNKNOWN, None, "none")
+
+
+def test_ambiguous_match_asks_the_llm_with_the_candidates(resolver):
+    asked = []
+
+    def fallback(query, candidates):
+        asked.append(sorted(candidates))
+        return "sarthi web"
+
+    resolution = resolver.resolve("how is sarthi going", llm_fallback=fallback)
+    assert asked == [["Sarthi Mobile", "Sarthi Web"]]
+    assert (resolution.key, resolution.method, resolution.candidates) == ("SARW", "llm", ["SAR", "SARW"])
+
+
+def test_project_cue_without_a_match_asks_the_llm(resolver):
+    resolution = resolver.resolve("tell me about the zeppelin project", llm_fallback=lambda q, c: "unknown")
+    assert (resolution.name, resolution.key, resolution.method) == (UNKNOWN, None, "llm")
+
+
+def test_async_resolve_matches_sync(resolver):
+    async def fallback(query, candidates):
+        return "Sarthi Mobile"
+
+    resolution = asyncio.run(resolver.aresolve("how is sarthi going", llm_fallback=fallback))
+    assert (resolution.key, resolution.method) == ("SAR", "llm")
+    assert asyncio.run(resolver.aresolve("DEM-7 owner")).key == "DEM"
+
+
+def test_index_is_cached_and_kept_when_jira_fails():
+    calls = []
+
+    def load():
+        calls.append(1)
+        if len(calls) > 1:
+            raise ConnectionError("jira down")
+        return PROJECTS
+
+    resolver = ProjectResolver(load_projects=load, aliases={}, ttl_sec=0)
+    assert resolver.resolve("DEM-1").key == "DEM"
+    assert resolver.resolve("DEM-2").key == "DEM"  # refresh failed: last index kept
+    assert len(calls) == 2
+
+    cached = ProjectResolver(load_projects=load, aliases={}, ttl_sec=3600)
+    calls.clear()
+    cached.index(), cached.index()
+    assert len(calls) == 1
+
+
+def test_canonical_maps_names_aliases_and_keys():
+    index = ProjectIndex(PROJECTS, {"crm": "SAL"})
+    assert index.canonical("Sarthi Mobile") == "SAR"
+    assert index.canonical("crm") == "SAL"
+    assert index.canonical("SARW") == "SARW"
+    assert index.canonical("Nonexistent") is None
+
+
+def test_stats_count_local_resolutions(resolver):
+    resolver.resolve("DEM-1", llm_fallback=_no_llm)
+    resolver.resolve("hello", llm_fallback=_no_llm)
+    resolver.resolve("how is sarthi going", llm_fallback=lambda q, c: "Sarthi Web")
+    stats = resolver.stats()
+    assert (stats["key"], stats["none"], stats["llm"]) == (1, 1, 1)
+    assert stats["local_rate"] == pytest.approx(2 / 3)
+    assert stats["projects_indexed"] == len(PROJECTS)
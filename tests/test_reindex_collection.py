@@ -0,0 +1,48 @@
+import uuid
+
+import pytest
+from qdrant_client.http import models as qmodels
+
+from app.scripts.reindex_collection import _reembed
+from app.services import qdrant_admin
+from app.services.qdrant_connection import get_client, run_sync
+from app.services.qdrant_profiles import get_profile
+
+
+@pytest.fixture
+def alias():
+    """An alias over a 4-d collection of 6 chunks; fileId 7's second chunk has no payload text."""
+    name = f"chunks_{uuid.uuid4().hex[:8]}"
+
+    async def setup():
+        client = get_client()
+        await client.create_collection(f"{name}_v1", vectors_config=qmodels.VectorParams(
+            size=4, distance=qmodels.Distance.COSINE))
+        await client.upsert(f"{name}_v1", points=[
+            qmodels.PointStruct(id=i, vector=[0.1 * (i + 1)] * 4, payload={"fileId": 7 if i < 3 else 8, "text": f"chunk {i}"})
+            for i in range(6) if i != 1
+        ] + [qmodels.PointStruct(id=1, vector=[0.2] * 4, payload={"fileId": 7})])
+        await client.update_collection_aliases(change_aliases_operations=[qmodels.CreateAliasOperation(
+            create_alias=qmodels.CreateAlias(collection_name=f"{name}_v1", alias_name=name))])
+
+    run_sync(setup())
+    return name
+
+
+def _rebuild(alias, **kwargs):
+    return run_sync(qdrant_admin.arebuild_collection(
+        alias, get_profile("float"), vector_size=8, vectors_of=_reembed(8), **kwargs
+    ))
+
+
+def test_a_point_without_text_blocks_the_swap(alias):
+    with pytest.raises(RuntimeError, match=r"1 points .* no payload text .*fileIds \[7\].*nothing swapped"):
+        _rebuild(alias)
+    assert run_sync(qdrant_admin.aresolve_alias(alias)) == f"{alias}_v1"
+
+
+def test_allow_missing_swaps_without_the_textless_points(alias):
+    target = _rebuild(alias, allow_missing=True)
+    assert run_sync(qdrant_admin.aresolve_alias(alias)) == target
+    assert run_sync(qdrant_admin.apoint_ids(target)) == {0, 2, 3, 4, 5}
+    assert run_sync(get_client().get_collection(target)).config.params.vectors.size == 8
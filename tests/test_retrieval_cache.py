@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.retrieval_cache import RetrievalCache
+
+
+class Backend:
+    """Counts embeddings and searches; rehydrate serves payloads by id."""
+
+    def __init__(self, text_size=3):
+        self.embeds = self.searches = self.rehydrated = 0
+        self.text_size = text_size
+
+    def embed(self, query):
+        self.embeds += 1
+        return [0.5, 0.25]
+
+    def search(self, vector):
+        self.searches += 1
+        return [SimpleNamespace(id="p1", score=0.9, payload={"text": "1" * self.text_size}),
+                SimpleNamespace(id="p2", score=0.8, payload={"text": "2" * self.text_size})]
+
+    def rehydrate(self, refs):
+        self.rehydrated += 1
+        return [SimpleNamespace(id=pid, score=score, payload={"text": pid}) for pid, score in refs]
+
+    def counts(self):
+        return self.embeds, self.searches, self.rehydrated
+
+
+@pytest.fixture
+def backend():
+    return Backend()
+
+
+def _retrieve(cache, backend, query="Open blockers?", filters=None, collection="kb"):
+    return cache.retrieve(collection, query, 2, filters or {"projectId": "P1"},
+                          backend.embed, backend.search, backend.rehydrate)
+
+
+def test_repeat_is_served_without_embedding_or_search(backend):
+    cache = RetrievalCache()
+    _retrieve(cache, backend)
+    hits = _retrieve(cache, backend, query="  open BLOCKERS ")  # same normalized query
+    assert backend.counts() == (1, 1, 0)
+    assert [(h.id, h.score, h.payload["text"]) for h in hits] == [("p1", 0.9, "111"), ("p2", 0.8, "222")]
+    assert cache.stats()["hits"] == 1
+
+
+def test_entries_too_large_for_the_budget_keep_only_ids():
+    backend = Backend(text_size=20_000)
+    cache = RetrievalCache(max_bytes=160_000)  # 10 KB per entry at most
+    _retrieve(cache, backend)
+    hits = _retrieve(cache, backend)
+    assert backend.counts() == (1, 1, 1)
+    assert [(h.id, h.score) for h in hits] == [("p1", 0.9), ("p2", 0.8)]
+    (entry,) = cache._entries.values()
+    assert entry.hits is None and entry.refs == [("p1", 0.9), ("p2", 0.8)]
+    assert cache.stats()["bytes"] < 1_000
+
+
+def test_byte_budget_evicts_least_recently_used():
+    backend = Backend(text_size=2_000)
+    cache = RetrievalCache(max_bytes=160_000)
+    for n in range(40):
+        _retrieve(cache, backend, query=f"question {n}")
+    stats = cache.stats()
+    assert stats["bytes"] <= 160_000 and stats["evictions"] > 0
+    assert backend.rehydrated == 0
+    _retrieve(cache, backend, query="question 39")
+    assert backend.searches == 40
+
+
+def test_upsert_invalidates_only_the_scopes_it_writes(backend):
+    cache = RetrievalCache()
+    _retrieve(cache, backend, filters={"projectId": "P1"})
+    _retrieve(cache, backend, filters={"projectId": "P2"})
+    cache.note_upsert("kb", [{"projectId": "P2", "chatSessionId": "S9"}])
+
+    _retrieve(cache, backend, filters={"projectId": "P1"})
+    assert backend.counts() == (2, 2, 0)
+    _retrieve(cache, backend, filters={"projectId": "P2"})
+    # Stale entry: its embedding is reused, only the search runs again.
+    assert backend.counts() == (2, 3, 0)
+    assert cache.stats()["invalidated"] == 1
+
+
+def test_unscoped_entries_see_every_upsert_and_other_collections_none(backend):
+    cache = RetrievalCache()
+    _retrieve(cache, backend, filters={"category": "design"})
+    cache.note_upsert("other", [{"projectId": "P1"}])
+    _retrieve(cache, backend, filters={"category": "design"})
+    assert backend.searches == 1
+    cache.note_upsert("kb", [{"projectId": "P7"}])
+    _retrieve(cache, backend, filters={"category": "design"})
+    assert backend.searches == 2
+
+
+def test_collection_write_invalidates_every_scope(backend):
+    cache = RetrievalCache()
+    _retrieve(cache, backend, filters={"projectId": "P1"})
+    cache.note_write("kb")
+    _retrieve(cache, backend, filters={"projectId": "P1"})
+    assert backend.counts() == (1, 2, 0)
+
+
+def test_expired_entries_are_recomputed(backend):
+    cache = RetrievalCache(ttl_sec=-1)
+    _retrieve(cache, backend)
+    _retrieve(cache, backend)
+    assert backend.counts() == (2, 2, 0)
+    assert cache.stats()["expired"] == 1
+
+
+def test_lru_bound(backend):
+    cache = RetrievalCache(max_entries=2)
+    for q in ("one", "two", "three"):
+        _retrieve(cache, backend, query=q)
+    assert cache.stats()["entries"] == 2 and cache.stats()["evictions"] == 1
+
+
+def test_async_path_shares_entries(backend):
+    cache = RetrievalCache()
+
+    async def aembed(query):
+        return backend.embed(query)
+
+    async def asearch(vector):
+        return backend.search(vector)
+
+    async def arehydrate(refs):
+        return backend.rehydrate(refs)
+
+    async def twice():
+        for _ in range(2):
+            await cache.aretrieve("kb", "q", 2, {"projectId": "P1"}, aembed, asearch, arehydrate)
+
+    asyncio.run(twice())
+    assert backend.counts() == (1, 1, 0)
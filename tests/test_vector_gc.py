@@ -0,0 +1,95 @@
+import uuid
+
+import pytest
+
+from app.db.session import SessionLocal, init_db
+from app.models.chat_session import ChatSession
+from app.models.file import File
+from app.models.user import User
+from app.services import qdrant_service, vector_gc
+
+ORPHAN_FILE_ID = 10 ** 9  # never assigned by the test database
+
+
+@pytest.fixture
+def collections(monkeypatch):
+    kb, memories = f"kb_{uuid.uuid4().hex[:8]}", f"memories_{uuid.uuid4().hex[:8]}"
+    qdrant_service.bootstrap_collection(kb, 4, qdrant_service.PAYLOAD_INDEXES)
+    qdrant_service.bootstrap_collection(memories, 4, qdrant_service.MEMORY_PAYLOAD_INDEXES)
+    monkeypatch.setattr(qdrant_service, "QDRANT_COLLECTION", kb)
+    monkeypatch.setattr(qdrant_service, "QDRANT_MEMORY_COLLECTION", memories)
+    yield kb, memories
+    qdrant_service.delete_collection(kb)
+    qdrant_service.delete_collection(memories)
+
+
+@pytest.fixture
+def db():
+    init_db()
+    with SessionLocal() as session:
+        yield session
+
+
+def _add(collection, n, **payload):
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    qdrant_service.upsert_points(
+        [{"id": i, "vector": [1, 0, 0, 0], "payload": {"text": "chunk", **payload}} for i in ids],
+        collection=collection,
+    )
+    return set(ids)
+
+
+def _ids(collection):
+    return set(qdrant_service.scroll_points({}, collection=collection))
+
+
+def _live_file(db) -> int:
+    f = File(filename="spec.txt", s3_key=f"kb/{uuid.uuid4()}-spec.txt", is_kb=True)
+    db.add(f)
+    db.commit()
+    return f.id
+
+
+def test_sweep_deletes_orphaned_chunks_only(collections, db):
+    kb, memories = collections
+    live = _add(kb, 3, fileId=_live_file(db))
+    _add(kb, 2, fileId=ORPHAN_FILE_ID)
+    memory = _add(memories, 2, chatSessionId="gone")
+
+    report = vector_gc.sweep(s3=False)
+
+    assert report["files"] == {"orphaned_files": 1, "points_deleted": 2}
+    assert _ids(kb) == live
+    assert _ids(memories) == memory  # sessions are only swept when asked
+
+
+def test_dry_run_reports_without_deleting(collections, db):
+    kb, memories = collections
+    _add(kb, 1, fileId=_live_file(db))
+    _add(kb, 2, fileId=ORPHAN_FILE_ID)
+    _add(memories, 1, chatSessionId="gone")
+    before = _ids(kb), _ids(memories)
+
+    report = vector_gc.sweep(dry_run=True, sessions=True, s3=False)
+
+    assert report["dry_run"] is True
+    assert report["files"] == {"orphaned_files": 1, "points_deleted": 2}
+    assert report["sessions"] == {"orphaned_sessions": 1, "points_deleted": 1}
+    assert (_ids(kb), _ids(memories)) == before
+
+
+def test_session_sweep_keeps_memories_of_live_sessions(collections, db):
+    _, memories = collections
+    user = User(email=f"{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    session_id = str(uuid.uuid4())
+    db.add(ChatSession(id=session_id, user_id=user.id))
+    db.commit()
+    kept = _add(memories, 2, chatSessionId=session_id)
+    _add(memories, 3, chatSessionId="gone")
+
+    report = vector_gc.sweep(sessions=True, s3=False)
+
+    assert report["sessions"] == {"orphaned_sessions": 1, "points_deleted": 3}
+    assert _ids(memories) == kept